@@ -3,73 +3,195 @@ DB Knih API - A Python library for scraping book information from databazeknih.c
 
 This package provides a clean interface to search for books and retrieve detailed
 information from the Czech book database website.
-"""
 
-from .book_service import BookService
-from .fetcher import Fetcher
-from .models import BookInfo, Review, SearchInfo
-from .search_service import SearchService
+Public names are imported lazily on first access, so ``import db_knih_api`` does not
+load ``requests``, ``bs4`` or ``lxml`` and does not create any HTTP session until
+something is actually used.
+"""
+import importlib
+import threading
+from typing import TYPE_CHECKING
 
 __version__ = "1.0.3"
 __author__ = "ROGR3"
 __email__ = "your.email@example.com"
 
-# Create a default instance for easy importing
-from .book_service import BookService
-from .search_service import SearchService
+if TYPE_CHECKING:
+    from .book_service import BookService
+    from .cache import CacheStats, TTLCache
+    from .circuit_breaker import CircuitBreaker, CircuitState
+    from .client import DBKnih
+    from .collection import BookCollection
+    from .concurrency import AdaptiveConcurrencyLimiter, ConcurrencyStats
+    from .covers import CoverDownloader, CoverStore
+    from .deadline import CancellationToken, cancellation
+    from .exceptions import CircuitOpenError, DBKnihError, DeadlineExceededError, FetchError, NotFoundError
+    from .fetcher import Fetcher
+    from .hedging import HedgePolicy
+    from .listing_service import AuthorService, SeriesService
+    from .models import BookChange, BookInfo, MultiSearchResult, Review, ReviewCursor, SearchInfo
+    from .negative_cache import NegativeCache, NegativeCacheStats
+    from .profiling import Profiler
+    from .rate_limiter import RateLimiter
+    from .refresh import RefreshCache
+    from .resolver import Resolver, ResolverIndex
+    from .retry import RetryPolicy, is_retryable
+    from .scheduler import Priority, QueueTimeStats, RequestScheduler, scheduling
+    from .search_service import SearchService
+    from .service import HTTPService, ServiceClient
+    from .sitemap import CrawlQueue, SitemapDiscovery
+    from .snapshot import CatalogSnapshot, write_snapshot
+    from .store import BookStore, CachingBookService
+    from .tracing import JSONLogSink, SlowestTraces, Span, Trace, Tracer
+    from .watchlist import Watchlist, WatchlistStats
+
+    db_knih: DBKnih
+
+# Public name -> submodule that defines it
+_LAZY_ATTRIBUTES = {
+    'DBKnih': '.client',
+    'BookService': '.book_service',
+    'SearchService': '.search_service',
+    'AuthorService': '.listing_service',
+    'SeriesService': '.listing_service',
+    'Fetcher': '.fetcher',
+    'BookInfo': '.models',
+    'SearchInfo': '.models',
+    'Review': '.models',
+    'ReviewCursor': '.models',
+    'BookChange': '.models',
+    'MultiSearchResult': '.models',
+    'RateLimiter': '.rate_limiter',
+    'RefreshCache': '.refresh',
+    'HedgePolicy': '.hedging',
+    'DBKnihError': '.exceptions',
+    'FetchError': '.exceptions',
+    'DeadlineExceededError': '.exceptions',
+    'CircuitOpenError': '.exceptions',
+    'NotFoundError': '.exceptions',
+    'CircuitBreaker': '.circuit_breaker',
+    'CircuitState': '.circuit_breaker',
+    'RetryPolicy': '.retry',
+    'is_retryable': '.retry',
+    'BookStore': '.store',
+    'CachingBookService': '.store',
+    'BookCollection': '.collection',
+    'TTLCache': '.cache',
+    'CacheStats': '.cache',
+    'Resolver': '.resolver',
+    'ResolverIndex': '.resolver',
+    'RequestScheduler': '.scheduler',
+    'Priority': '.scheduler',
+    'QueueTimeStats': '.scheduler',
+    'scheduling': '.scheduler',
+    'CancellationToken': '.deadline',
+    'cancellation': '.deadline',
+    'NegativeCache': '.negative_cache',
+    'NegativeCacheStats': '.negative_cache',
+    'Tracer': '.tracing',
+    'Trace': '.tracing',
+    'Span': '.tracing',
+    'JSONLogSink': '.tracing',
+    'SlowestTraces': '.tracing',
+    'Profiler': '.profiling',
+    'AdaptiveConcurrencyLimiter': '.concurrency',
+    'ConcurrencyStats': '.concurrency',
+    'SitemapDiscovery': '.sitemap',
+    'CoverDownloader': '.covers',
+    'CoverStore': '.covers',
+    'HTTPService': '.service',
+    'ServiceClient': '.service',
+    'CatalogSnapshot': '.snapshot',
+    'write_snapshot': '.snapshot',
+    'CrawlQueue': '.sitemap',
+    'Watchlist': '.watchlist',
+    'WatchlistStats': '.watchlist',
+}
+
+_default_instance_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    if name == 'db_knih':
+        # Create the default instance on first use
+        with _default_instance_lock:
+            if 'db_knih' not in globals():
+                globals()['db_knih'] = __getattr__('DBKnih')()
+        return globals()['db_knih']
+
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
 
-class DBKnih:
-    """Main API class that combines search and book services."""
-    
-    def __init__(self, book_service: BookService = None, search_service: SearchService = None):
-        """
-        Initialize the DB Knih API.
-        
-        Args:
-            book_service: Optional BookService instance for testing
-            search_service: Optional SearchService instance for testing
-        """
-        self.book_service = book_service or BookService()
-        self.search_service = search_service or SearchService()
-    
-    def search(self, text: str) -> list[SearchInfo]:
-        """
-        Search for books with the given text.
-        
-        Args:
-            text: The search query
-            
-        Returns:
-            List of SearchInfo objects with basic book information
-        """
-        return self.search_service.search(text)
-    
-    def get_book_info(self, book_link: str) -> BookInfo | None:
-        """
-        Get detailed book information from the book link.
-        
-        Args:
-            book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
-            
-        Returns:
-            BookInfo object with extracted data, or None if extraction fails
-        """
-        return self.book_service.get_book_info(book_link)
 
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
-# Create a default instance for easy importing
-db_knih = DBKnih()
 
 __all__ = [
     'DBKnih',
-    'BookService', 
+    'BookService',
     'SearchService',
+    'AuthorService',
+    'SeriesService',
     'Fetcher',
     'BookInfo',
-    'SearchInfo', 
+    'SearchInfo',
     'Review',
+    'ReviewCursor',
+    'RateLimiter',
+    'BookChange',
+    'MultiSearchResult',
+    'RefreshCache',
+    'HedgePolicy',
+    'DBKnihError',
+    'FetchError',
+    'DeadlineExceededError',
+    'CircuitOpenError',
+    'NotFoundError',
+    'CircuitBreaker',
+    'CircuitState',
+    'RetryPolicy',
+    'is_retryable',
+    'BookStore',
+    'CachingBookService',
+    'BookCollection',
+    'TTLCache',
+    'CacheStats',
+    'Resolver',
+    'ResolverIndex',
+    'RequestScheduler',
+    'Priority',
+    'QueueTimeStats',
+    'scheduling',
+    'CancellationToken',
+    'cancellation',
+    'NegativeCache',
+    'NegativeCacheStats',
+    'Tracer',
+    'Trace',
+    'Span',
+    'JSONLogSink',
+    'SlowestTraces',
+    'Profiler',
+    'AdaptiveConcurrencyLimiter',
+    'ConcurrencyStats',
+    'SitemapDiscovery',
+    'CrawlQueue',
+    'CoverDownloader',
+    'CoverStore',
+    'HTTPService',
+    'ServiceClient',
+    'CatalogSnapshot',
+    'write_snapshot',
+    'Watchlist',
+    'WatchlistStats',
     'db_knih',
     '__version__',
     '__author__',
     '__email__'
-]
\ No newline at end of file
+]
@@ -0,0 +1,8 @@
+"""
+Allow running the command line interface with ``python -m db_knih_api``.
+"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Concurrent batch execution with throughput and latency statistics.
+"""
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Set
+
+from .concurrency import AdaptiveConcurrencyLimiter
+from .deadline import CancellationToken, Deadline, cancellation
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one batch item."""
+    input: str
+    result: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the item succeeded."""
+        return self.error is None
+
+    def to_json(self) -> str:
+        """Serialize the result as a single JSON line."""
+        return json.dumps({
+            "input": self.input,
+            "ok": self.ok,
+            "result": _to_jsonable(self.result),
+            "error": self.error,
+            "elapsed": round(self.elapsed, 6),
+        }, ensure_ascii=False)
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Convert dataclasses (and lists of them) into JSON-compatible values."""
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(item) for item in value]
+    return value
+
+
+class BatchStats:
+    """Thread-safe counters and latency percentiles of a batch run."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """Initialize empty statistics."""
+        self._clock = clock
+        self.started_at = clock()
+        self.completed = 0
+        self.errors = 0
+        self._latencies: List[float] = []
+        self._lock = threading.Lock()
+
+    def record(self, result: BatchResult) -> None:
+        """Record a finished item."""
+        with self._lock:
+            self.completed += 1
+            if not result.ok:
+                self.errors += 1
+            self._latencies.append(result.elapsed)
+
+    def throughput(self) -> float:
+        """Completed items per second since the start."""
+        elapsed = self._clock() - self.started_at
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Latency percentile in seconds, or None if nothing completed yet."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(percent / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        def fmt(percent: float) -> str:
+            value = self.percentile(percent)
+            return f"{value * 1000:.0f}ms" if value is not None else "-"
+
+        return (f"{self.completed} done, {self.errors} errors, {self.throughput():.1f}/s, "
+                f"p50 {fmt(50)}, p95 {fmt(95)}, p99 {fmt(99)}")
+
+
+class BatchRunner:
+    """Runs a function over many inputs concurrently, yielding results as they finish."""
+
+    def __init__(self, func: Callable[[str], Any], concurrency: int = 4,
+                 stats: Optional[BatchStats] = None,
+                 is_error: Optional[Callable[[Any], Optional[str]]] = None,
+                 limiter: Optional[AdaptiveConcurrencyLimiter] = None):
+        """
+        Initialize the batch runner.
+
+        Args:
+            func: Function called with each input
+            concurrency: Maximum number of inputs processed at the same time
+            stats: Optional statistics object to update
+            is_error: Optional check returning an error message for results that
+                should count as failures (e.g. ``None`` from get_book_info)
+            limiter: Optional adaptive limiter, usually the one of the fetcher used
+                by ``func``; no more inputs than its current limit are started
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        self.func = func
+        self.concurrency = concurrency
+        self.stats = stats or BatchStats()
+        self.is_error = is_error
+        self.limiter = limiter
+
+    def run(self, inputs: Iterable[str], deadline: Optional[Deadline] = None) -> Iterator[BatchResult]:
+        """
+        Process inputs and yield their results in completion order.
+
+        Inputs are consumed lazily, so arbitrarily long streams use constant memory.
+
+        Args:
+            inputs: Items to process
+            deadline: Optional seconds or CancellationToken bounding the whole run;
+                once it passes, running items abort and the remaining inputs fail
+                with a DeadlineExceededError result without being started
+
+        Returns:
+            Iterator of BatchResult objects
+        """
+        inputs = iter(inputs)
+        token = CancellationToken(timeout=deadline) if isinstance(deadline, (int, float)) else deadline
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < self._window():
+                    item = next(inputs, None)
+                    if item is None:
+                        exhausted = True
+                    else:
+                        pending.add(executor.submit(contextvars.copy_context().run, self._run_one, item, token))
+
+                if not pending:
+                    return
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    self.stats.record(result)
+                    yield result
+
+    def _window(self) -> int:
+        """Number of inputs that may be in progress right now."""
+        if self.limiter is None:
+            return self.concurrency
+        return min(self.concurrency, self.limiter.limit)
+
+    def _run_one(self, item: str, token: Optional[CancellationToken] = None) -> BatchResult:
+        started_at = time.monotonic()
+        try:
+            with cancellation(token):
+                if token is not None:
+                    token.check(item)
+                value = self.func(item)
+            error = self.is_error(value) if self.is_error else None
+        except Exception as e:
+            value, error = None, f"{type(e).__name__}: {e}"
+        return BatchResult(input=item, result=value, error=error, elapsed=time.monotonic() - started_at)
+
+
+def read_inputs(lines: Iterable[str], skip: Optional[Set[str]] = None) -> Iterator[str]:
+    """
+    Yield stripped, non-empty input lines, skipping comments and already done items.
+
+    Args:
+        lines: Raw input lines
+        skip: Inputs to leave out (e.g. loaded by ``load_completed_inputs``)
+
+    Returns:
+        Iterator of inputs
+    """
+    for line in lines:
+        item = line.strip()
+        if not item or item.startswith("#"):
+            continue
+        if skip and item in skip:
+            continue
+        yield item
+
+
+def load_completed_inputs(path: str) -> Set[str]:
+    """
+    Collect the inputs that already succeeded in a JSONL output file.
+
+    Args:
+        path: JSONL file written by a previous run
+
+    Returns:
+        Set of successful inputs; failed inputs are retried on resume
+    """
+    completed = set()
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line may be truncated if the previous run was killed
+                    continue
+                if record.get("ok"):
+                    completed.add(record["input"])
+    except FileNotFoundError:
+        pass
+    return completed
+
+
+def drop_incomplete_line(path: str, chunk_size: int = 8192) -> None:
+    """
+    Truncate a JSONL output file after its last complete line.
+
+    A run that was killed may have left a partial last record; appending to it
+    would glue the next record onto the fragment.
+
+    Args:
+        path: JSONL file written by a previous run; a missing file is ignored
+        chunk_size: Size in bytes of the blocks read backwards from the end
+    """
+    try:
+        fh = open(path, "r+b")
+    except FileNotFoundError:
+        return
+    with fh:
+        end = fh.seek(0, 2)
+        position = end
+        while position > 0:
+            start = max(0, position - chunk_size)
+            fh.seek(start)
+            newline = fh.read(position - start).rfind(b"\n")
+            if newline != -1:
+                fh.truncate(start + newline + 1)
+                return
+            position = start
+        fh.truncate(0)
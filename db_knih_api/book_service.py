@@ -1,14 +1,22 @@
 """
 Book service for extracting detailed book information from databazeknih.cz.
 """
+import contextvars
 import re
-from typing import List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 
+from .deadline import Deadline, cancellation, check_deadline, deadline_expired
+from .exceptions import CircuitOpenError, FetchError, NotFoundError
 from .fetcher import Fetcher
-from .models import BookInfo, Review
+from .models import BookChange, BookInfo, BookOverview, Review, ReviewCursor
+from .negative_cache import NOT_FOUND, UNPARSEABLE, NegativeCache
+from .refresh import RefreshCache, RefreshEntry, diff_book_info, fingerprint
+from .retry import RetryPolicy
+from .tracing import span
 
 SoupNode = Union[BeautifulSoup, Tag]
 
@@ -16,53 +24,256 @@ SoupNode = Union[BeautifulSoup, Tag]
 class BookService:
     """Service for extracting detailed book information from HTML."""
     
-    def __init__(self, fetcher: Optional[Fetcher] = None):
-        """Initialize the book service with an optional fetcher for testing."""
+    BOOK_PAGE = "book"
+    MORE_INFO_PAGE = "more_info"
+    REVIEWS_PAGE = "reviews"
+    
+    def __init__(self, fetcher: Optional[Fetcher] = None,
+                 retry_policies: Optional[Dict[str, RetryPolicy]] = None,
+                 allow_partial: bool = False,
+                 negative_cache: Optional[NegativeCache] = None):
+        """
+        Initialize the book service.
+        
+        Args:
+            fetcher: Optional fetcher for testing
+            retry_policies: Optional retry policies by page kind (BOOK_PAGE,
+                MORE_INFO_PAGE, REVIEWS_PAGE); a "default" key applies to other kinds
+            allow_partial: Return a BookInfo marked incomplete when only the
+                more-info page could not be fetched
+            negative_cache: Optional cache of links whose overview page was not
+                found or could not be parsed; remembered links return None
+                without any request
+        """
         self.fetcher = fetcher or Fetcher()
+        self.retry_policies = retry_policies or {}
+        self.allow_partial = allow_partial
+        self.negative_cache = negative_cache
     
-    def get_book_info(self, book_link: str) -> Optional[BookInfo]:
+    def get_book_info(self, book_link: str, deadline: Optional[Deadline] = None) -> Optional[BookInfo]:
         """
         Get detailed book information from the book link.
         
         Args:
             book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+            deadline: Optional seconds or CancellationToken bounding the whole call
+            
+        Returns:
+            BookInfo object with extracted data, or None if extraction fails.
+            With ``allow_partial`` the result may have ``complete`` set to False.
+            
+        Raises:
+            DeadlineExceededError: If the deadline passes or the token is cancelled
+        """
+        with cancellation(deadline):
+            if self.negative_cache is not None and self.negative_cache.get(book_link) is not None:
+                return None
+            
+            pages = self._fetch_book_pages(book_link)
+            if pages is None:
+                return None
+            
+            check_deadline(book_link)
+            info = self._parse_book_pages(*pages)
+            if info is None and self.negative_cache is not None:
+                self.negative_cache.add(book_link, UNPARSEABLE)
+            return info
+    
+    def refresh_book_info(self, book_link: str, cache: RefreshCache) -> Tuple[Optional[BookInfo], Optional[BookChange]]:
+        """
+        Get book information, reusing the cached result when neither page changed.
+        
+        Both pages are always downloaded, but they are only parsed again when their
+        content fingerprint differs from the one stored in the cache.
+        
+        Args:
+            book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+            cache: Cache of fingerprints and previously extracted information
+            
+        Returns:
+            Tuple of the current BookInfo (or None if extraction fails) and a
+            BookChange if any field differs from the cached version
+        """
+        book_url, additional_url = self._book_urls(book_link)
+        pages = self._fetch_book_pages(book_link)
+        if pages is None:
+            return None, None
+        
+        book_html, additional_html = pages
+        if additional_html is None:
+            # Partial results are never cached, so the next refresh fetches them again
+            return self._parse_book_pages(book_html, None), None
+        
+        fingerprints = {book_url: fingerprint(book_html), additional_url: fingerprint(additional_html)}
+        
+        previous = cache.get(book_link)
+        if previous and previous.info and previous.fingerprints == fingerprints:
+            return previous.info, None
+        
+        info = self._parse_book_pages(book_html, additional_html)
+        if info is None:
+            return None, None
+        
+        cache.put(book_link, RefreshEntry(fingerprints=fingerprints, info=info))
+        return info, diff_book_info(book_link, previous.info if previous else None, info)
+    
+    def refresh(self, book_links: Iterable[str], cache: RefreshCache) -> List[BookChange]:
+        """
+        Refresh many books and collect a change feed.
+        
+        Args:
+            book_links: Book identifiers to refresh
+            cache: Cache of fingerprints and previously extracted information
+            
+        Returns:
+            BookChange objects for the books whose information actually changed
+        """
+        changes = []
+        for book_link in book_links:
+            _, change = self.refresh_book_info(book_link, cache)
+            if change:
+                changes.append(change)
+        return changes
+    
+    def poll_book_overview(self, book_link: str, etag: Optional[str] = None,
+                           last_modified: Optional[str] = None,
+                           previous_fingerprint: Optional[str] = None) -> BookOverview:
+        """
+        Fetch only the overview page, which holds the rating and the number of ratings.
+        
+        The request is conditional when validators of a previous poll are given,
+        and the page is not parsed again when it is not modified or its content
+        fingerprint equals ``previous_fingerprint``. The result is partial
+        (``complete`` is False) because the more-info page is not fetched.
+        
+        Args:
+            book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+            etag: ETag of the previous poll
+            last_modified: Last-Modified of the previous poll
+            previous_fingerprint: Fingerprint of the previous poll
             
         Returns:
-            BookInfo object with extracted data, or None if extraction fails
+            BookOverview with the parsed information (None if unchanged or
+            unparseable) and the validators for the next poll
+            
+        Raises:
+            FetchError: If the page cannot be fetched (NotFoundError if it is missing)
         """
+        url = self.fetcher.create_book_info_url(book_link)
+        policy = self.retry_policies.get(self.BOOK_PAGE, self.retry_policies.get("default"))
+        if policy:
+            response = policy.call(self.fetcher.fetch_conditional, url, etag, last_modified)
+        else:
+            response = self.fetcher.fetch_conditional(url, etag, last_modified)
+        
+        overview = BookOverview(etag=response.etag, last_modified=response.last_modified,
+                                fingerprint=previous_fingerprint)
+        if response.not_modified:
+            overview.unchanged = True
+            return overview
+        
+        overview.fingerprint = fingerprint(response.content)
+        if overview.fingerprint == previous_fingerprint:
+            overview.unchanged = True
+            return overview
+        overview.info = self._parse_book_pages(response.content, None)
+        return overview
+    
+    def _book_urls(self, book_link: str) -> Tuple[str, str]:
+        """Create the overview and more-info URLs for a book link."""
         book_url = self.fetcher.create_book_info_url(book_link)
         additional_url = self.fetcher.create_additional_book_info_url(
             book_link.split("-")[-1] if "-" in book_link else ""
         )
+        return book_url, additional_url
+    
+    def _fetch_book_pages(self, book_link: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Fetch the overview and more-info pages, or return None if either fails.
         
-        book_html = self.fetcher.fetch_page(book_url)
-        additional_html = self.fetcher.fetch_page(additional_url)
+        With ``allow_partial`` a failed more-info page is returned as None
+        instead of discarding the successfully fetched overview page.
+        """
+        book_url, additional_url = self._book_urls(book_link)
         
-        if book_html == 'Error' or additional_html == 'Error':
+        try:
+            book_html = self._fetch(book_url, self.BOOK_PAGE)
+        except NotFoundError:
+            if self.negative_cache is not None:
+                self.negative_cache.add(book_link, NOT_FOUND)
+            return None
+        if book_html is None:
             return None
         
-        book_soup = BeautifulSoup(book_html, 'lxml')
-        additional_soup = BeautifulSoup(additional_html, 'lxml')
+        additional_html = self._fetch(additional_url, self.MORE_INFO_PAGE)
+        if additional_html is None and not self.allow_partial:
+            return None
+        
+        return book_html, additional_html
+    
+    def _fetch(self, url: str, page_kind: str) -> Optional[str]:
+        """
+        Fetch a page, retrying according to the policy for its kind.
+        
+        With a negative cache, a missing overview page raises NotFoundError so
+        the caller can remember it.
+        """
+        policy = self.retry_policies.get(page_kind, self.retry_policies.get("default"))
+        report_missing = self.negative_cache is not None and page_kind == self.BOOK_PAGE
+        if policy is None and not report_missing:
+            html = self.fetcher.fetch_page(url)
+            return None if html == 'Error' else html
+        
+        try:
+            return policy.call(self.fetcher.fetch, url) if policy else self.fetcher.fetch(url)
+        except CircuitOpenError:
+            raise
+        except FetchError as e:
+            if deadline_expired():
+                # Report the expired deadline rather than whatever the last attempt hit
+                check_deadline(url)
+            if report_missing and isinstance(e, NotFoundError):
+                raise
+            print(f"Error fetching {url}: {e}")
+            return None
+    
+    def _parse_book_pages(self, book_html: str, additional_html: Optional[str]) -> Optional[BookInfo]:
+        """Parse the overview and (if available) more-info pages into a BookInfo."""
+        with span("parse.soup", page=self.BOOK_PAGE):
+            book_soup = BeautifulSoup(book_html, 'lxml')
+        check_deadline()
+        additional_soup = None
+        if additional_html is not None:
+            with span("parse.soup", page=self.MORE_INFO_PAGE):
+                additional_soup = BeautifulSoup(additional_html, 'lxml')
         
         book_content = book_soup.select_one("#faux > #content")
         if not book_content:
             return None
         
+        extract = self._extract
         return BookInfo(
-            plot=self._get_book_plot(book_content),
-            genres=self._get_genres(book_content),
-            year=self._get_published_year(book_content),
-            author=self._get_author(book_content),
-            publisher=self._get_publisher(book_content, additional_soup),
-            rating=self._get_rating(book_content),
-            numberOfRatings=self._get_number_of_ratings(book_content),
-            reviews=self._get_reviews(book_content),
-            cover=self._get_cover_image(book_content),
-            pages=self._get_page_count(additional_soup),
-            originalLanguage=self._get_original_language(additional_soup),
-            isbn=self._get_isbn(additional_soup),
+            plot=extract(self._get_book_plot, book_content),
+            genres=extract(self._get_genres, book_content),
+            year=extract(self._get_published_year, book_content),
+            author=extract(self._get_author, book_content),
+            publisher=extract(self._get_publisher, book_content, additional_soup),
+            rating=extract(self._get_rating, book_content),
+            numberOfRatings=extract(self._get_number_of_ratings, book_content),
+            reviews=extract(self._get_reviews, book_content),
+            cover=extract(self._get_cover_image, book_content),
+            pages=extract(self._get_page_count, additional_soup) if additional_soup else None,
+            originalLanguage=extract(self._get_original_language, additional_soup) if additional_soup else None,
+            isbn=extract(self._get_isbn, additional_soup) if additional_soup else None,
+            complete=additional_soup is not None,
         )
     
+    @staticmethod
+    def _extract(extractor, *args):
+        """Run an extractor, timed as a span named after it when tracing."""
+        with span(extractor.__name__):
+            return extractor(*args)
+    
     def _get_book_plot(self, book_content: SoupNode) -> Optional[str]:
         """Extract the book plot from the HTML content."""
         # Try multiple selectors for plot/summary
@@ -254,18 +465,67 @@ class BookService:
     def _get_reviews(self, book_content: SoupNode) -> List[Review]:
         """Extract reviews from the HTML content."""
         review_elements = book_content.select(".komentars_user")[:5]  # Limit to 5 reviews
+        return [self._parse_review(review_elem) for review_elem in review_elements]
+    
+    def _parse_review(self, review_elem: SoupNode) -> Review:
+        """Parse a single review element."""
+        return Review(
+            text=self._get_text_content(review_elem, ".komholdu > p"),
+            rating=self._get_review_rating(review_elem),
+            username=self._get_attribute(review_elem, "img", "title"),
+            date=self._get_text_content(review_elem, ".fright.clear_comm > .pozn_light.odleft_pet"),
+        )
+    
+    def iter_reviews(self, book_link: str, cursor: Optional[ReviewCursor] = None,
+                     limit: Optional[int] = None, max_workers: int = 4) -> "ReviewIterator":
+        """
+        Iterate over all reviews of a book, walking every review page.
         
-        reviews = []
-        for review_elem in review_elements:
-            review = Review(
-                text=self._get_text_content(review_elem, ".komholdu > p"),
-                rating=self._get_review_rating(review_elem),
-                username=self._get_attribute(review_elem, "img", "title"),
-                date=self._get_text_content(review_elem, ".fright.clear_comm > .pozn_light.odleft_pet"),
-            )
-            reviews.append(review)
+        Pages are fetched concurrently (up to ``max_workers`` at a time) through
+        the fetcher, so any rate limiter configured on it still applies.
         
-        return reviews
+        Args:
+            book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+            cursor: Optional position to resume from (see ``ReviewIterator.cursor``)
+            limit: Optional maximum number of reviews to yield
+            max_workers: Number of review pages fetched concurrently
+            
+        Returns:
+            ReviewIterator yielding Review objects in page order; iterating it
+            raises FetchError if a review page cannot be fetched
+        """
+        return ReviewIterator(self, book_link, cursor=cursor, limit=limit, max_workers=max_workers)
+    
+    def _fetch_review_page(self, book_link: str, page: int) -> Tuple[List[Review], Optional[int]]:
+        """
+        Fetch and parse one page of reviews, returning no reviews past the last page.
+        
+        Unlike the book pages, a failure raises FetchError, so it cannot be
+        mistaken for the end of the reviews.
+        
+        Returns:
+            The reviews of the page and the number of pages shown by its pager
+            (None if it has none)
+        """
+        url = self.fetcher.create_reviews_url(book_link, page)
+        policy = self.retry_policies.get(self.REVIEWS_PAGE, self.retry_policies.get("default"))
+        try:
+            html = policy.call(self.fetcher.fetch, url) if policy else self.fetcher.fetch(url)
+        except NotFoundError:
+            return [], None
+        
+        soup = BeautifulSoup(html, 'lxml')
+        reviews = [self._parse_review(review_elem) for review_elem in soup.select(".komentars_user")]
+        return reviews, self._get_review_page_count(soup)
+    
+    def _get_review_page_count(self, soup: SoupNode) -> Optional[int]:
+        """Extract the number of review pages from the pager links (``?str=N``)."""
+        page_numbers = []
+        for link_elem in soup.select('a[href*="komentare-knihy"]'):
+            page_match = re.search(r'[?&]str=(\d+)', str(link_elem.get("href", "")))
+            if page_match:
+                page_numbers.append(int(page_match.group(1)))
+        return max(page_numbers) if page_numbers else None
     
     def _get_review_rating(self, review_elem: SoupNode) -> Optional[float]:
         """Extract rating from a review element."""
@@ -363,3 +623,84 @@ class BookService:
             return float(cleaned_text)
         except ValueError:
             return None
+
+
+class ReviewIterator:
+    """
+    Iterator over every review of a book.
+    
+    After each yielded review ``cursor`` points at the next review, so a new
+    iterator created with that cursor resumes exactly where this one stopped.
+    Iteration ends at the first page without a review not seen before (the
+    site may serve the last page again for later page numbers) or at the last
+    page shown by the pager. A page that cannot be fetched raises FetchError,
+    leaving ``cursor`` at the start of that page.
+    
+    Pages are prefetched in copies of the caller's context, so its deadline,
+    scheduling class and trace apply to them.
+    """
+    
+    def __init__(self, book_service: BookService, book_link: str,
+                 cursor: Optional[ReviewCursor] = None, limit: Optional[int] = None,
+                 max_workers: int = 4):
+        """Initialize the iterator; pages are only fetched once iteration starts."""
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        
+        self.book_service = book_service
+        self.book_link = book_link
+        self.cursor = cursor or ReviewCursor()
+        self.limit = limit
+        self.max_workers = max_workers
+        self.count = 0
+    
+    def __iter__(self) -> Iterator[Review]:
+        page = self.cursor.page
+        seen = set()
+        page_count: Optional[int] = None
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while not self._limit_reached():
+                last_page = page + self.max_workers - 1
+                if page_count is not None:
+                    last_page = min(last_page, page_count)
+                pages = list(range(page, last_page + 1))
+                if not pages:
+                    return
+                futures = [
+                    executor.submit(contextvars.copy_context().run,
+                                    self.book_service._fetch_review_page, self.book_link, p)
+                    for p in pages
+                ]
+                
+                try:
+                    for current_page, future in zip(pages, futures):
+                        reviews, pager_count = future.result()
+                        if pager_count is not None:
+                            page_count = max(page_count or 0, pager_count)
+                        keys = [(review.username, review.date, review.text, review.rating) for review in reviews]
+                        if all(key in seen for key in keys):
+                            # Empty, or a repeat of an earlier page
+                            return
+                        seen.update(keys)
+                        
+                        offset = self.cursor.offset if current_page == self.cursor.page else 0
+                        for index in range(offset, len(reviews)):
+                            if self._limit_reached():
+                                return
+                            self.cursor = ReviewCursor(page=current_page, offset=index + 1)
+                            self.count += 1
+                            yield reviews[index]
+                        
+                        self.cursor = ReviewCursor(page=current_page + 1, offset=0)
+                        if page_count is not None and current_page >= page_count:
+                            return
+                finally:
+                    for future in futures:
+                        future.cancel()
+                
+                page += self.max_workers
+    
+    def _limit_reached(self) -> bool:
+        """Check whether the requested number of reviews has been yielded."""
+        return self.limit is not None and self.count >= self.limit
@@ -0,0 +1,142 @@
+"""
+Bounded in-memory cache with time-to-live and hit-rate statistics.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+
+@dataclass
+class CacheStats:
+    """Counters of a cache."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups that were hits (0 when nothing was looked up)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a time-to-live.
+
+    When ``max_size`` is reached the least recently used entry is evicted.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries
+            ttl: Default time-to-live in seconds, or None for entries that never expire
+            clock: Monotonic clock, replaceable for testing
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._lookup(key) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a value, counting the lookup as hit or miss.
+
+        Args:
+            key: The cache key
+            default: Returned when the key is missing or expired
+
+        Returns:
+            The cached value or the default
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self._stats.misses += 1
+                return default
+            self._stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: The cache key
+            value: The value to store
+            ttl: Optional time-to-live overriding the cache default
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a key if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries; statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def items(self) -> List[Tuple[Hashable, Any, Optional[float]]]:
+        """Get the live entries as (key, value, expiry time on the cache clock) tuples."""
+        now = self._clock()
+        with self._lock:
+            return [
+                (key, value, expires_at)
+                for key, (value, expires_at) in self._entries.items()
+                if expires_at is None or now < expires_at
+            ]
+
+    def stats(self) -> CacheStats:
+        """Get a snapshot of the cache counters."""
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                size=len(self._entries),
+            )
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at is not None and self._clock() >= expires_at:
+            del self._entries[key]
+            self._stats.expirations += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+
+_MISSING = object()
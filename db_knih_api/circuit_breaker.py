@@ -0,0 +1,163 @@
+"""
+Circuit breaker for failing fast while databazeknih.cz is degraded.
+"""
+import enum
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+
+class CircuitState(enum.Enum):
+    """States of a circuit breaker."""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+StateListener = Callable[["CircuitBreaker", CircuitState, CircuitState], None]
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker driven by error rate and latency.
+
+    Calls are recorded in a sliding window. A call counts as bad when it fails or
+    takes longer than ``slow_call_threshold``. Once the window holds at least
+    ``min_calls`` calls and the share of bad calls reaches ``failure_rate_threshold``,
+    the breaker opens and rejects calls for ``open_duration`` seconds. It then lets
+    ``half_open_max_calls`` probe calls through: if they all succeed the breaker
+    closes, otherwise it opens again.
+    """
+
+    def __init__(self, failure_rate_threshold: float = 0.5, window: int = 20,
+                 min_calls: int = 10, slow_call_threshold: Optional[float] = None,
+                 open_duration: float = 30.0, half_open_max_calls: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            failure_rate_threshold: Share of bad calls (0-1) that opens the breaker
+            window: Number of most recent calls considered
+            min_calls: Calls needed in the window before the breaker may open
+            slow_call_threshold: Optional latency in seconds above which a call is bad
+            open_duration: Seconds the breaker stays open before probing
+            half_open_max_calls: Probe calls allowed while half-open
+            clock: Monotonic clock, replaceable for testing
+        """
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError("failure_rate_threshold must be between 0 and 1")
+
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.slow_call_threshold = slow_call_threshold
+        self.open_duration = open_duration
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._outcomes = deque(maxlen=window)
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self._listeners: List[StateListener] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: StateListener) -> None:
+        """
+        Register a callback for state transitions.
+
+        Args:
+            listener: Called with the breaker, the old state and the new state
+        """
+        self._listeners.append(listener)
+
+    @property
+    def state(self) -> CircuitState:
+        """The current state of the breaker."""
+        with self._lock:
+            transition = self._update_state()
+        self._notify(transition)
+        return self._state
+
+    @property
+    def failure_rate(self) -> float:
+        """Share of bad calls in the current window."""
+        with self._lock:
+            return self._failure_rate()
+
+    def allow_request(self) -> bool:
+        """Check whether a call may be made, reserving a probe slot if half-open."""
+        with self._lock:
+            transition = self._update_state()
+            if self._state == CircuitState.CLOSED:
+                allowed = True
+            elif self._state == CircuitState.HALF_OPEN and self._probes_started < self.half_open_max_calls:
+                self._probes_started += 1
+                allowed = True
+            else:
+                allowed = False
+        self._notify(transition)
+        return allowed
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        """Record a call that completed, possibly too slowly."""
+        slow = (self.slow_call_threshold is not None and latency is not None
+                and latency > self.slow_call_threshold)
+        self._record(bad=slow)
+
+    def record_failure(self) -> None:
+        """Record a call that failed."""
+        self._record(bad=True)
+
+    def record_cancelled(self) -> None:
+        """Record a call abandoned by its caller; frees a half-open probe slot without judging the site."""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN and self._probes_started > 0:
+                self._probes_started -= 1
+
+    def _record(self, bad: bool) -> None:
+        with self._lock:
+            transition = None
+            if self._state == CircuitState.HALF_OPEN:
+                if bad:
+                    transition = self._transition(CircuitState.OPEN)
+                else:
+                    self._probes_succeeded += 1
+                    if self._probes_succeeded >= self.half_open_max_calls:
+                        transition = self._transition(CircuitState.CLOSED)
+            elif self._state == CircuitState.CLOSED:
+                self._outcomes.append(bad)
+                if (len(self._outcomes) >= self.min_calls
+                        and self._failure_rate() >= self.failure_rate_threshold):
+                    transition = self._transition(CircuitState.OPEN)
+        self._notify(transition)
+
+    def _failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def _update_state(self):
+        """Move from open to half-open once the open duration has passed."""
+        if self._state == CircuitState.OPEN and self._clock() - self._opened_at >= self.open_duration:
+            return self._transition(CircuitState.HALF_OPEN)
+        return None
+
+    def _transition(self, new_state: CircuitState):
+        old_state = self._state
+        self._state = new_state
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        if new_state == CircuitState.OPEN:
+            self._opened_at = self._clock()
+        elif new_state == CircuitState.CLOSED:
+            self._outcomes.clear()
+        return old_state, new_state
+
+    def _notify(self, transition) -> None:
+        if transition is None:
+            return
+        old_state, new_state = transition
+        for listener in self._listeners:
+            listener(self, old_state, new_state)
@@ -0,0 +1,156 @@
+"""
+Command line interface for bulk searches and book detail fetching.
+
+Example:
+    db-knih search queries.txt -o results.jsonl --concurrency 8 --rate 4
+    cat links.txt | db-knih book --resume -o books.jsonl
+"""
+import argparse
+import contextlib
+import functools
+import sys
+import time
+from typing import Any, Callable, List, Optional, TextIO
+
+from .batch import BatchRunner, BatchStats, drop_incomplete_line, load_completed_inputs, read_inputs
+from .book_service import BookService
+from .concurrency import AdaptiveConcurrencyLimiter
+from .fetcher import Fetcher
+from .profiling import Profiler
+from .rate_limiter import RateLimiter
+from .search_service import SearchService
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the ``db-knih`` command."""
+    parser = argparse.ArgumentParser(
+        prog="db-knih",
+        description="Bulk search and book detail fetching from databazeknih.cz, streamed as JSONL.",
+    )
+    parser.add_argument("command", choices=["search", "book"],
+                        help="'search' for queries, 'book' for book links (e.g. harry-potter-12345)")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="file with one query or book link per line (default: stdin)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="JSONL output file (default: stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4,
+                        help="number of items processed at the same time, or the maximum "
+                             "with --adaptive (default: 4)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="adapt the concurrency to latency and throttling, up to --concurrency")
+    parser.add_argument("-r", "--rate", type=float, default=2.0,
+                        help="maximum requests per second, 0 for unlimited (default: 2)")
+    parser.add_argument("--burst", type=int, default=4,
+                        help="maximum requests sent back to back (default: 4)")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip inputs that already succeeded in the output file and append to it")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="seconds allowed per item, including all of its requests (default: none)")
+    parser.add_argument("--progress-interval", type=float, default=1.0,
+                        help="seconds between progress lines on stderr, 0 to disable (default: 1)")
+    return parser
+
+
+def make_task(command: str, fetcher: Fetcher, timeout: Optional[float] = None) -> Callable[[str], Any]:
+    """Create the function processing a single input for the given command."""
+    if command == "search":
+        task = SearchService(fetcher).search
+    else:
+        task = BookService(fetcher).get_book_info
+    return functools.partial(task, deadline=timeout) if timeout is not None else task
+
+
+def profiled(task: Callable[[str], Any], profiler: Profiler) -> Callable[[str], Any]:
+    """Wrap a task so every call is profiled."""
+    def run_profiled(item: str) -> Any:
+        with profiler.profile():
+            return task(item)
+    return run_profiled
+
+
+def run(command: str, inputs: TextIO, output: TextIO, task: Callable[[str], Any],
+        concurrency: int = 4, skip: Optional[set] = None, progress: Optional[TextIO] = None,
+        progress_interval: float = 1.0,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None) -> BatchStats:
+    """
+    Run a batch and stream its results as JSONL.
+
+    Args:
+        command: "search" or "book"
+        inputs: Lines with one query or book link each
+        output: Destination of the JSONL results
+        task: Function processing one input
+        concurrency: Number of items processed at the same time
+        skip: Inputs to leave out, e.g. those done by a previous run
+        progress: Optional stream for live progress lines
+        progress_interval: Seconds between progress lines
+        limiter: Optional adaptive limiter of the fetcher used by ``task``
+
+    Returns:
+        Statistics of the run
+    """
+    is_error = (lambda info: "not found" if info is None else None) if command == "book" else None
+    runner = BatchRunner(task, concurrency=concurrency, is_error=is_error, limiter=limiter)
+    last_report = time.monotonic()
+
+    for result in runner.run(read_inputs(inputs, skip=skip)):
+        output.write(result.to_json() + "\n")
+        output.flush()
+
+        if progress and progress_interval > 0 and time.monotonic() - last_report >= progress_interval:
+            progress.write(_progress_line(runner) + "\n")
+            progress.flush()
+            last_report = time.monotonic()
+
+    if progress:
+        progress.write(_progress_line(runner) + "\n")
+        progress.flush()
+    return runner.stats
+
+
+def _progress_line(runner: BatchRunner) -> str:
+    """Summary of a run, with the current concurrency limit when adaptive."""
+    if runner.limiter is None:
+        return runner.stats.summary()
+    return f"{runner.stats.summary()}, limit {runner.limiter.limit}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the ``db-knih`` command."""
+    args = build_parser().parse_args(argv)
+    if args.concurrency < 1:
+        print("db-knih: --concurrency must be at least 1", file=sys.stderr)
+        return 2
+
+    rate_limiter = RateLimiter(args.rate, burst=args.burst) if args.rate > 0 else None
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=min(4, args.concurrency),
+                                         max_limit=args.concurrency) if args.adaptive else None
+    fetcher = Fetcher(rate_limiter=rate_limiter, concurrency_limiter=limiter)
+    task = make_task(args.command, fetcher, timeout=args.timeout)
+    profiler = Profiler.from_setting(None)
+    if profiler is not None:
+        task = profiled(task, profiler)
+
+    skip = None
+    if args.resume and args.output != "-":
+        skip = load_completed_inputs(args.output)
+        drop_incomplete_line(args.output)
+    inputs = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(
+        args.output, "a" if args.resume else "w", encoding="utf-8"
+    )
+
+    try:
+        # Fetch errors are printed; keep them out of the JSONL stream
+        with contextlib.redirect_stdout(sys.stderr):
+            run(args.command, inputs, output, task, concurrency=args.concurrency, skip=skip,
+                progress=sys.stderr, progress_interval=args.progress_interval, limiter=limiter)
+    except KeyboardInterrupt:
+        print("db-knih: interrupted, rerun with --resume to continue", file=sys.stderr)
+        return 130
+    finally:
+        if inputs is not sys.stdin:
+            inputs.close()
+        if output is not sys.stdout:
+            output.close()
+    return 0
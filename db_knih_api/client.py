@@ -0,0 +1,175 @@
+"""
+Main API class combining the search and book services.
+"""
+import contextlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+from .book_service import BookService
+from .deadline import Deadline, cancellation
+from .models import BookInfo, MultiSearchResult, ReviewCursor, SearchInfo
+from .profiling import ProfileSetting, Profiler
+from .scheduler import Priority, scheduling
+from .search_service import SearchService, normalize_query
+from .tracing import Tracer
+
+
+class DBKnih:
+    """Main API class that combines search and book services."""
+    
+    def __init__(self, book_service: BookService = None, search_service: SearchService = None,
+                 resolver=None, tracer: Tracer | None = None, profile: ProfileSetting = None):
+        """
+        Initialize the DB Knih API.
+        
+        Args:
+            book_service: Optional BookService instance for testing
+            search_service: Optional SearchService instance for testing
+            resolver: Optional Resolver whose index learns from every search
+                result and book detail fetched through this instance
+            tracer: Optional Tracer recording a timing breakdown of every call
+            profile: Profile search and get_book_info calls: a Profiler, True, or an
+                output directory for pstats and collapsed stack files written at
+                exit. By default the DB_KNIH_PROFILE environment variable decides.
+        """
+        self.book_service = book_service or BookService()
+        self.search_service = search_service or SearchService()
+        self.resolver = resolver
+        self.tracer = tracer
+        self.profiler = Profiler.from_setting(profile)
+    
+    def search(self, text: str, priority: Priority | None = None,
+               deadline: Deadline | None = None) -> list[SearchInfo]:
+        """
+        Search for books with the given text.
+        
+        Args:
+            text: The search query
+            priority: Optional priority of the requests when the fetcher has a scheduler
+            deadline: Optional seconds or CancellationToken bounding the whole call
+            
+        Returns:
+            List of SearchInfo objects with basic book information
+            
+        Raises:
+            DeadlineExceededError: If the deadline passes or the token is cancelled
+        """
+        with self._profile(), self._trace("search", query=text), scheduling(priority=priority), \
+                cancellation(deadline):
+            results = self.search_service.search(text)
+        if self.resolver is not None:
+            self.resolver.index.learn_search_infos(results)
+        return results
+    
+    def search_many(self, queries: Iterable[str], max_workers: int = 4,
+                    deadline: Deadline | None = None) -> MultiSearchResult:
+        """
+        Search for several queries concurrently.
+        
+        Queries that are equal after normalization (case and whitespace) are
+        searched only once, with the first of their spellings. Requests still go through the fetcher, so its rate
+        limiter bounds the overall request rate.
+        
+        Args:
+            queries: The search queries
+            max_workers: Number of searches run at the same time
+            deadline: Optional seconds or CancellationToken bounding all searches
+            
+        Returns:
+            MultiSearchResult with results per query and a merged list
+            deduplicated by SearchInfo.id
+            
+        Raises:
+            DeadlineExceededError: If the deadline passes before every search finished
+        """
+        queries = list(queries)
+        normalized = {query: normalize_query(query) for query in queries}
+        # The site is searched with the first spelling of each normalized query
+        spellings: dict[str, str] = {}
+        for query in queries:
+            spellings.setdefault(normalized[query], query)
+        unique_queries = list(spellings)
+        
+        with self._trace("search_many", queries=len(unique_queries)), cancellation(deadline), \
+                ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Each search runs in a copy of the caller's context, so the deadline applies to it
+            futures = [executor.submit(contextvars.copy_context().run, self._search_worker, spellings[key])
+                       for key in unique_queries]
+            fetched = {key: future.result() for key, future in zip(unique_queries, futures)}
+        
+        if self.resolver is not None:
+            for results in fetched.values():
+                self.resolver.index.learn_search_infos(results)
+        
+        merged = []
+        seen_ids = set()
+        for query in unique_queries:
+            for info in fetched[query]:
+                if info.id is not None:
+                    if info.id in seen_ids:
+                        continue
+                    seen_ids.add(info.id)
+                merged.append(info)
+        
+        return MultiSearchResult(
+            results={query: list(fetched[normalized[query]]) for query in queries},
+            merged=merged,
+        )
+    
+    def get_book_info(self, book_link: str, priority: Priority | None = None,
+                      deadline: Deadline | None = None) -> BookInfo | None:
+        """
+        Get detailed book information from the book link.
+        
+        Args:
+            book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+            priority: Optional priority of the requests when the fetcher has a scheduler
+            deadline: Optional seconds or CancellationToken bounding the whole call
+            
+        Returns:
+            BookInfo object with extracted data, or None if extraction fails
+            
+        Raises:
+            DeadlineExceededError: If the deadline passes or the token is cancelled
+        """
+        with self._profile(), self._trace("get_book_info", book_link=book_link), \
+                scheduling(priority=priority), cancellation(deadline):
+            info = self.book_service.get_book_info(book_link)
+        if self.resolver is not None and info is not None:
+            self.resolver.index.learn_book_info(book_link, info)
+        return info
+    
+    def iter_reviews(self, book_link: str, cursor: ReviewCursor | None = None,
+                     limit: int | None = None, max_workers: int = 4):
+        """
+        Iterate over all reviews of a book across every review page.
+        
+        Args:
+            book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+            cursor: Optional position to resume from
+            limit: Optional maximum number of reviews to yield
+            max_workers: Number of review pages fetched concurrently
+            
+        Returns:
+            ReviewIterator yielding Review objects; its ``cursor`` allows resuming
+        """
+        return self.book_service.iter_reviews(book_link, cursor=cursor, limit=limit,
+                                              max_workers=max_workers)
+    
+    def _search_worker(self, query: str) -> list[SearchInfo]:
+        """Run one search of search_many, profiled in its worker thread."""
+        with self._profile():
+            return self.search_service.search(query)
+    
+    def _profile(self):
+        """Profile a call with the configured profiler, if any."""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.profile()
+    
+    def _trace(self, name: str, **attributes):
+        """Trace a call with the configured tracer, if any."""
+        if self.tracer is None:
+            return contextlib.nullcontext()
+        return self.tracer.trace(name, **attributes)
@@ -0,0 +1,270 @@
+"""
+Columnar book collection with NumPy-vectorized filtering and aggregation.
+
+Requires NumPy (``pip install py-db-knih[numpy]``).
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .models import BookInfo, SearchInfo
+
+Record = Union[BookInfo, SearchInfo]
+
+NUMERIC_COLUMNS = ("id", "year", "rating", "numberOfRatings", "pages")
+CATEGORICAL_COLUMNS = ("author", "publisher")
+
+
+def _encode(values: Sequence[Optional[str]]):
+    """Dictionary-encode strings into codes (-1 for missing) and a list of distinct values."""
+    lookup: Dict[str, int] = {}
+    codes = np.fromiter(
+        (-1 if value is None else lookup.setdefault(value, len(lookup)) for value in values),
+        dtype=np.int32, count=len(values),
+    )
+    return codes, list(lookup)
+
+
+def _float_column(records: Sequence[Record], name: str) -> np.ndarray:
+    """Build a float column, with NaN for missing values."""
+    return np.fromiter(
+        (np.nan if getattr(record, name, None) is None else getattr(record, name) for record in records),
+        dtype=np.float64, count=len(records),
+    )
+
+
+class BookCollection:
+    """
+    Column-oriented collection of books.
+
+    ``id`` is stored as int64 (-1 when unknown); ``year``, ``rating``,
+    ``numberOfRatings`` and ``pages`` as float64 with NaN for missing values.
+    Authors and publishers are dictionary-encoded (code -1 when missing) and
+    genres are stored as flat codes with per-book offsets. The original model
+    objects are kept, so converting back to a list is a simple selection.
+    """
+
+    def __init__(self, records: Sequence[Record], columns: Dict[str, np.ndarray],
+                 codes: Dict[str, np.ndarray], values: Dict[str, List[str]],
+                 genre_codes: np.ndarray, genre_offsets: np.ndarray, genre_values: List[str]):
+        """Initialize from prebuilt columns; use the ``from_*`` constructors instead."""
+        self._records = np.empty(len(records), dtype=object)
+        self._records[:] = list(records)
+        self._columns = columns
+        self._codes = codes
+        self._values = values
+        self._genre_codes = genre_codes
+        self._genre_offsets = genre_offsets
+        self._genre_values = genre_values
+
+    @classmethod
+    def from_book_infos(cls, infos: Iterable[BookInfo], ids: Optional[Iterable[Optional[int]]] = None) -> "BookCollection":
+        """
+        Build a collection from BookInfo objects.
+
+        Args:
+            infos: Detailed book information
+            ids: Optional book ids in the same order (BookInfo has no id of its own)
+
+        Returns:
+            BookCollection of the given books
+        """
+        infos = list(infos)
+        id_list = list(ids) if ids is not None else [None] * len(infos)
+        if len(id_list) != len(infos):
+            raise ValueError("ids must have the same length as infos")
+        return cls._build(infos, id_list)
+
+    @classmethod
+    def from_search_infos(cls, infos: Iterable[SearchInfo]) -> "BookCollection":
+        """
+        Build a collection from SearchInfo objects.
+
+        Args:
+            infos: Search results
+
+        Returns:
+            BookCollection of the given books; detail columns are missing
+        """
+        infos = list(infos)
+        return cls._build(infos, [info.id for info in infos])
+
+    @classmethod
+    def _build(cls, records: List[Record], ids: List[Optional[int]]) -> "BookCollection":
+        columns = {
+            "id": np.fromiter((-1 if book_id is None else book_id for book_id in ids),
+                              dtype=np.int64, count=len(ids)),
+        }
+        for name in NUMERIC_COLUMNS[1:]:
+            columns[name] = _float_column(records, name)
+
+        codes, values = {}, {}
+        for name in CATEGORICAL_COLUMNS:
+            codes[name], values[name] = _encode([getattr(record, name, None) for record in records])
+
+        genre_lists = [getattr(record, "genres", None) or [] for record in records]
+        flat_codes, genre_values = _encode([genre for genres in genre_lists for genre in genres])
+        offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        np.cumsum(np.array([len(genres) for genres in genre_lists], dtype=np.int64), out=offsets[1:])
+
+        return cls(records, columns, codes, values, flat_codes, offsets, genre_values)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, selection):
+        """Get a single model by position, or a sub-collection by slice, mask or indices."""
+        if isinstance(selection, (int, np.integer)):
+            return self._records[selection]
+        return self.take(np.arange(len(self))[selection])
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get("_columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def to_list(self) -> List[Record]:
+        """Get the models of the collection as a list."""
+        return list(self._records)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Get a column as an array.
+
+        Numeric columns are returned as stored. "author" and "publisher" are
+        decoded into an object array with None for missing values.
+        """
+        if name in self._columns:
+            return self._columns[name]
+        if name in self._codes:
+            lookup = np.array(self._values[name] + [None], dtype=object)
+            return lookup[self._codes[name]]
+        raise KeyError(name)
+
+    def take(self, indices: np.ndarray) -> "BookCollection":
+        """Get a sub-collection of the books at the given positions."""
+        indices = np.asarray(indices, dtype=np.int64)
+        lengths = np.diff(self._genre_offsets)[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        starts = self._genre_offsets[:-1][indices]
+        flat = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+
+        return BookCollection(
+            self._records[indices],
+            {name: column[indices] for name, column in self._columns.items()},
+            {name: codes[indices] for name, codes in self._codes.items()},
+            self._values,
+            self._genre_codes[flat],
+            offsets,
+            self._genre_values,
+        )
+
+    def genre_mask(self, genre: str) -> np.ndarray:
+        """Get a boolean mask of books that have the given genre."""
+        mask = np.zeros(len(self), dtype=bool)
+        if genre not in self._genre_values:
+            return mask
+        code = self._genre_values.index(genre)
+        rows = np.repeat(np.arange(len(self)), np.diff(self._genre_offsets))
+        mask[rows[self._genre_codes == code]] = True
+        return mask
+
+    def mask(self, year_from: Optional[int] = None, year_to: Optional[int] = None,
+             min_rating: Optional[float] = None, max_rating: Optional[float] = None,
+             author: Optional[str] = None, publisher: Optional[str] = None,
+             genre: Optional[str] = None) -> np.ndarray:
+        """
+        Get a boolean mask of books matching all given filters.
+
+        Ranges are inclusive; books with a missing value never match a filter on it.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if year_from is not None:
+            mask &= self._columns["year"] >= year_from
+        if year_to is not None:
+            mask &= self._columns["year"] <= year_to
+        if min_rating is not None:
+            mask &= self._columns["rating"] >= min_rating
+        if max_rating is not None:
+            mask &= self._columns["rating"] <= max_rating
+        for name, value in (("author", author), ("publisher", publisher)):
+            if value is not None:
+                values = self._values[name]
+                mask &= self._codes[name] == (values.index(value) if value in values else -2)
+        if genre is not None:
+            mask &= self.genre_mask(genre)
+        return mask
+
+    def filter(self, **filters) -> "BookCollection":
+        """Get the books matching all filters accepted by ``mask``."""
+        return self.take(np.flatnonzero(self.mask(**filters)))
+
+    def sort_by(self, name: str, descending: bool = False) -> "BookCollection":
+        """
+        Sort by a numeric column; missing values go last.
+
+        Args:
+            name: One of "id", "year", "rating", "numberOfRatings", "pages"
+            descending: Sort in descending order
+
+        Returns:
+            Sorted BookCollection
+        """
+        values = self._columns[name].astype(np.float64)
+        if name == "id":
+            values[values < 0] = np.nan
+        keys = -values if descending else values
+        # NaN sorts last in NumPy; the stable sort keeps equal values in order
+        return self.take(np.argsort(keys, kind="stable"))
+
+    def count_by(self, name: str) -> Dict[object, int]:
+        """
+        Count books per value, most common first.
+
+        Args:
+            name: "author", "publisher", "genre" or a numeric column such as "year"
+
+        Returns:
+            Mapping of value to number of books; missing values are not counted
+        """
+        if name == "genre":
+            counts = np.bincount(self._genre_codes, minlength=len(self._genre_values))
+            values = self._genre_values
+        elif name in self._codes:
+            codes = self._codes[name]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self._values[name]))
+            values = self._values[name]
+        elif name in self._columns:
+            unique, counts = np.unique(self._present(name), return_counts=True)
+            values = [int(value) if float(value).is_integer() else float(value) for value in unique]
+        else:
+            raise KeyError(name)
+
+        order = np.argsort(-counts, kind="stable")
+        return {values[index]: int(counts[index]) for index in order if counts[index] > 0}
+
+    def unique(self, name: str) -> List[str]:
+        """Get the distinct "author", "publisher" or "genre" values present in the collection."""
+        return list(self.count_by(name))
+
+    def mean(self, name: str) -> Optional[float]:
+        """Mean of a numeric column ignoring missing values, or None if all are missing."""
+        present = self._present(name)
+        return float(present.mean()) if len(present) else None
+
+    def min(self, name: str) -> Optional[float]:
+        """Minimum of a numeric column ignoring missing values."""
+        present = self._present(name)
+        return float(present.min()) if len(present) else None
+
+    def max(self, name: str) -> Optional[float]:
+        """Maximum of a numeric column ignoring missing values."""
+        present = self._present(name)
+        return float(present.max()) if len(present) else None
+
+    def _present(self, name: str) -> np.ndarray:
+        """Values of a numeric column without the missing ones (-1 for "id", NaN otherwise)."""
+        column = self._columns[name]
+        return column[column >= 0] if name == "id" else column[~np.isnan(column)]
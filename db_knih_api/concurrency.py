@@ -0,0 +1,195 @@
+"""
+Adaptive concurrency limit (AIMD) converging on the sustainable request concurrency.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from .exceptions import CircuitOpenError, DeadlineExceededError, FetchError, NotFoundError
+from .hedging import LatencyTracker
+
+OVERLOAD_STATUS_CODES = frozenset({429, 503})
+
+LimitListener = Callable[["AdaptiveConcurrencyLimiter", int, int], None]
+
+
+def is_overload(error: Exception) -> bool:
+    """
+    Classify whether a failed fetch signals that the site is overloaded.
+
+    Throttling (429), 503s, timeouts and network errors are overload signals.
+    Missing pages, other client errors and an open circuit breaker are not.
+
+    Args:
+        error: The raised exception
+
+    Returns:
+        True if the concurrency limit should be cut
+    """
+    if isinstance(error, (CircuitOpenError, NotFoundError)):
+        return False
+    if isinstance(error, DeadlineExceededError):
+        return True
+    if not isinstance(error, FetchError):
+        return False
+    return error.status_code is None or error.status_code in OVERLOAD_STATUS_CODES
+
+
+@dataclass
+class ConcurrencyStats:
+    """Snapshot of an adaptive concurrency limiter."""
+    limit: int
+    in_flight: int
+    increases: int
+    decreases: int
+    latency_p50: Optional[float]
+
+
+class Permit:
+    """Admission of one request; hand it back to ``release``."""
+    __slots__ = ("sequence",)
+
+    def __init__(self, sequence: int):
+        self.sequence = sequence
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Thread-safe additive-increase/multiplicative-decrease concurrency limit.
+
+    The limit grows by ``increase`` after every ``limit`` successful requests,
+    i.e. about once per round of requests while the limit is in use. A 429,
+    timeout or other overload signal, or a latency above ``latency_tolerance``
+    times the recent median, multiplies the limit by ``backoff``. Only requests
+    admitted after the last cut can cut again, so one burst of throttling
+    counts as a single congestion event.
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 increase: float = 1.0, backoff: float = 0.5, latency_tolerance: float = 2.0,
+                 min_samples: int = 20):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial_limit: Concurrency allowed before any feedback
+            min_limit: Lower bound of the limit
+            max_limit: Upper bound of the limit
+            increase: Growth of the limit per round of successful requests
+            backoff: Factor (0-1) applied to the limit on overload
+            latency_tolerance: Multiple of the median latency counted as a spike
+            min_samples: Latencies needed before spikes are detected
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+        if latency_tolerance <= 1:
+            raise ValueError("latency_tolerance must be greater than 1")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.min_samples = min_samples
+        self.latency_tracker = LatencyTracker(window=100)
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._successes = 0
+        self._sequence = 0
+        self._last_cut_sequence = -1
+        self._increases = 0
+        self._decreases = 0
+        self._listeners: List[LimitListener] = []
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """The current number of requests allowed in flight."""
+        with self._condition:
+            return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of admitted requests not yet released."""
+        with self._condition:
+            return self._in_flight
+
+    def add_listener(self, listener: LimitListener) -> None:
+        """
+        Register a callback for changes of the limit, e.g. to export it as a gauge.
+
+        Args:
+            listener: Called with the limiter, the old limit and the new limit
+        """
+        self._listeners.append(listener)
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[Permit]:
+        """
+        Wait until a request may be sent.
+
+        Args:
+            timeout: Optional maximum seconds to wait
+
+        Returns:
+            A Permit to pass to ``release``, or None if the timeout passed
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_flight < int(self._limit), timeout=timeout):
+                return None
+            self._in_flight += 1
+            self._sequence += 1
+            return Permit(self._sequence)
+
+    def release(self, permit: Permit, latency: Optional[float] = None, overloaded: bool = False) -> None:
+        """
+        Hand back a permit and adjust the limit to the request's outcome.
+
+        Args:
+            permit: The permit returned by ``acquire``
+            latency: Latency of a completed request; None for requests that
+                tell nothing about the site's load (e.g. a 404 or a cancel)
+            overloaded: Whether the request failed with an overload signal
+        """
+        spike = False
+        if latency is not None and not overloaded:
+            median = self.latency_tracker.percentile(50) if len(self.latency_tracker) >= self.min_samples else None
+            spike = median is not None and latency > self.latency_tolerance * median
+            self.latency_tracker.record(latency)
+
+        with self._condition:
+            old_limit = int(self._limit)
+            saturated = self._in_flight * 2 >= self._limit
+            self._in_flight -= 1
+            if overloaded or spike:
+                if permit.sequence > self._last_cut_sequence:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                    self._last_cut_sequence = self._sequence
+                    self._decreases += 1
+                    self._successes = 0
+            elif latency is not None and saturated and self._limit < self.max_limit:
+                self._successes += 1
+                if self._successes >= self._limit:
+                    self._limit = min(float(self.max_limit), self._limit + self.increase)
+                    self._successes = 0
+            new_limit = int(self._limit)
+            if new_limit > old_limit:
+                self._increases += 1
+            self._condition.notify_all()
+
+        if new_limit != old_limit:
+            for listener in self._listeners:
+                listener(self, old_limit, new_limit)
+
+    def stats(self) -> ConcurrencyStats:
+        """Get a snapshot of the limit and its adjustments."""
+        latency_p50 = self.latency_tracker.percentile(50)
+        with self._condition:
+            return ConcurrencyStats(
+                limit=int(self._limit),
+                in_flight=self._in_flight,
+                increases=self._increases,
+                decreases=self._decreases,
+                latency_p50=latency_p50,
+            )
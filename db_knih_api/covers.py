@@ -0,0 +1,277 @@
+"""
+Bulk cover image downloads into a content-addressed store.
+"""
+import hashlib
+import itertools
+import json
+import os
+import posixpath
+import tempfile
+import threading
+import urllib.parse
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .batch import BatchRunner
+from .fetcher import Fetcher
+from .models import BookInfo
+
+SITE_URL = "https://www.databazeknih.cz/"
+MANIFEST_NAME = "manifest.json"
+
+CoverSource = Union[str, BookInfo]
+CoverItem = Union[CoverSource, Tuple[Union[str, int], CoverSource]]
+
+
+@dataclass
+class StoredCover:
+    """A downloaded cover image; ``path`` is relative to the store directory."""
+    url: str
+    path: str
+    sha256: str
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class CoverStats:
+    """Outcome counts of a cover download run."""
+    downloaded: int = 0
+    not_modified: int = 0
+    cached: int = 0
+    duplicates: int = 0
+    errors: int = 0
+
+
+class CoverStore:
+    """
+    Directory of cover images named by the SHA-256 of their content.
+
+    Identical images are stored once however many URLs serve them. The
+    manifest maps each cover URL to its image and each book id to its cover URL;
+    it is written by ``save``.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Open or create a store.
+
+        Args:
+            directory: Directory of the images and the manifest
+        """
+        self.directory = directory
+        self._urls: Dict[str, StoredCover] = {}
+        self._books: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            self._urls = {url: StoredCover(**cover) for url, cover in data.get("urls", {}).items()}
+            self._books = dict(data.get("books", {}))
+
+    def __len__(self) -> int:
+        """Number of distinct stored images."""
+        with self._lock:
+            return len({cover.sha256 for cover in self._urls.values()})
+
+    def get(self, url: str) -> Optional[StoredCover]:
+        """Get the stored image of a cover URL."""
+        with self._lock:
+            return self._urls.get(url)
+
+    def path_for(self, book_id: Union[str, int]) -> Optional[str]:
+        """
+        Get the image file of a book.
+
+        Args:
+            book_id: Book id (or any key) the cover was downloaded for
+
+        Returns:
+            Absolute path of the image, or None if the book has no stored cover
+        """
+        with self._lock:
+            url = self._books.get(str(book_id))
+            cover = self._urls.get(url) if url is not None else None
+        return os.path.join(self.directory, cover.path) if cover else None
+
+    def manifest(self) -> Dict[str, str]:
+        """Map every book id with a stored cover to its image path relative to the store."""
+        with self._lock:
+            return {book_id: self._urls[url].path for book_id, url in self._books.items()
+                    if url in self._urls}
+
+    def link(self, book_id: Union[str, int], url: str) -> None:
+        """Record that a book's cover is the image at ``url``."""
+        with self._lock:
+            self._books[str(book_id)] = url
+
+    def put(self, url: str, chunks: Iterable[bytes], etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> Tuple[StoredCover, bool]:
+        """
+        Stream an image into the store.
+
+        Args:
+            url: URL the image was downloaded from
+            chunks: The image content
+            etag: ETag of the response, for conditional re-fetches
+            last_modified: Last-Modified of the response
+
+        Returns:
+            The stored cover and whether an identical image was already stored
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    fh.write(chunk)
+
+            sha256 = digest.hexdigest()
+            path = posixpath.join(sha256[:2], sha256 + _suffix(url))
+            full_path = os.path.join(self.directory, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            duplicate = os.path.exists(full_path)
+            if duplicate:
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        cover = StoredCover(url=url, path=path, sha256=sha256, size=size,
+                            etag=etag, last_modified=last_modified)
+        with self._lock:
+            self._urls[url] = cover
+        return cover, duplicate
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        with self._lock:
+            data = {
+                "books": dict(self._books),
+                "urls": {url: asdict(cover) for url, cover in self._urls.items()},
+            }
+        manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        temp_path = manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False)
+        os.replace(temp_path, manifest_path)
+
+
+def _suffix(url: str) -> str:
+    """File extension of an image URL, kept so stored files open in image viewers."""
+    suffix = posixpath.splitext(urllib.parse.urlsplit(url).path)[1].lower()
+    return suffix if 1 < len(suffix) <= 5 else ""
+
+
+class CoverDownloader:
+    """
+    Downloads cover images with bounded concurrency over one connection pool.
+
+    Each distinct URL is requested at most once per run. URLs already in the
+    store are skipped, or with ``refresh`` re-fetched conditionally so unchanged
+    images cost a 304 instead of a download.
+    """
+
+    def __init__(self, store: CoverStore, fetcher: Optional[Fetcher] = None,
+                 concurrency: int = 8, refresh: bool = False, chunk_size: int = 64 * 1024):
+        """
+        Initialize the downloader.
+
+        Args:
+            store: Store receiving the images
+            fetcher: Optional fetcher; its rate limiter and circuit breaker apply
+                to the downloads. By default one with a pool of ``concurrency``
+                connections is created.
+            concurrency: Number of images downloaded at the same time
+            refresh: Re-fetch stored URLs conditionally instead of skipping them
+            chunk_size: Size in bytes of the chunks written to disk
+        """
+        if fetcher is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            fetcher = Fetcher(session)
+
+        self.store = store
+        self.fetcher = fetcher
+        self.concurrency = concurrency
+        self.refresh = refresh
+        self.chunk_size = chunk_size
+        self.stats = CoverStats()
+        self._lock = threading.Lock()
+
+    def download(self, covers: Iterable[CoverItem]) -> CoverStats:
+        """
+        Download covers and save the manifest.
+
+        Args:
+            covers: Cover URLs, BookInfo objects, or (book id, URL or BookInfo)
+                pairs; only pairs are recorded in the book id manifest
+
+        Returns:
+            Counts of this run
+        """
+        self.stats = CoverStats()
+        runner = BatchRunner(self._download_one, concurrency=self.concurrency)
+        try:
+            for result in runner.run(self._unique_urls(covers)):
+                if not result.ok:
+                    self._count("errors")
+        finally:
+            self.store.save()
+        return self.stats
+
+    def _unique_urls(self, covers: Iterable[CoverItem]) -> Iterator[str]:
+        """Link books to their cover URLs and yield every URL once."""
+        seen = set()
+        for item in covers:
+            book_id, source = item if isinstance(item, tuple) else (None, item)
+            url = source.cover if isinstance(source, BookInfo) else source
+            if not url:
+                continue
+            url = urllib.parse.urljoin(SITE_URL, url)
+            if book_id is not None:
+                self.store.link(book_id, url)
+            if url in seen:
+                continue
+            seen.add(url)
+            yield url
+
+    def _download_one(self, url: str) -> Optional[StoredCover]:
+        stored = self.store.get(url)
+        if stored is not None and not self.refresh:
+            self._count("cached")
+            return stored
+
+        response = self.fetcher.stream(url, self.chunk_size,
+                                       etag=stored.etag if stored else None,
+                                       last_modified=stored.last_modified if stored else None)
+        # The request is sent, and the validators known, once the first chunk is read
+        chunks = iter(response)
+        first = next(chunks, None)
+        if response.not_modified:
+            self._count("not_modified")
+            return stored
+
+        cover, duplicate = self.store.put(url, itertools.chain([first] if first else [], chunks),
+                                          etag=response.etag, last_modified=response.last_modified)
+        self._count("duplicates" if duplicate else "downloaded")
+        return cover
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self.stats, name, getattr(self.stats, name) + 1)
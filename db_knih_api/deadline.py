@@ -0,0 +1,136 @@
+"""
+Deadlines and cancellation tokens propagated to every fetch of a call.
+"""
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from .exceptions import DeadlineExceededError
+
+
+class CancellationToken:
+    """
+    Signals that the work of a call should stop, explicitly or at a deadline.
+
+    A token may be linked to parent tokens; it then expires at the earliest
+    of their deadlines and is cancelled when any of them is cancelled.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parents: Iterable["CancellationToken"] = (),
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the token.
+
+        Args:
+            timeout: Optional seconds from now after which the token expires
+            parents: Tokens whose cancellation and deadlines also apply to this one
+            clock: Monotonic clock, replaceable for testing
+        """
+        self._clock = clock
+        self._parents = tuple(parents)
+        self._cancelled = threading.Event()
+
+        deadlines = [parent.expires_at for parent in self._parents if parent.expires_at is not None]
+        if timeout is not None:
+            deadlines.append(clock() + timeout)
+        self.expires_at: Optional[float] = min(deadlines) if deadlines else None
+
+    def cancel(self) -> None:
+        """Cancel the token; running fetches stop at their next check."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the token or one of its parents was cancelled."""
+        return self._cancelled.is_set() or any(parent.cancelled for parent in self._parents)
+
+    @property
+    def expired(self) -> bool:
+        """Whether the token was cancelled or its deadline passed."""
+        return self.cancelled or (self.expires_at is not None and self._clock() >= self.expires_at)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline (0 once expired), or None without a deadline."""
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self._clock())
+
+    def check(self, url: str = "") -> None:
+        """
+        Raise if the token expired.
+
+        Args:
+            url: The URL (or book link) whose work is aborted, for the error
+
+        Raises:
+            DeadlineExceededError: If the token was cancelled or its deadline passed
+        """
+        if self.cancelled:
+            raise DeadlineExceededError(url, "Call cancelled")
+        if self.expired:
+            raise DeadlineExceededError(url, "Call deadline exceeded")
+
+
+Deadline = Union[float, CancellationToken]
+
+_current: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar(
+    "db_knih_cancellation", default=None
+)
+
+
+@contextlib.contextmanager
+def cancellation(deadline: Optional[Deadline]) -> Iterator[Optional[CancellationToken]]:
+    """
+    Run a block under a deadline in seconds or a cancellation token.
+
+    Fetches made in the block cap their timeouts by the remaining time and
+    fail with DeadlineExceededError once it has passed. Nested blocks combine
+    with the enclosing one, so the earliest deadline wins.
+
+    Args:
+        deadline: Seconds from now, a CancellationToken, or None to keep the current one
+
+    Returns:
+        Context manager yielding the active token (or None)
+    """
+    outer = _current.get()
+    if deadline is None:
+        yield outer
+        return
+
+    token = deadline if isinstance(deadline, CancellationToken) else CancellationToken(timeout=deadline)
+    if outer is not None and outer is not token:
+        token = CancellationToken(parents=(token, outer))
+
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def current_token() -> Optional[CancellationToken]:
+    """Get the token of the enclosing ``cancellation`` block, if any."""
+    return _current.get()
+
+
+def check_deadline(url: str = "") -> None:
+    """
+    Raise if the current call's token expired; do nothing outside a ``cancellation`` block.
+
+    Raises:
+        DeadlineExceededError: If the token was cancelled or its deadline passed
+    """
+    token = _current.get()
+    if token is not None:
+        token.check(url)
+
+
+def deadline_expired() -> bool:
+    """Whether the current call's token expired."""
+    token = _current.get()
+    return token is not None and token.expired
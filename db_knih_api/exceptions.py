@@ -0,0 +1,29 @@
+"""
+Exceptions raised by the DB Knih API.
+"""
+from typing import Optional
+
+
+class DBKnihError(Exception):
+    """Base class for all errors raised by the DB Knih API."""
+
+
+class FetchError(DBKnihError):
+    """Raised when a page cannot be fetched."""
+
+    def __init__(self, url: str, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.url = url
+        self.status_code = status_code
+
+
+class NotFoundError(FetchError):
+    """Raised when the site answers that a page does not exist (404 or 410)."""
+
+
+class DeadlineExceededError(FetchError):
+    """Raised when a fetch does not finish before its deadline."""
+
+
+class CircuitOpenError(FetchError):
+    """Raised without making a request while the circuit breaker is open."""
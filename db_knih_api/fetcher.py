@@ -1,12 +1,75 @@
 """
 HTTP fetcher module for making requests to databazeknih.cz.
 """
+import contextvars
 import random
+import threading
+import time
 import urllib.parse
-from typing import Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Iterator, MutableMapping, Optional, Tuple, Union
 
 import requests
 
+from .circuit_breaker import CircuitBreaker
+from .concurrency import AdaptiveConcurrencyLimiter, is_overload
+from .deadline import CancellationToken, current_token
+from .exceptions import CircuitOpenError, DeadlineExceededError, FetchError, NotFoundError
+from .hedging import HedgePolicy, LatencyTracker
+from .rate_limiter import RateLimiter
+from .scheduler import RequestScheduler, current_scheduling
+from .tracing import current_trace, span
+
+
+@dataclass
+class ConditionalResponse:
+    """Result of a conditional fetch; ``content`` is None if the page was not modified."""
+    content: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    
+    @property
+    def not_modified(self) -> bool:
+        """Whether the server answered 304 Not Modified."""
+        return self.content is None
+
+
+class StreamedResponse:
+    """
+    Body of a ``Fetcher.stream`` download, iterated in chunks.
+    
+    The validators are updated from the response headers once iteration has
+    started, so they can be stored for the next conditional download.
+    """
+    
+    def __init__(self, fetcher: "Fetcher", url: str, chunk_size: int,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self.url = url
+        self.chunk_size = chunk_size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = False
+        self._fetcher = fetcher
+    
+    def __iter__(self) -> Iterator[bytes]:
+        return self._fetcher._stream(self)
+
+
+class _Validators:
+    """Validators sent with a conditional fetch, updated from the response."""
+    __slots__ = ("etag", "last_modified", "not_modified")
+    
+    def __init__(self, etag: Optional[str], last_modified: Optional[str]):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = False
+
+
+_conditional: contextvars.ContextVar[Optional[_Validators]] = contextvars.ContextVar(
+    "db_knih_conditional", default=None
+)
+
 
 class Fetcher:
     """Handles HTTP requests with proper headers and error handling."""
@@ -18,9 +81,67 @@ class Fetcher:
         'Mozilla/5.0 (Linux; Android 10) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.101 Mobile Safari/537.36'
     ]
     
-    def __init__(self, session: Optional[requests.Session] = None):
-        """Initialize the fetcher with an optional session for testing."""
+    MIN_TIMEOUT = 0.001
+    NOT_FOUND_STATUS_CODES = frozenset({404, 410})
+    CANCEL_POLL_INTERVAL = 0.05
+    
+    def __init__(self, session: Optional[requests.Session] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 timeout: float = 30,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 deadline: Optional[float] = None,
+                 hedge_policy: Optional[HedgePolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 fallback_cache: Optional[MutableMapping[str, str]] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+                 hedge_workers: int = 8):
+        """
+        Initialize the fetcher.
+        
+        Args:
+            session: Optional session for testing
+            rate_limiter: Optional rate limiter shared by all requests of this fetcher
+            timeout: Timeout in seconds used for any phase without its own timeout
+            connect_timeout: Optional timeout for establishing the connection
+            read_timeout: Optional timeout between bytes of the response
+            deadline: Optional limit in seconds for a whole fetch_page call
+            hedge_policy: Optional policy for sending duplicate requests when slow
+            circuit_breaker: Optional breaker failing calls fast while the site is degraded
+            fallback_cache: Optional mapping of URL to page content, filled by successful
+                fetches and served while the circuit breaker is open
+            scheduler: Optional scheduler admitting requests by priority and tenant;
+                give it the rate limiter instead of passing one here
+            concurrency_limiter: Optional adaptive limit of the requests in flight,
+                adjusted to their latency and overload errors
+            hedge_workers: Number of threads running hedged requests; each hedged
+                call occupies up to two
+        
+        Raises:
+            ValueError: If both a rate limiter and a scheduler are given, or
+                hedge_workers is below 1
+        """
+        if rate_limiter and scheduler:
+            raise ValueError("Pass the rate limiter to the scheduler instead of the fetcher")
+        if hedge_workers < 1:
+            raise ValueError("hedge_workers must be at least 1")
+        
         self.session = session or requests.Session()
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+        self.hedge_policy = hedge_policy
+        self.circuit_breaker = circuit_breaker
+        self.fallback_cache = fallback_cache
+        self.scheduler = scheduler
+        self.concurrency_limiter = concurrency_limiter
+        self.latency_tracker = LatencyTracker()
+        self.hedge_workers = hedge_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         self._setup_headers()
     
     def _setup_headers(self) -> None:
@@ -41,16 +162,424 @@ class Fetcher:
             The HTML content of the page, or 'Error' if request fails
             
         Raises:
-            requests.RequestException: If the request fails
+            CircuitOpenError: If the circuit breaker is open and nothing is cached
         """
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            return response.text
-        except requests.RequestException as e:
+            return self.fetch(url)
+        except CircuitOpenError:
+            raise
+        except DeadlineExceededError as e:
+            token = current_token()
+            if token is not None and token.expired:
+                raise
+            print(f"Error fetching {url}: {e}")
+            return 'Error'
+        except FetchError as e:
             print(f"Error fetching {url}: {e}")
             return 'Error'
     
+    def fetch(self, url: str) -> str:
+        """
+        Fetch a web page and return its content as text.
+        
+        Args:
+            url: The URL to fetch
+            
+        Returns:
+            The HTML content of the page
+            
+        Raises:
+            FetchError: If the request fails
+            DeadlineExceededError: If the call does not finish before the deadline
+            CircuitOpenError: If the circuit breaker is open and nothing is cached
+            
+        Inside a ``cancellation`` block the call fails fast once the block's
+        deadline passes or its token is cancelled, and waits in the scheduler
+        queue at most until then.
+        """
+        with span("fetch", url=url):
+            return self._fetch(url)
+    
+    def fetch_conditional(self, url: str, etag: Optional[str] = None,
+                          last_modified: Optional[str] = None) -> ConditionalResponse:
+        """
+        Fetch a web page unless it is unchanged since a previous fetch.
+        
+        The validators of the previous response are sent as If-None-Match and
+        If-Modified-Since headers. Servers that ignore them simply return the page.
+        
+        Args:
+            url: The URL to fetch
+            etag: ETag header of the previous response
+            last_modified: Last-Modified header of the previous response
+            
+        Returns:
+            ConditionalResponse with the content (None if not modified) and the
+            validators to send next time
+            
+        Raises:
+            FetchError: If the request fails (see ``fetch``)
+        """
+        validators = _Validators(etag, last_modified)
+        token = _conditional.set(validators)
+        try:
+            content = self.fetch(url)
+        finally:
+            _conditional.reset(token)
+        return ConditionalResponse(
+            content=None if validators.not_modified else content,
+            etag=validators.etag,
+            last_modified=validators.last_modified,
+        )
+    
+    def stream(self, url: str, chunk_size: int = 64 * 1024, etag: Optional[str] = None,
+               last_modified: Optional[str] = None) -> "StreamedResponse":
+        """
+        Download a large file in chunks instead of loading it into memory.
+        
+        The request waits for the rate limiter (or scheduler) and respects the
+        circuit breaker like ``fetch``, but is neither hedged nor cached. It is
+        sent when iteration starts, and errors are raised from there.
+        
+        Args:
+            url: The URL to download
+            chunk_size: Size in bytes of the yielded chunks
+            etag: ETag of a previous download, sent as If-None-Match
+            last_modified: Last-Modified of a previous download, sent as If-Modified-Since
+            
+        Returns:
+            StreamedResponse yielding raw body chunks (transfer encodings such as
+            gzip are removed); nothing is yielded if the file was not modified
+            
+        Raises:
+            FetchError: If the request fails (NotFoundError for 404 and 410)
+            CircuitOpenError: If the circuit breaker is open
+        """
+        return StreamedResponse(self, url, chunk_size, etag, last_modified)
+    
+    def _stream(self, response: "StreamedResponse") -> Iterator[bytes]:
+        url = response.url
+        token = current_token()
+        if token is not None:
+            token.check(url)
+        
+        breaker = self.circuit_breaker
+        if breaker and not breaker.allow_request():
+            raise CircuitOpenError(url, "Circuit breaker is open")
+        
+        if self.scheduler:
+            if not self.scheduler.acquire(*current_scheduling(),
+                                          timeout=token.remaining() if token is not None else None):
+                if breaker:
+                    breaker.record_cancelled()
+                if token is not None:
+                    token.check(url)
+                raise DeadlineExceededError(url, "Call deadline exceeded while queued")
+            try:
+                yield from self._stream_admitted(response)
+            finally:
+                self.scheduler.release()
+            return
+        
+        if self.rate_limiter:
+            if not self.rate_limiter.acquire(timeout=token.remaining() if token is not None else None):
+                if breaker:
+                    breaker.record_cancelled()
+                if token is not None:
+                    token.check(url)
+                raise DeadlineExceededError(url, "Call deadline exceeded while rate limited")
+        yield from self._stream_admitted(response)
+    
+    def _stream_admitted(self, streamed: "StreamedResponse") -> Iterator[bytes]:
+        """Stream a response body once the request is allowed to be sent."""
+        url = streamed.url
+        breaker = self.circuit_breaker
+        started_at = time.monotonic()
+        kwargs = {}
+        headers = {}
+        if streamed.etag:
+            headers["If-None-Match"] = streamed.etag
+        if streamed.last_modified:
+            headers["If-Modified-Since"] = streamed.last_modified
+        if headers:
+            kwargs["headers"] = headers
+        try:
+            with self.session.get(url, timeout=self._request_timeout(), stream=True, **kwargs) as response:
+                response.raise_for_status()
+                streamed.etag = response.headers.get("ETag") or streamed.etag
+                streamed.last_modified = response.headers.get("Last-Modified") or streamed.last_modified
+                streamed.not_modified = response.status_code == 304
+                if not streamed.not_modified:
+                    yield from response.iter_content(streamed.chunk_size)
+        except requests.RequestException as e:
+            response = getattr(e, 'response', None)
+            status_code = getattr(response, 'status_code', None)
+            error_class = NotFoundError if status_code in self.NOT_FOUND_STATUS_CODES else FetchError
+            error = error_class(url, str(e), status_code)
+            if breaker:
+                if self._is_site_failure(error):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success(time.monotonic() - started_at)
+            raise error from e
+        except GeneratorExit:
+            # Abandoned by the consumer; not a verdict on the site
+            if breaker:
+                breaker.record_cancelled()
+            raise
+        if breaker:
+            breaker.record_success(time.monotonic() - started_at)
+    
+    def _fetch(self, url: str) -> str:
+        token = current_token()
+        if token is not None:
+            token.check(url)
+        
+        breaker = self.circuit_breaker
+        if breaker and not breaker.allow_request():
+            if self.fallback_cache is not None and url in self.fallback_cache:
+                return self.fallback_cache[url]
+            raise CircuitOpenError(url, "Circuit breaker is open")
+        
+        if self.scheduler:
+            with span("fetch.queue"):
+                admitted = self.scheduler.acquire(*current_scheduling(),
+                                                  timeout=token.remaining() if token is not None else None)
+            if not admitted:
+                if breaker:
+                    breaker.record_cancelled()
+                if token is not None:
+                    token.check(url)
+                raise DeadlineExceededError(url, "Call deadline exceeded while queued")
+            try:
+                return self._fetch_limited(url, token)
+            finally:
+                self.scheduler.release()
+        
+        if self.rate_limiter:
+            with span("fetch.queue"):
+                admitted = self.rate_limiter.acquire(timeout=token.remaining() if token is not None else None)
+            if not admitted:
+                if breaker:
+                    breaker.record_cancelled()
+                if token is not None:
+                    token.check(url)
+                raise DeadlineExceededError(url, "Call deadline exceeded while rate limited")
+        return self._fetch_limited(url, token)
+    
+    def _fetch_limited(self, url: str, token: Optional[CancellationToken]) -> str:
+        """Fetch a page within the adaptive concurrency limit, feeding back its outcome."""
+        limiter = self.concurrency_limiter
+        if limiter is None:
+            return self._fetch_admitted(url)
+        
+        with span("fetch.queue"):
+            permit = limiter.acquire(timeout=token.remaining() if token is not None else None)
+        if permit is None:
+            if self.circuit_breaker:
+                self.circuit_breaker.record_cancelled()
+            if token is not None:
+                token.check(url)
+            raise DeadlineExceededError(url, "Call deadline exceeded while waiting for a concurrency slot")
+        
+        started_at = time.monotonic()
+        try:
+            content = self._fetch_admitted(url)
+        except FetchError as e:
+            cancelled = token is not None and token.expired
+            limiter.release(permit, overloaded=not cancelled and is_overload(e))
+            raise
+        except BaseException:
+            limiter.release(permit)
+            raise
+        limiter.release(permit, latency=time.monotonic() - started_at)
+        return content
+    
+    def _fetch_admitted(self, url: str) -> str:
+        """Fetch a page once the request is allowed to be sent."""
+        breaker = self.circuit_breaker
+        started_at = time.monotonic()
+        deadline_at = started_at + self.deadline if self.deadline is not None else None
+        token = current_token()
+        if token is not None and token.expires_at is not None:
+            deadline_at = token.expires_at if deadline_at is None else min(deadline_at, token.expires_at)
+        try:
+            if self.hedge_policy is None:
+                content = self._get_bounded(url, deadline_at, token)
+            else:
+                content = self._get_hedged(url, deadline_at, token)
+        except FetchError as e:
+            if breaker:
+                if token is not None and token.expired:
+                    breaker.record_cancelled()
+                elif self._is_site_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success(time.monotonic() - started_at)
+            raise
+        
+        if breaker:
+            breaker.record_success(time.monotonic() - started_at)
+        validators = _conditional.get()
+        if self.fallback_cache is not None and not (validators is not None and validators.not_modified):
+            self.fallback_cache[url] = content
+        return content
+    
+    @staticmethod
+    def _is_site_failure(error: FetchError) -> bool:
+        """Check whether an error indicates a degraded site rather than a bad URL."""
+        return error.status_code is None or error.status_code == 429 or error.status_code >= 500
+    
+    def _get(self, url: str, deadline_at: Optional[float] = None) -> str:
+        """
+        Perform a single GET request and record its latency.
+        
+        While tracing, the body is streamed so time to first byte and download
+        are timed separately. Inside ``fetch_conditional`` the validators are
+        sent, and a 304 response returns an empty page.
+        """
+        started_at = time.monotonic()
+        kwargs = {}
+        validators = _conditional.get()
+        if validators is not None:
+            headers = {}
+            if validators.etag:
+                headers["If-None-Match"] = validators.etag
+            if validators.last_modified:
+                headers["If-Modified-Since"] = validators.last_modified
+            kwargs["headers"] = headers
+        if current_trace() is not None:
+            kwargs["stream"] = True
+        try:
+            with span("fetch.ttfb") as attributes:
+                response = self.session.get(url, timeout=self._request_timeout(deadline_at), **kwargs)
+                attributes["status"] = response.status_code
+            try:
+                response.raise_for_status()
+                if validators is not None:
+                    validators.etag = response.headers.get("ETag") or validators.etag
+                    validators.last_modified = response.headers.get("Last-Modified") or validators.last_modified
+                    if response.status_code == 304:
+                        validators.not_modified = True
+                        self.latency_tracker.record(time.monotonic() - started_at)
+                        return ""
+                with span("fetch.download") as attributes:
+                    text = response.text
+                    attributes["chars"] = len(text)
+            finally:
+                # A streamed response holds its pooled connection until closed
+                response.close()
+        except requests.RequestException as e:
+            response = getattr(e, 'response', None)
+            status_code = getattr(response, 'status_code', None)
+            error_class = NotFoundError if status_code in self.NOT_FOUND_STATUS_CODES else FetchError
+            raise error_class(url, str(e), status_code) from e
+        
+        self.latency_tracker.record(time.monotonic() - started_at)
+        return text
+    
+    def _get_bounded(self, url: str, deadline_at: Optional[float],
+                     token: Optional[CancellationToken] = None) -> str:
+        """
+        Perform the request in the calling thread, its timeout clamped to the deadline.
+        
+        An explicit cancel() is noticed once the request returns.
+        """
+        try:
+            content = self._get(url, deadline_at)
+        except FetchError as e:
+            if token is not None:
+                token.check(url)
+            if deadline_at is not None and time.monotonic() >= deadline_at:
+                raise self._deadline_error(url, "Call deadline exceeded") from e
+            raise
+        if token is not None:
+            token.check(url)
+        return content
+    
+    def _get_hedged(self, url: str, deadline_at: Optional[float],
+                    token: Optional[CancellationToken] = None) -> str:
+        """Run the request in the background, hedging and enforcing the deadline and token."""
+        executor = self._get_executor()
+        # Run attempts in a copy of the caller's context so they join its trace
+        pending = {executor.submit(contextvars.copy_context().run, self._get, url, deadline_at)}
+        try:
+            self.hedge_policy.on_request()
+            hedge_delay = self.hedge_policy.hedge_delay(self.latency_tracker)
+            if hedge_delay is not None:
+                done, _ = wait(pending, timeout=self._remaining(deadline_at, hedge_delay))
+                if not done and self.hedge_policy.try_acquire():
+                    pending.add(executor.submit(contextvars.copy_context().run, self._get, url, deadline_at))
+            
+            last_error: Optional[FetchError] = None
+            while pending:
+                timeout = self._remaining(deadline_at)
+                if token is not None:
+                    # Wake up regularly to notice an explicit cancel()
+                    timeout = min(timeout, self.CANCEL_POLL_INTERVAL) if timeout is not None else self.CANCEL_POLL_INTERVAL
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        return future.result()
+                    except FetchError as e:
+                        last_error = e
+                if pending:
+                    if token is not None:
+                        token.check(url)
+                    if deadline_at is not None and time.monotonic() >= deadline_at:
+                        raise self._deadline_error(url, "Call deadline exceeded while hedging")
+            
+            raise last_error
+        finally:
+            # Attempts not yet started are dropped; running ones end at their clamped timeout
+            for future in pending:
+                future.cancel()
+    
+    def _deadline_error(self, url: str, call_message: str) -> DeadlineExceededError:
+        """Build the error for a passed deadline; an expired call token is reported before this."""
+        message = f"Deadline of {self.deadline}s exceeded" if self.deadline is not None else call_message
+        return DeadlineExceededError(url, message)
+    
+    def _request_timeout(self, deadline_at: Optional[float] = None) -> Union[float, Tuple[float, float]]:
+        """Get the timeout argument for requests, capped by the remaining deadline."""
+        if self.connect_timeout is None and self.read_timeout is None:
+            timeout = self.timeout
+            return timeout if deadline_at is None else self._deadline_timeout(deadline_at, timeout)
+        
+        connect_timeout = self.connect_timeout if self.connect_timeout is not None else self.timeout
+        read_timeout = self.read_timeout if self.read_timeout is not None else self.timeout
+        if deadline_at is not None:
+            connect_timeout = self._deadline_timeout(deadline_at, connect_timeout)
+            read_timeout = self._deadline_timeout(deadline_at, read_timeout)
+        return connect_timeout, read_timeout
+    
+    def _deadline_timeout(self, deadline_at: float, timeout: float) -> float:
+        """Cap a timeout by the remaining deadline, keeping it positive as requests demands."""
+        return max(self.MIN_TIMEOUT, self._remaining(deadline_at, timeout))
+    
+    @staticmethod
+    def _remaining(deadline_at: Optional[float], limit: Optional[float] = None) -> Optional[float]:
+        """Get the seconds left until the deadline, optionally capped by a limit."""
+        if deadline_at is None:
+            return limit
+        remaining = max(0.0, deadline_at - time.monotonic())
+        return remaining if limit is None else min(remaining, limit)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Lazily create the executor used for hedged requests."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.hedge_workers,
+                                                    thread_name_prefix="db-knih-hedge")
+            return self._executor
+    
+    def close(self) -> None:
+        """Shut down the hedging threads; requests still running finish in the background."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
     @staticmethod
     def create_search_url(text: str) -> str:
         """
@@ -92,3 +621,48 @@ class Fetcher:
         """
         encoded_book_id = urllib.parse.quote(book_id)
         return f"https://www.databazeknih.cz/book-detail-more-info/{encoded_book_id}"
+    
+    @staticmethod
+    def create_reviews_url(book: str, page: int = 1) -> str:
+        """
+        Create a reviews URL for the given book identifier and page.
+        
+        Args:
+            book: The book identifier (usually from search results)
+            page: The 1-based page number of the review listing
+            
+        Returns:
+            The complete reviews URL
+        """
+        encoded_book = urllib.parse.quote(book)
+        return f"https://www.databazeknih.cz/komentare-knihy/{encoded_book}?str={page}"
+    
+    @staticmethod
+    def create_author_books_url(author: str, page: int = 1) -> str:
+        """
+        Create the URL of an author's book listing.
+        
+        Args:
+            author: The author identifier (e.g., "j-k-rowling-2156")
+            page: The 1-based page number of the listing
+            
+        Returns:
+            The complete author listing URL
+        """
+        encoded_author = urllib.parse.quote(author)
+        return f"https://www.databazeknih.cz/knihy-autora/{encoded_author}?str={page}"
+    
+    @staticmethod
+    def create_series_url(series: str, page: int = 1) -> str:
+        """
+        Create the URL of a series' book listing.
+        
+        Args:
+            series: The series identifier (e.g., "harry-potter-18")
+            page: The 1-based page number of the listing
+            
+        Returns:
+            The complete series listing URL
+        """
+        encoded_series = urllib.parse.quote(series)
+        return f"https://www.databazeknih.cz/serie/{encoded_series}?str={page}"
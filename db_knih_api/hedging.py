@@ -0,0 +1,103 @@
+"""
+Latency tracking and hedged request policy for the fetcher.
+"""
+import threading
+from collections import deque
+from typing import Optional
+
+
+class LatencyTracker:
+    """Thread-safe sliding window of recent request latencies."""
+
+    def __init__(self, window: int = 200):
+        """
+        Initialize the tracker.
+
+        Args:
+            window: Number of most recent latencies kept
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        """Record the latency of a finished request."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Get a latency percentile of the recorded window.
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            The latency in seconds, or None if nothing was recorded yet
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percent / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class HedgePolicy:
+    """
+    Decides when a duplicate (hedge) request is sent for a slow request.
+
+    A hedge is sent once a request has been running longer than the given
+    latency percentile. Every request earns ``budget_ratio`` hedge tokens and
+    each hedge spends one, so hedges stay at roughly ``budget_ratio`` of the
+    total load.
+    """
+
+    def __init__(self, percentile: float = 95.0, budget_ratio: float = 0.1,
+                 min_samples: int = 20, min_delay: float = 0.01, max_tokens: float = 10.0):
+        """
+        Initialize the policy.
+
+        Args:
+            percentile: Latency percentile after which a hedge is sent
+            budget_ratio: Hedge requests allowed per regular request
+            min_samples: Latencies needed before hedging starts
+            min_delay: Lower bound of the hedge delay in seconds
+            max_tokens: Maximum number of saved-up hedge tokens
+        """
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        if budget_ratio < 0:
+            raise ValueError("budget_ratio must not be negative")
+
+        self.percentile = percentile
+        self.budget_ratio = budget_ratio
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_tokens = max_tokens
+        self.hedges_sent = 0
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, tracker: LatencyTracker) -> Optional[float]:
+        """Get the delay after which to hedge, or None if there is too little data."""
+        if len(tracker) < self.min_samples:
+            return None
+        latency = tracker.percentile(self.percentile)
+        return max(self.min_delay, latency) if latency is not None else None
+
+    def on_request(self) -> None:
+        """Earn hedge budget for a regular request."""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.budget_ratio)
+
+    def try_acquire(self) -> bool:
+        """Spend one hedge token if available."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedges_sent += 1
+            return True
@@ -0,0 +1,216 @@
+"""
+Services listing every book of an author or a series on databazeknih.cz.
+"""
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+
+from .cache import TTLCache
+from .deadline import Deadline, cancellation, check_deadline
+from .exceptions import NotFoundError
+from .fetcher import Fetcher
+from .models import SearchInfo
+from .tracing import span
+
+# Old: /knihy/book-name-123, new: /prehled-knihy/book-name-123
+_BOOK_HREF = re.compile(r"/(?:prehled-knihy|knihy)/([^/?#]+)-(\d+)(?:[/?#]|$)")
+_POZN = re.compile(r"^(\d{4}),\s*([^(]+)")
+_YEAR = re.compile(r"\b(1[5-9]\d\d|20\d\d)\b")
+
+
+class ListingService(ABC):
+    """
+    Base of the services parsing a book listing page into SearchInfo objects.
+
+    A listing may span several pages (``?str=N``). Pages are fetched lazily and
+    the listing ends at the first page without a book not seen before (or after
+    ``MAX_PAGES`` pages), so a site that ignores the page parameter costs a
+    single extra request. Only links inside the page's main content are read,
+    leaving out sidebar widgets such as recommended books. A page that cannot
+    be fetched raises, so a failure never passes for the end of the listing.
+    """
+
+    PAGE_KIND = "listing"
+    LISTING_SELECTOR = "#faux > #content"
+    MAX_PAGES = 100
+
+    def __init__(self, fetcher: Optional[Fetcher] = None, cache: Optional[TTLCache] = None):
+        """
+        Initialize the listing service.
+
+        Args:
+            fetcher: Optional fetcher for testing
+            cache: Optional cache of complete listings keyed by the listing identifier
+        """
+        self.fetcher = fetcher or Fetcher()
+        self.cache = cache
+
+    def list_books(self, link: str, max_pages: Optional[int] = None,
+                   deadline: Optional[Deadline] = None) -> List[SearchInfo]:
+        """
+        Get every book of the listing.
+
+        Args:
+            link: The listing identifier (e.g., "j-k-rowling-2156")
+            max_pages: Optional maximum number of pages fetched (default ``MAX_PAGES``)
+            deadline: Optional seconds or CancellationToken bounding the whole call
+
+        Returns:
+            List of SearchInfo objects in listing order, without duplicates
+
+        Raises:
+            FetchError: If a page cannot be fetched (NotFoundError if the listing
+                does not exist)
+            DeadlineExceededError: If the deadline passes or the token is cancelled
+        """
+        with cancellation(deadline):
+            if self.cache is not None and max_pages is None:
+                cached = self.cache.get(link)
+                if cached is not None:
+                    return list(cached)
+
+            results = list(self.iter_books(link, max_pages=max_pages))
+
+            if self.cache is not None and max_pages is None:
+                self.cache.set(link, results)
+            return list(results)
+
+    def iter_books(self, link: str, max_pages: Optional[int] = None) -> Iterator[SearchInfo]:
+        """
+        Iterate over the books of the listing, fetching each page only when needed.
+
+        Args:
+            link: The listing identifier (e.g., "j-k-rowling-2156")
+            max_pages: Optional maximum number of pages fetched (default ``MAX_PAGES``)
+
+        Returns:
+            Iterator of SearchInfo objects in listing order, without duplicates
+
+        Raises:
+            FetchError: If a page cannot be fetched (NotFoundError if the listing
+                does not exist)
+        """
+        if max_pages is None:
+            max_pages = self.MAX_PAGES
+        seen = set()
+        page = 1
+        while page <= max_pages:
+            new_books = [info for info in self._fetch_listing_page(link, page)
+                         if info.id not in seen]
+            if not new_books:
+                return
+            for info in new_books:
+                seen.add(info.id)
+                yield info
+            page += 1
+
+    @abstractmethod
+    def _listing_url(self, link: str, page: int) -> str:
+        """Create the URL of one page of the listing."""
+
+    def _fetch_listing_page(self, link: str, page: int) -> List[SearchInfo]:
+        """Fetch and parse one listing page; a missing page after the first is empty."""
+        url = self._listing_url(link, page)
+        try:
+            response = self.fetcher.fetch(url)
+        except NotFoundError:
+            if page == 1:
+                raise
+            return []
+
+        check_deadline(url)
+        with span("parse.soup", page=self.PAGE_KIND):
+            soup = BeautifulSoup(response, 'lxml')
+        with span("_parse_listing") as attributes:
+            results = self._parse_listing(soup)
+            attributes["results"] = len(results)
+        return results
+
+    def _parse_listing(self, soup: BeautifulSoup) -> List[SearchInfo]:
+        """Parse every book linked from the listing content, keeping the first link of each book."""
+        content = soup.select_one(self.LISTING_SELECTOR)
+        if content is None:
+            return []
+
+        books: Dict[int, SearchInfo] = {}
+        default_author = self._default_author(soup)
+        for link_elem in content.select("a[href]"):
+            match = _BOOK_HREF.search(str(link_elem.get("href", "")))
+            if not match:
+                continue
+
+            book_id = int(match.group(2))
+            name = self._link_name(link_elem)
+            info = books.get(book_id)
+            if info is None:
+                year, author = self._item_details(link_elem)
+                books[book_id] = SearchInfo(
+                    name=name,
+                    cleanName=match.group(1),
+                    id=book_id,
+                    year=year,
+                    author=author or default_author,
+                )
+            elif info.name is None:
+                # The cover image usually links to the book before its title does
+                info.name = name
+        return list(books.values())
+
+    def _link_name(self, link_elem: Tag) -> Optional[str]:
+        """Get the book title of a link from its text or its cover image."""
+        text = link_elem.get_text(strip=True)
+        if text:
+            return text
+        for elem in (link_elem, link_elem.select_one("img")):
+            title = elem.get("title") or elem.get("alt") if elem is not None else None
+            if title:
+                return str(title)
+        return None
+
+    def _item_details(self, link_elem: Tag) -> Tuple[Optional[int], Optional[str]]:
+        """Extract the year and author shown next to a book link."""
+        item = link_elem.parent
+        if item is None:
+            return None, None
+
+        # Same "2025, J. K. Rowling (p)" note as in search results
+        pozn_elem = item.select_one("span.pozn")
+        if pozn_elem:
+            pozn_match = _POZN.search(pozn_elem.get_text(strip=True))
+            if pozn_match:
+                return int(pozn_match.group(1)), pozn_match.group(2).strip()
+
+        year_match = _YEAR.search(item.get_text(" ", strip=True))
+        return (int(year_match.group(1)) if year_match else None), None
+
+    def _default_author(self, soup: BeautifulSoup) -> Optional[str]:
+        """Author of books whose listing item does not name one."""
+        return None
+
+
+class AuthorService(ListingService):
+    """Service listing every book of an author."""
+
+    PAGE_KIND = "author"
+
+    def _listing_url(self, link: str, page: int) -> str:
+        return self.fetcher.create_author_books_url(link, page)
+
+    def _default_author(self, soup: BeautifulSoup) -> Optional[str]:
+        """The author's name from the page heading."""
+        heading = soup.select_one("h1")
+        if not heading:
+            return None
+        return heading.get_text(strip=True) or None
+
+
+class SeriesService(ListingService):
+    """Service listing every book of a series in series order."""
+
+    PAGE_KIND = "series"
+
+    def _listing_url(self, link: str, page: int) -> str:
+        return self.fetcher.create_series_url(link, page)
@@ -0,0 +1,243 @@
+"""
+Load driver running the library against the local stub server.
+
+Example:
+    python -m db_knih_api.loadtest book --calls 500 --concurrency 16 \\
+        --latency lognormal:0.05,0.5 --throttle-rate 0.02 --slow-body-rate 0.05
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .batch import BatchRunner, BatchStats
+from .book_service import BookService
+from .client import DBKnih
+from .concurrency import AdaptiveConcurrencyLimiter
+from .fetcher import Fetcher
+from .search_service import SearchService
+from .stub_server import LatencyDistribution, StubConfig, StubServer, constant, load_recorded, lognormal, uniform
+
+WORKLOADS = ("fetch", "search", "book", "search_many")
+
+
+@dataclass
+class LoadReport:
+    """Throughput and latency of one load run; latencies are per call, in seconds."""
+    workload: str
+    calls: int
+    errors: int
+    duration: float
+    throughput: float
+    p50: Optional[float]
+    p95: Optional[float]
+    p99: Optional[float]
+    server_statuses: Dict[int, int] = field(default_factory=dict)
+    limit: Optional[int] = None
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        def fmt(value: Optional[float]) -> str:
+            return f"{value * 1000:.0f}ms" if value is not None else "-"
+
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(self.server_statuses.items()))
+        limit = f", limit {self.limit}" if self.limit is not None else ""
+        return (f"{self.workload}: {self.calls} calls, {self.errors} errors in {self.duration:.1f}s, "
+                f"{self.throughput:.1f}/s, p50 {fmt(self.p50)}, p95 {fmt(self.p95)}, p99 {fmt(self.p99)}"
+                f"{limit} (server: {statuses or 'no requests'})")
+
+
+def make_workload(workload: str, server: StubServer, fetcher: Fetcher,
+                  batch_size: int = 5) -> Callable[[str], Any]:
+    """
+    Create the function making one call of a workload.
+
+    Args:
+        workload: "fetch" (raw Fetcher.fetch of book pages), "search"
+            (SearchService.search), "book" (BookService.get_book_info) or
+            "search_many" (DBKnih.search_many of ``batch_size`` queries)
+        server: The stub server the fetcher sends its requests to
+        fetcher: Fetcher created with ``session=server.session()``
+        batch_size: Queries per search_many call
+
+    Returns:
+        Function called with one input of ``make_inputs``
+    """
+    if workload == "fetch":
+        return lambda link: fetcher.fetch(fetcher.create_book_info_url(link))
+    if workload == "search":
+        return SearchService(fetcher).search
+    if workload == "book":
+        return BookService(fetcher).get_book_info
+    if workload == "search_many":
+        client = DBKnih(book_service=BookService(fetcher), search_service=SearchService(fetcher))
+        return lambda queries: client.search_many(queries.split("|"), max_workers=batch_size)
+    raise ValueError(f"Unknown workload {workload!r}, expected one of {', '.join(WORKLOADS)}")
+
+
+def make_inputs(workload: str, server: StubServer, calls: int, batch_size: int = 5,
+                seed: Optional[int] = None) -> Iterator[str]:
+    """Generate the inputs of ``calls`` calls: book links of the catalog, or search queries."""
+    rng = random.Random(seed)
+    for _ in range(calls):
+        if workload in ("fetch", "book"):
+            yield server.book_link(rng.randint(1, server.books))
+        elif workload == "search":
+            yield f"kniha {rng.randint(1, 10 * server.books)}"
+        else:
+            yield "|".join(f"kniha {rng.randint(1, 10 * server.books)}" for _ in range(batch_size))
+
+
+def run_load(workload: str, server: StubServer, calls: int = 200, concurrency: int = 8,
+             fetcher: Optional[Fetcher] = None, batch_size: int = 5,
+             seed: Optional[int] = None, adaptive: bool = False) -> LoadReport:
+    """
+    Run a workload against a started stub server.
+
+    Calls returning None (a book that could not be fetched) or an empty result
+    count as errors, as do calls raising an exception.
+
+    Args:
+        workload: One of WORKLOADS
+        server: The started stub server
+        calls: Number of calls to make
+        concurrency: Number of calls made at the same time
+        fetcher: Optional Fetcher to test (e.g. with retries, hedging or a rate
+            limiter); it must be created with ``session=server.session()``
+        batch_size: Queries per search_many call
+        seed: Optional seed making the inputs reproducible
+        adaptive: Give the default fetcher an AdaptiveConcurrencyLimiter with
+            ``concurrency`` as its maximum (a given fetcher keeps its own limiter)
+
+    Returns:
+        LoadReport of the run, with the final limit of the fetcher's limiter
+    """
+    if fetcher is None:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=min(4, concurrency),
+                                             max_limit=concurrency) if adaptive else None
+        fetcher = Fetcher(session=server.session(pool_size=max(concurrency * 2, 10)),
+                          concurrency_limiter=limiter)
+    task = make_workload(workload, server, fetcher, batch_size)
+    statuses_before = server.stats()
+    stats = BatchStats()
+    runner = BatchRunner(task, concurrency=concurrency, stats=stats,
+                         is_error=lambda value: "empty result" if not value else None,
+                         limiter=fetcher.concurrency_limiter)
+
+    started_at = time.monotonic()
+    for _ in runner.run(make_inputs(workload, server, calls, batch_size, seed)):
+        pass
+    duration = time.monotonic() - started_at
+
+    statuses = {status: count - statuses_before.get(status, 0) for status, count in server.stats().items()}
+    return LoadReport(
+        workload=workload,
+        calls=stats.completed,
+        errors=stats.errors,
+        duration=duration,
+        throughput=stats.completed / duration if duration > 0 else 0.0,
+        p50=stats.percentile(50),
+        p95=stats.percentile(95),
+        p99=stats.percentile(99),
+        server_statuses={status: count for status, count in statuses.items() if count},
+        limit=fetcher.concurrency_limiter.limit if fetcher.concurrency_limiter else None,
+    )
+
+
+def parse_latency(spec: str) -> LatencyDistribution:
+    """
+    Parse a latency distribution given on the command line.
+
+    Args:
+        spec: "0.05" (constant), "uniform:LOW,HIGH" or "lognormal:MEDIAN,P99", in seconds
+
+    Returns:
+        The distribution
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        if not args:
+            return constant(float(kind))
+        values = [float(value) for value in args.split(",")]
+        if kind == "uniform" and len(values) == 2:
+            return uniform(*values)
+        if kind == "lognormal" and len(values) == 2:
+            return lognormal(*values)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid latency {spec!r}: {e}") from e
+    raise argparse.ArgumentTypeError(f"invalid latency {spec!r}, expected SECONDS, "
+                                     "uniform:LOW,HIGH or lognormal:MEDIAN,P99")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the load driver."""
+    parser = argparse.ArgumentParser(
+        prog="python -m db_knih_api.loadtest",
+        description="Run the library against a local stub of databazeknih.cz and report throughput and latency.",
+    )
+    parser.add_argument("workloads", nargs="*", metavar="workload",
+                        help=f"workloads to run: {', '.join(WORKLOADS)} (default: all)")
+    parser.add_argument("-n", "--calls", type=int, default=200,
+                        help="calls per workload (default: 200)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8,
+                        help="calls made at the same time (default: 8)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="adapt the concurrency to latency and throttling, up to --concurrency")
+    parser.add_argument("--capacity", type=int, default=None,
+                        help="requests the server handles at once; more are answered with 429")
+    parser.add_argument("--batch-size", type=int, default=5,
+                        help="queries per search_many call (default: 5)")
+    parser.add_argument("--latency", type=parse_latency, default=constant(0.0),
+                        help="server latency: SECONDS, uniform:LOW,HIGH or lognormal:MEDIAN,P99 (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="share of requests answered with 503 (default: 0)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="share of requests answered with 429 (default: 0)")
+    parser.add_argument("--slow-body-rate", type=float, default=0.0,
+                        help="share of responses whose body trickles in (default: 0)")
+    parser.add_argument("--slow-body-duration", type=float, default=0.5,
+                        help="seconds a slow body takes (default: 0.5)")
+    parser.add_argument("--recorded", default=None,
+                        help="directory of recorded pages served instead of synthetic ones")
+    parser.add_argument("--books", type=int, default=1000,
+                        help="books in the synthetic catalog (default: 1000)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed making latencies, faults and inputs reproducible")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the load driver."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    unknown = [workload for workload in args.workloads if workload not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workload {unknown[0]!r}, expected one of {', '.join(WORKLOADS)}")
+    if args.concurrency < 1 or args.calls < 1:
+        parser.error("--calls and --concurrency must be at least 1")
+
+    config = StubConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        slow_body_rate=args.slow_body_rate,
+        slow_body_duration=args.slow_body_duration,
+    )
+    recorded = load_recorded(args.recorded) if args.recorded else None
+    with StubServer(config, recorded=recorded, books=args.books, capacity=args.capacity,
+                    seed=args.seed) as server:
+        for workload in args.workloads or WORKLOADS:
+            # Failed calls are counted in the report; drop the printed fetch errors
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                report = run_load(workload, server, calls=args.calls, concurrency=args.concurrency,
+                                  batch_size=args.batch_size, seed=args.seed, adaptive=args.adaptive)
+            print(report.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
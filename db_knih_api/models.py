@@ -1,8 +1,8 @@
 """
 Data models for the DB Knih API.
 """
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 
 
 @dataclass
@@ -14,6 +14,13 @@ class Review:
     date: Optional[str] = None
 
 
+@dataclass
+class ReviewCursor:
+    """Position in the paginated review listing of a book."""
+    page: int = 1
+    offset: int = 0
+
+
 @dataclass
 class BookInfo:
     """Represents detailed book information."""
@@ -29,6 +36,7 @@ class BookInfo:
     pages: Optional[int] = None
     originalLanguage: Optional[str] = None
     isbn: Optional[str] = None
+    complete: bool = True
 
 
 @dataclass
@@ -39,3 +47,29 @@ class SearchInfo:
     id: Optional[int] = None
     year: Optional[int] = None
     author: Optional[str] = None
+
+
+@dataclass
+class BookChange:
+    """Represents a book whose extracted information changed during a refresh."""
+    book_link: str
+    info: BookInfo
+    changes: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    new_reviews: List[Review] = field(default_factory=list)
+
+
+@dataclass
+class BookOverview:
+    """Result of polling the overview page of a book."""
+    info: Optional[BookInfo] = None
+    unchanged: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+
+@dataclass
+class MultiSearchResult:
+    """Results of several searches, per query and merged by book id."""
+    results: Dict[str, List[SearchInfo]] = field(default_factory=dict)
+    merged: List[SearchInfo] = field(default_factory=list)
@@ -0,0 +1,140 @@
+"""
+Negative cache of book links that are missing or cannot be parsed.
+"""
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+from .cache import CacheStats, TTLCache
+from .store import parse_book_link
+
+NOT_FOUND = "not_found"
+UNPARSEABLE = "unparseable"
+
+
+@dataclass
+class NegativeCacheStats(CacheStats):
+    """Counters of a negative cache; ``hits`` are lookups that skipped the network."""
+    recorded: int = 0
+
+
+class NegativeCache:
+    """
+    Remembers book links that returned a not-found or unparseable page.
+
+    Entries are keyed by the numeric book id when the link has one, so stale
+    links with different names for the same id share an entry. They expire
+    after ``ttl`` seconds, which should be shorter than the TTL of positive
+    caches because books do get added. Expiry times are wall-clock based, so
+    a saved cache can be loaded by another process.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_size: int = 100_000,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a miss is remembered
+            max_size: Maximum number of remembered links
+            clock: Wall clock, replaceable for testing
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._cache = TTLCache(max_size=max_size, ttl=ttl, clock=clock)
+        self._recorded = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, book_link: str) -> bool:
+        return self.key(book_link) in self._cache
+
+    @staticmethod
+    def key(book_link: str) -> Union[int, str]:
+        """Get the cache key of a link: its book id, or the link itself without one."""
+        try:
+            return parse_book_link(book_link)[1]
+        except ValueError:
+            return book_link
+
+    def get(self, book_link: str) -> Optional[str]:
+        """
+        Look up a link, counting the lookup as hit or miss.
+
+        Args:
+            book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+
+        Returns:
+            The reason (NOT_FOUND or UNPARSEABLE) if the link is remembered, otherwise None
+        """
+        return self._cache.get(self.key(book_link))
+
+    def add(self, book_link: str, reason: str = NOT_FOUND, ttl: Optional[float] = None) -> None:
+        """
+        Remember a link that did not yield a book.
+
+        Args:
+            book_link: The book identifier
+            reason: NOT_FOUND or UNPARSEABLE
+            ttl: Optional time-to-live overriding the cache default
+        """
+        self._cache.set(self.key(book_link), reason, ttl=ttl)
+        with self._lock:
+            self._recorded += 1
+
+    def discard(self, book_link: str) -> None:
+        """Forget a link, e.g. after the book was found by other means."""
+        self._cache.delete(self.key(book_link))
+
+    def clear(self) -> None:
+        """Forget all links; counters are kept."""
+        self._cache.clear()
+
+    def stats(self) -> NegativeCacheStats:
+        """Get a snapshot of the cache counters."""
+        stats = self._cache.stats()
+        with self._lock:
+            recorded = self._recorded
+        return NegativeCacheStats(
+            hits=stats.hits,
+            misses=stats.misses,
+            evictions=stats.evictions,
+            expirations=stats.expirations,
+            size=stats.size,
+            recorded=recorded,
+        )
+
+    def save(self, path: str) -> None:
+        """Save the live entries to a JSON file."""
+        entries = [[key, reason, expires_at] for key, reason, expires_at in self._cache.items()]
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"entries": entries}, fh, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, ttl: float = 3600.0, max_size: int = 100_000,
+             clock: Callable[[], float] = time.time) -> "NegativeCache":
+        """
+        Load a cache previously written by ``save``; expired entries are dropped.
+
+        Args:
+            path: JSON file written by ``save``
+            ttl: Seconds new misses are remembered
+            max_size: Maximum number of remembered links
+            clock: Wall clock, replaceable for testing
+
+        Returns:
+            NegativeCache with the entries that are still valid
+        """
+        cache = cls(ttl=ttl, max_size=max_size, clock=clock)
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        now = clock()
+        for key, reason, expires_at in data.get("entries", []):
+            if expires_at is not None and expires_at <= now:
+                continue
+            cache._cache.set(key, reason, ttl=expires_at - now if expires_at is not None else None)
+        return cache
@@ -0,0 +1,206 @@
+"""
+Profiling mode aggregating cProfile statistics and sampled stacks across calls and threads.
+"""
+import atexit
+import collections
+import contextlib
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+PROFILE_ENV_VAR = "DB_KNIH_PROFILE"
+
+ProfileSetting = Union[None, bool, str, "Profiler"]
+
+# Profilers writing to a directory, shared so that one dump per process covers every instance
+_directory_profilers: Dict[str, "Profiler"] = {}
+_directory_lock = threading.Lock()
+
+
+class Profiler:
+    """
+    Profiles the calls made in ``profile`` blocks, from any number of threads.
+
+    Every call is run under its own ``cProfile.Profile`` and merged into one
+    aggregate ``pstats.Stats``. While a profiled call is running, a background
+    thread samples the stacks of all threads inside one every
+    ``sample_interval`` seconds and counts them as flamegraph-compatible
+    collapsed stacks; it exits when the last profiled call ends.
+
+    Python 3.12+ allows only one active cProfile at a time; calls overlapping
+    with another profiled call are then only sampled.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, sample_interval: float = 0.005):
+        """
+        Initialize the profiler.
+
+        Args:
+            output_dir: Optional directory ``dump`` writes to by default
+            sample_interval: Seconds between stack samples
+        """
+        if sample_interval <= 0:
+            raise ValueError("sample_interval must be positive")
+
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.calls = 0
+        self._stats: Optional[pstats.Stats] = None
+        self._stacks: Dict[str, int] = collections.Counter()
+        self._active: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_setting(cls, setting: ProfileSetting) -> Optional["Profiler"]:
+        """
+        Create a profiler from a ``DBKnih(profile=...)`` value or the environment.
+
+        Args:
+            setting: A Profiler, True, an output directory, or None to read the
+                ``DB_KNIH_PROFILE`` environment variable (a directory, or "1")
+
+        Returns:
+            The profiler, or None if profiling is off. All settings naming the
+            same directory share one profiler, which dumps its results there
+            when the interpreter exits.
+        """
+        if isinstance(setting, Profiler):
+            return setting
+        if setting is None:
+            setting = os.environ.get(PROFILE_ENV_VAR) or False
+            if setting in ("0", "false"):
+                return None
+            if setting in ("1", "true"):
+                setting = True
+        if not setting:
+            return None
+
+        if not isinstance(setting, str):
+            return cls()
+
+        key = os.path.abspath(setting)
+        with _directory_lock:
+            profiler = _directory_profilers.get(key)
+            if profiler is None:
+                profiler = cls(output_dir=setting)
+                _directory_profilers[key] = profiler
+                atexit.register(profiler.close)
+        return profiler
+
+    @contextlib.contextmanager
+    def profile(self) -> Iterator[None]:
+        """Profile the calling thread for the duration of the block; nested blocks are ignored."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            if thread_id in self._active:
+                nested = True
+            else:
+                nested = False
+                self._active[thread_id] = 1
+                self._start_sampler()
+        if nested:
+            yield
+            return
+
+        profile: Optional[cProfile.Profile] = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active (Python 3.12+ allows only one)
+            profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            with self._lock:
+                del self._active[thread_id]
+                self.calls += 1
+                if profile is not None:
+                    profile.create_stats()
+                    if self._stats is None:
+                        self._stats = pstats.Stats(profile)
+                    else:
+                        self._stats.add(profile)
+
+    def stats(self) -> Optional[pstats.Stats]:
+        """Get the aggregated cProfile statistics, or None before the first profiled call."""
+        with self._lock:
+            return self._stats
+
+    def collapsed_stacks(self) -> Dict[str, int]:
+        """Get the sampled stacks ("outer;...;inner" -> samples), most frequent first."""
+        with self._lock:
+            return dict(self._stacks.most_common())
+
+    def dump(self, output_dir: Optional[str] = None, prefix: str = "db-knih") -> Tuple[Optional[str], str]:
+        """
+        Write the pstats file and the collapsed stacks.
+
+        Args:
+            output_dir: Directory to write to (default: the profiler's output_dir or ".")
+            prefix: File name prefix
+
+        Returns:
+            Paths of the ``.pstats`` file (None if nothing was profiled) and the
+            ``.collapsed`` file, which flamegraph.pl and speedscope can read
+        """
+        output_dir = output_dir or self.output_dir or "."
+        os.makedirs(output_dir, exist_ok=True)
+        base = os.path.join(output_dir, f"{prefix}-{os.getpid()}")
+
+        stats_path = None
+        with self._lock:
+            if self._stats is not None:
+                stats_path = base + ".pstats"
+                self._stats.dump_stats(stats_path)
+            stacks = self._stacks.most_common()
+
+        collapsed_path = base + ".collapsed"
+        with open(collapsed_path, "w", encoding="utf-8") as fh:
+            for stack, count in stacks:
+                fh.write(f"{stack} {count}\n")
+        return stats_path, collapsed_path
+
+    def close(self) -> None:
+        """Stop sampling and, if an output directory is set, dump the results."""
+        self._stopped.set()
+        with self._lock:
+            sampler = self._sampler
+        if sampler is not None:
+            sampler.join()
+        if self.output_dir:
+            self.dump()
+
+    def _start_sampler(self) -> None:
+        if self._sampler is None and not self._stopped.is_set():
+            self._sampler = threading.Thread(target=self._sample_loop, name="db-knih-profiler", daemon=True)
+            self._sampler.start()
+
+    def _sample_loop(self) -> None:
+        while not self._stopped.wait(self.sample_interval):
+            frames = sys._current_frames()
+            with self._lock:
+                if not self._active:
+                    # The next profiled call starts a new sampler
+                    self._sampler = None
+                    return
+                for thread_id in self._active:
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        self._stacks[_collapse(frame)] += 1
+
+
+def _collapse(frame) -> str:
+    """Format a stack as "outer;...;inner" frames of "function (file:line)"."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
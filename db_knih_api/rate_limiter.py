@@ -0,0 +1,86 @@
+"""
+Rate limiting for requests made to databazeknih.cz.
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting how many requests are sent per second."""
+
+    def __init__(self, requests_per_second: float, burst: int = 1,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            requests_per_second: Sustained number of requests allowed per second
+            burst: Maximum number of requests that may be sent back to back
+            clock: Monotonic clock, replaceable for testing
+            sleep: Sleep function, replaceable for testing
+        """
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a request may be sent.
+
+        Args:
+            timeout: Optional seconds to wait for a token before giving up
+
+        Returns:
+            True once a token was taken, False once the timeout passed first
+        """
+        deadline = self._clock() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+
+                wait_time = (1 - self._tokens) / self.requests_per_second
+                if deadline is not None:
+                    remaining = deadline - self._updated_at
+                    if remaining <= 0:
+                        return False
+                    if wait_time > remaining:
+                        # No token in time: wait out the timeout without taking one
+                        self._sleep(remaining)
+                        return False
+
+            self._sleep(wait_time)
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without waiting."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def time_until_available(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self._tokens) / self.requests_per_second)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.burst, self._tokens + elapsed * self.requests_per_second)
+        self._updated_at = now
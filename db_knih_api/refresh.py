@@ -0,0 +1,121 @@
+"""
+Content fingerprints for skipping unchanged pages when refreshing book information.
+"""
+import hashlib
+import json
+import threading
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, Optional
+
+from .models import BookChange, BookInfo, Review
+
+
+def fingerprint(content: str) -> str:
+    """Return a stable fingerprint of page content."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class RefreshEntry:
+    """Page fingerprints (by URL) and the BookInfo parsed from those pages."""
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+    info: Optional[BookInfo] = None
+
+
+class RefreshCache:
+    """Thread-safe store of refresh entries keyed by book link."""
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._entries: Dict[str, RefreshEntry] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, book_link: str) -> Optional[RefreshEntry]:
+        """Get the entry stored for a book link."""
+        with self._lock:
+            return self._entries.get(book_link)
+
+    def put(self, book_link: str, entry: RefreshEntry) -> None:
+        """Store the entry for a book link."""
+        with self._lock:
+            self._entries[book_link] = entry
+
+    def save(self, path: str) -> None:
+        """
+        Save the cache to a JSON file.
+
+        Args:
+            path: Destination file path
+        """
+        with self._lock:
+            data = {
+                book_link: {
+                    "fingerprints": entry.fingerprints,
+                    "info": asdict(entry.info) if entry.info else None,
+                }
+                for book_link, entry in self._entries.items()
+            }
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "RefreshCache":
+        """
+        Load a cache previously written by ``save``.
+
+        Args:
+            path: Source file path
+
+        Returns:
+            RefreshCache with the stored entries
+        """
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+
+        cache = cls()
+        for book_link, entry in data.items():
+            info = book_info_from_dict(entry["info"]) if entry.get("info") else None
+            cache.put(book_link, RefreshEntry(fingerprints=entry.get("fingerprints", {}), info=info))
+        return cache
+
+
+def book_info_from_dict(data: dict) -> BookInfo:
+    """Rebuild a BookInfo from the output of ``dataclasses.asdict``."""
+    known = {f.name for f in fields(BookInfo)}
+    values = {key: value for key, value in data.items() if key in known}
+    if values.get("reviews") is not None:
+        values["reviews"] = [Review(**review) for review in values["reviews"]]
+    return BookInfo(**values)
+
+
+def diff_book_info(book_link: str, old: Optional[BookInfo], new: BookInfo) -> Optional[BookChange]:
+    """
+    Compare two versions of a book's information.
+
+    Args:
+        book_link: The book identifier
+        old: Previously known information, or None for a newly seen book
+        new: Freshly extracted information
+
+    Returns:
+        BookChange listing changed fields and new reviews, or None if nothing changed
+    """
+    old = old or BookInfo()
+    changes = {}
+    for book_field in fields(BookInfo):
+        if book_field.name == "reviews":
+            continue
+        old_value = getattr(old, book_field.name)
+        new_value = getattr(new, book_field.name)
+        if old_value != new_value:
+            changes[book_field.name] = (old_value, new_value)
+
+    old_reviews = old.reviews or []
+    new_reviews = [review for review in (new.reviews or []) if review not in old_reviews]
+
+    if not changes and not new_reviews:
+        return None
+    return BookChange(book_link=book_link, info=new, changes=changes, new_reviews=new_reviews)
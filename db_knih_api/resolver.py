@@ -0,0 +1,241 @@
+"""
+Resolver index mapping ISBNs and titles to databazeknih.cz book ids.
+"""
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .models import BookInfo, SearchInfo
+from .search_service import normalize_query
+from .store import parse_book_link
+
+Identifier = Union[str, Tuple[str, Optional[str]]]
+
+ISBN_PATTERN = re.compile(r"^(97[89])?\d{9}[\dX]$")
+
+
+def normalize_isbn(isbn: str) -> Optional[str]:
+    """
+    Normalize an ISBN to its ISBN-13 form without separators.
+
+    Args:
+        isbn: ISBN-10 or ISBN-13, with or without hyphens and spaces
+
+    Returns:
+        The 13-digit ISBN, or None if the text is not an ISBN
+    """
+    compact = re.sub(r"[\s-]", "", isbn).upper()
+    if not ISBN_PATTERN.match(compact) or (len(compact) == 13 and compact.endswith("X")):
+        return None
+    if len(compact) == 10:
+        body = "978" + compact[:9]
+        checksum = sum(int(digit) * (1 if index % 2 == 0 else 3) for index, digit in enumerate(body))
+        compact = body + str((10 - checksum % 10) % 10)
+    return compact
+
+
+def split_isbns(text: Optional[str]) -> List[str]:
+    """Extract all valid ISBNs from a field such as "978-80-00, 80-00-0 (váz.)"."""
+    if not text:
+        return []
+    isbns = []
+    for candidate in re.findall(r"[\dXx][\dXx\s-]{8,}[\dXx]", text):
+        isbn = normalize_isbn(candidate)
+        if isbn and isbn not in isbns:
+            isbns.append(isbn)
+    return isbns
+
+
+def title_key(title: str, author: Optional[str] = None) -> str:
+    """Build the lookup key of a title, optionally qualified by author."""
+    key = normalize_query(title, fold_diacritics=True)
+    if author:
+        key += "|" + normalize_query(author, fold_diacritics=True)
+    return key
+
+
+class ResolverIndex:
+    """
+    Thread-safe in-memory index of ISBN -> id and normalized (title, author) -> id.
+
+    The index learns from SearchInfo and BookInfo objects and can be saved to
+    and loaded from a JSON file. All lookups are dictionary lookups.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._isbns: Dict[str, int] = {}
+        self._titles: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._isbns) + len(self._titles)
+
+    def learn_search_info(self, info: SearchInfo) -> None:
+        """Learn the title (with and without author) of a search result."""
+        if info.id is None or not info.name:
+            return
+        with self._lock:
+            for key in {title_key(info.name), title_key(info.name, info.author)}:
+                ids = self._titles.setdefault(key, [])
+                if info.id not in ids:
+                    ids.append(info.id)
+
+    def learn_search_infos(self, infos: Iterable[SearchInfo]) -> None:
+        """Learn the titles of several search results."""
+        for info in infos:
+            self.learn_search_info(info)
+
+    def learn_book_info(self, book_link: str, info: BookInfo) -> None:
+        """Learn the ISBNs of a book given by its link; links without an id are ignored."""
+        try:
+            _, book_id = parse_book_link(book_link)
+        except ValueError:
+            return
+        with self._lock:
+            for isbn in split_isbns(info.isbn):
+                self._isbns[isbn] = book_id
+
+    def lookup_isbn(self, isbn: str) -> Optional[int]:
+        """Get the book id of an ISBN, or None if unknown."""
+        normalized = normalize_isbn(isbn)
+        with self._lock:
+            return self._isbns.get(normalized) if normalized else None
+
+    def lookup_title(self, title: str, author: Optional[str] = None) -> Optional[int]:
+        """
+        Get the book id of a title.
+
+        Args:
+            title: The book title
+            author: Optional author narrowing down books with the same title
+
+        Returns:
+            The id if exactly one known book matches, otherwise None
+        """
+        with self._lock:
+            ids = self._titles.get(title_key(title, author), [])
+            return ids[0] if len(ids) == 1 else None
+
+    def save(self, path: str) -> None:
+        """Save the index to a JSON file."""
+        with self._lock:
+            data = {"isbns": dict(self._isbns), "titles": {key: list(ids) for key, ids in self._titles.items()}}
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "ResolverIndex":
+        """Load an index previously written by ``save``."""
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        index = cls()
+        index._isbns = {isbn: int(book_id) for isbn, book_id in data.get("isbns", {}).items()}
+        index._titles = {key: [int(book_id) for book_id in ids] for key, ids in data.get("titles", {}).items()}
+        return index
+
+
+class Resolver:
+    """
+    Resolves ISBNs and titles to book ids, using the network only on index misses.
+
+    An ISBN miss searches for the ISBN and fetches the details of the first
+    candidates to confirm it. A title miss searches for the title. Everything
+    fetched is learned by the index.
+    """
+
+    def __init__(self, index: Optional[ResolverIndex] = None, search_service=None,
+                 book_service=None, max_candidates: int = 3):
+        """
+        Initialize the resolver.
+
+        Args:
+            index: Index to use and extend; a new empty one by default
+            search_service: SearchService used on misses (no network fallback if None)
+            book_service: BookService used to confirm ISBNs (no confirmation if None)
+            max_candidates: Search results whose details are fetched to confirm an ISBN
+        """
+        self.index = index or ResolverIndex()
+        self.search_service = search_service
+        self.book_service = book_service
+        self.max_candidates = max_candidates
+
+    def resolve(self, identifier: Identifier) -> Optional[int]:
+        """
+        Resolve an ISBN, a title or a (title, author) pair to a book id.
+
+        Args:
+            identifier: ISBN or title string, or a (title, author) tuple
+
+        Returns:
+            The book id, or None if it could not be resolved
+        """
+        if isinstance(identifier, tuple):
+            return self.resolve_title(*identifier)
+        if normalize_isbn(identifier):
+            return self.resolve_isbn(identifier)
+        return self.resolve_title(identifier)
+
+    def resolve_isbn(self, isbn: str) -> Optional[int]:
+        """Resolve an ISBN to a book id."""
+        book_id = self.index.lookup_isbn(isbn)
+        if book_id is not None or self.search_service is None:
+            return book_id
+
+        candidates = self.search_service.search(normalize_isbn(isbn))
+        self.index.learn_search_infos(candidates)
+        if self.book_service is None:
+            return None
+
+        for candidate in candidates[:self.max_candidates]:
+            if candidate.id is None or not candidate.cleanName:
+                continue
+            book_link = f"{candidate.cleanName}-{candidate.id}"
+            info = self.book_service.get_book_info(book_link)
+            if info is not None:
+                self.index.learn_book_info(book_link, info)
+            book_id = self.index.lookup_isbn(isbn)
+            if book_id is not None:
+                return book_id
+        return None
+
+    def resolve_title(self, title: str, author: Optional[str] = None) -> Optional[int]:
+        """Resolve a title, optionally qualified by author, to a book id."""
+        book_id = self.index.lookup_title(title, author)
+        if book_id is not None or self.search_service is None:
+            return book_id
+
+        self.index.learn_search_infos(self.search_service.search(title))
+        return self.index.lookup_title(title, author)
+
+    def resolve_many(self, identifiers: Iterable[Identifier], max_workers: int = 4) -> Dict[Identifier, Optional[int]]:
+        """
+        Resolve many identifiers; only index misses cost network requests.
+
+        Args:
+            identifiers: ISBNs, titles or (title, author) tuples
+            max_workers: Number of misses resolved at the same time
+
+        Returns:
+            Mapping of each identifier to its book id (or None)
+        """
+        identifiers = list(dict.fromkeys(identifiers))
+        results = {}
+        misses = []
+        for identifier in identifiers:
+            if isinstance(identifier, tuple):
+                book_id = self.index.lookup_title(*identifier)
+            elif normalize_isbn(identifier):
+                book_id = self.index.lookup_isbn(identifier)
+            else:
+                book_id = self.index.lookup_title(identifier)
+            if book_id is None and self.search_service is not None:
+                misses.append(identifier)
+            results[identifier] = book_id
+
+        if misses:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results.update(zip(misses, executor.map(self.resolve, misses)))
+        return results
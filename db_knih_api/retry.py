@@ -0,0 +1,114 @@
+"""
+Retry policies with exponential backoff and jitter.
+"""
+import random
+import time
+from typing import Callable, Optional, TypeVar
+
+from .deadline import current_token
+from .exceptions import CircuitOpenError, DeadlineExceededError, FetchError
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Classify whether a failed fetch is worth retrying.
+
+    Network errors, timeouts, throttling and server errors are retryable.
+    Client errors such as 404, an open circuit breaker and an exceeded
+    deadline are not.
+
+    Args:
+        error: The raised exception
+
+    Returns:
+        True if the request may succeed when repeated
+    """
+    if isinstance(error, (CircuitOpenError, DeadlineExceededError)):
+        return False
+    if not isinstance(error, FetchError):
+        return False
+    return error.status_code is None or error.status_code in RETRYABLE_STATUS_CODES
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for retrying failed fetches."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 10.0,
+                 multiplier: float = 2.0, jitter: bool = True,
+                 retryable: Callable[[Exception], bool] = is_retryable,
+                 sleep: Callable[[float], None] = time.sleep,
+                 rand: Callable[[], float] = random.random):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_attempts: Total number of attempts, including the first one
+            base_delay: Delay in seconds before the first retry
+            max_delay: Upper bound of any single delay
+            multiplier: Growth factor of the delay between retries
+            jitter: Whether to pick a random delay between 0 and the backoff
+            retryable: Classifier deciding which errors are retried
+            sleep: Sleep function, replaceable for testing
+            rand: Random number source in [0, 1), replaceable for testing
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retryable = retryable
+        self._sleep = sleep
+        self._rand = rand
+
+    def delay(self, retry: int) -> float:
+        """
+        Get the delay before a retry.
+
+        Args:
+            retry: 1 for the first retry, 2 for the second and so on
+
+        Returns:
+            Delay in seconds
+        """
+        backoff = min(self.max_delay, self.base_delay * self.multiplier ** (retry - 1))
+        return backoff * self._rand() if self.jitter else backoff
+
+    def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Call a function, retrying retryable errors.
+
+        Args:
+            func: The function to call
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+
+        Returns:
+            The function's result
+
+        Raises:
+            Exception: The last error if all attempts fail or it is not retryable,
+                or as soon as the backoff would outlast the current call deadline
+        """
+        last_error: Optional[Exception] = None
+        for attempt in range(1, self.max_attempts + 1):
+            if attempt > 1:
+                delay = self.delay(attempt - 1)
+                token = current_token()
+                remaining = token.remaining() if token is not None else None
+                if remaining is not None and delay >= remaining:
+                    raise last_error
+                self._sleep(delay)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not self.retryable(e):
+                    raise
+                last_error = e
+        raise last_error
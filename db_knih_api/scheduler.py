@@ -0,0 +1,272 @@
+"""
+Request scheduler with priority classes, weighted fair queuing between tenants
+and starvation protection.
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .hedging import LatencyTracker
+from .rate_limiter import RateLimiter
+
+
+class Priority(IntEnum):
+    """Priority classes; lower values are served first."""
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+DEFAULT_TENANT = "default"
+
+_current: contextvars.ContextVar[Tuple[Optional[Priority], Optional[str]]] = contextvars.ContextVar(
+    "db_knih_scheduling", default=(None, None)
+)
+
+
+@contextlib.contextmanager
+def scheduling(priority: Optional[Priority] = None, tenant: Optional[str] = None) -> Iterator[None]:
+    """
+    Set the priority and tenant of requests made by the current thread or task.
+
+    Values not given are inherited from an enclosing ``scheduling`` block, so a
+    crawl job can set its tenant once and individual calls their priority.
+
+    Args:
+        priority: Priority class of the requests
+        tenant: Tenant or job the requests are accounted to
+    """
+    outer_priority, outer_tenant = _current.get()
+    token = _current.set((
+        priority if priority is not None else outer_priority,
+        tenant if tenant is not None else outer_tenant,
+    ))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current_scheduling() -> Tuple[Priority, str]:
+    """Get the priority and tenant set by ``scheduling`` (defaults: NORMAL, "default")."""
+    priority, tenant = _current.get()
+    return (Priority(priority) if priority is not None else Priority.NORMAL,
+            tenant if tenant is not None else DEFAULT_TENANT)
+
+
+@dataclass
+class QueueTimeStats:
+    """Queue-time metrics of one priority class, in seconds."""
+    dispatched: int
+    waiting: int
+    mean: Optional[float]
+    p50: Optional[float]
+    p95: Optional[float]
+    max: Optional[float]
+
+
+class _Ticket:
+    """A request waiting for its turn."""
+    __slots__ = ("priority", "tenant", "enqueued_at", "start", "finish", "event", "dispatched")
+
+    def __init__(self, priority: Priority, tenant: str, enqueued_at: float, start: float, finish: float):
+        self.priority = priority
+        self.tenant = tenant
+        self.enqueued_at = enqueued_at
+        self.start = start
+        self.finish = finish
+        self.event = threading.Event()
+        self.dispatched = False
+
+
+class _ClassQueue:
+    """Weighted fair queue of one priority class, ordered by virtual finish time."""
+
+    def __init__(self):
+        self.virtual_time = 0.0
+        self.last_finish: Dict[str, float] = {}
+        self.heap: List[Tuple[float, int, _Ticket]] = []
+        self.waiting = 0
+        self.waits = LatencyTracker(window=1000)
+        self.dispatched = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class RequestScheduler:
+    """
+    Admits requests one at a time in priority order, below a concurrency limit.
+
+    Higher priority classes are always served first. Within a class, tenants
+    share the dispatch rate in proportion to their weights (weighted fair
+    queuing), so one large crawl job cannot crowd out another. A request that
+    has waited longer than ``max_wait`` is served next regardless of its class,
+    which keeps background work from starving.
+
+    When a rate limiter is given, only the request at the head of the queue
+    waits for it, so a newly arrived interactive request never queues behind
+    requests that are already waiting for tokens.
+    """
+
+    def __init__(self, max_concurrent: int = 4, rate_limiter: Optional[RateLimiter] = None,
+                 tenant_weights: Optional[Dict[str, float]] = None, max_wait: Optional[float] = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrent: Maximum number of admitted requests in flight
+            rate_limiter: Optional rate limiter applied at dispatch
+            tenant_weights: Share of each tenant within a class (default weight 1)
+            max_wait: Seconds after which a waiting request is served first, or None
+            clock: Monotonic clock, replaceable for testing
+        """
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+
+        self.max_concurrent = max_concurrent
+        self.rate_limiter = rate_limiter
+        self.tenant_weights = dict(tenant_weights or {})
+        self.max_wait = max_wait
+        self._clock = clock
+        self._queues = {priority: _ClassQueue() for priority in Priority}
+        self._arrivals: Deque[_Ticket] = deque()
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._dispatching = False
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of admitted requests not yet released."""
+        return self._in_flight
+
+    def acquire(self, priority: Priority = Priority.NORMAL, tenant: str = DEFAULT_TENANT,
+                timeout: Optional[float] = None) -> bool:
+        """
+        Block until the request may be sent; pair every successful call with ``release``.
+
+        Args:
+            priority: Priority class of the request
+            tenant: Tenant or job the request is accounted to
+            timeout: Optional seconds to wait for the turn before giving up
+
+        Returns:
+            True once admitted, False if the timeout passed first (while queued or rate limited)
+        """
+        priority = Priority(priority)
+        deadline = self._clock() + timeout if timeout is not None else None
+        with self._lock:
+            queue = self._queues[priority]
+            weight = self.tenant_weights.get(tenant, 1.0)
+            start = max(queue.virtual_time, queue.last_finish.get(tenant, 0.0))
+            ticket = _Ticket(priority, tenant, self._clock(), start, start + 1.0 / weight)
+            queue.last_finish[tenant] = ticket.finish
+            heapq.heappush(queue.heap, (ticket.finish, next(self._sequence), ticket))
+            queue.waiting += 1
+            self._arrivals.append(ticket)
+            self._dispatch()
+
+        if not ticket.event.wait(timeout):
+            with self._lock:
+                if ticket.event.is_set():
+                    # Dispatched while timing out: pass the turn on
+                    self._dispatching = False
+                    self._dispatch()
+                else:
+                    # Leave the queue; the ticket is skipped when it reaches the head
+                    ticket.dispatched = True
+                    self._queues[priority].waiting -= 1
+            return False
+
+        admitted = False
+        try:
+            if self.rate_limiter:
+                admitted = self.rate_limiter.acquire(
+                    timeout=max(0.0, deadline - self._clock()) if deadline is not None else None)
+            else:
+                admitted = True
+        finally:
+            with self._lock:
+                self._dispatching = False
+                if admitted:
+                    self._in_flight += 1
+                    self._record_wait(ticket)
+                self._dispatch()
+        return admitted
+
+    def release(self) -> None:
+        """Mark an admitted request as finished."""
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    @contextlib.contextmanager
+    def slot(self, priority: Priority = Priority.NORMAL, tenant: str = DEFAULT_TENANT) -> Iterator[None]:
+        """Context manager pairing ``acquire`` and ``release``."""
+        self.acquire(priority, tenant)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[Priority, QueueTimeStats]:
+        """Get queue-time metrics per priority class."""
+        with self._lock:
+            return {
+                priority: QueueTimeStats(
+                    dispatched=queue.dispatched,
+                    waiting=queue.waiting,
+                    mean=queue.total_wait / queue.dispatched if queue.dispatched else None,
+                    p50=queue.waits.percentile(50),
+                    p95=queue.waits.percentile(95),
+                    max=queue.max_wait if queue.dispatched else None,
+                )
+                for priority, queue in self._queues.items()
+            }
+
+    def _dispatch(self) -> None:
+        """Wake the next request if nobody is dispatching and a slot is free."""
+        if self._dispatching or self._in_flight >= self.max_concurrent:
+            return
+        ticket = self._next_ticket()
+        if ticket is None:
+            return
+        ticket.dispatched = True
+        queue = self._queues[ticket.priority]
+        queue.waiting -= 1
+        queue.virtual_time = max(queue.virtual_time, ticket.start)
+        self._dispatching = True
+        ticket.event.set()
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        while self._arrivals and self._arrivals[0].dispatched:
+            self._arrivals.popleft()
+        if not self._arrivals:
+            return None
+
+        oldest = self._arrivals[0]
+        if self.max_wait is not None and self._clock() - oldest.enqueued_at >= self.max_wait:
+            return oldest
+
+        for queue in self._queues.values():
+            while queue.heap and queue.heap[0][2].dispatched:
+                heapq.heappop(queue.heap)
+            if queue.heap:
+                return heapq.heappop(queue.heap)[2]
+        return None
+
+    def _record_wait(self, ticket: _Ticket) -> None:
+        wait = self._clock() - ticket.enqueued_at
+        queue = self._queues[ticket.priority]
+        queue.dispatched += 1
+        queue.total_wait += wait
+        queue.max_wait = max(queue.max_wait, wait)
+        queue.waits.record(wait)
@@ -1,41 +1,104 @@
 """
 Search service for finding books on databazeknih.cz.
 """
+import re
+import unicodedata
+from dataclasses import replace
 from typing import List, Optional
 
 from bs4 import BeautifulSoup
 
+from .cache import TTLCache
+from .deadline import Deadline, cancellation, check_deadline
 from .fetcher import Fetcher
 from .models import SearchInfo
+from .tracing import span
+
+
+def normalize_query(text: str, fold_diacritics: bool = False) -> str:
+    """
+    Normalize a search query so equivalent spellings map to the same key.
+    
+    Args:
+        text: The search query
+        fold_diacritics: Also strip diacritics ("hárry" -> "harry", "česká" -> "ceska")
+        
+    Returns:
+        The query case-folded, with surrounding whitespace removed and inner
+        whitespace collapsed to single spaces
+    """
+    normalized = re.sub(r"\s+", " ", text).strip().casefold()
+    if fold_diacritics:
+        decomposed = unicodedata.normalize("NFKD", normalized)
+        normalized = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return unicodedata.normalize("NFC", normalized)
 
 
 class SearchService:
     """Service for searching books and extracting basic information."""
     
-    def __init__(self, fetcher: Optional[Fetcher] = None):
-        """Initialize the search service with an optional fetcher for testing."""
+    def __init__(self, fetcher: Optional[Fetcher] = None, cache: Optional[TTLCache] = None,
+                 fold_diacritics: bool = False):
+        """
+        Initialize the search service.
+        
+        Args:
+            fetcher: Optional fetcher for testing
+            cache: Optional cache of search results keyed by the normalized query
+            fold_diacritics: Treat queries differing only in diacritics as the same
+                query when caching (only safe if the site returns the same results)
+        """
         self.fetcher = fetcher or Fetcher()
+        self.cache = cache
+        self.fold_diacritics = fold_diacritics
     
-    def search(self, text: str) -> List[SearchInfo]:
+    def search(self, text: str, deadline: Optional[Deadline] = None) -> List[SearchInfo]:
         """
         Search for books with the given text.
         
         Args:
             text: The search query
+            deadline: Optional seconds or CancellationToken bounding the whole call
             
         Returns:
             List of SearchInfo objects with basic book information
+            
+        Raises:
+            DeadlineExceededError: If the deadline passes or the token is cancelled
         """
+        with cancellation(deadline):
+            return self._search(text)
+    
+    def _search(self, text: str) -> List[SearchInfo]:
+        if self.cache is not None:
+            key = normalize_query(text, self.fold_diacritics)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._copy(cached)
+        
         url = self.fetcher.create_search_url(text)
         response = self.fetcher.fetch_page(url)
         
         if response == 'Error':
             return []
         
-        soup = BeautifulSoup(response, 'lxml')
-        book_elements = soup.select('p.new')
+        check_deadline(url)
+        with span("parse.soup", page="search"):
+            soup = BeautifulSoup(response, 'lxml')
+        with span("_parse_book_info") as attributes:
+            book_elements = soup.select('p.new')
+            results = [self._parse_book_info(element) for element in book_elements]
+            attributes["results"] = len(results)
         
-        return [self._parse_book_info(element) for element in book_elements]
+        if self.cache is not None:
+            self.cache.set(key, results)
+            return self._copy(results)
+        return results
+    
+    @staticmethod
+    def _copy(results: List[SearchInfo]) -> List[SearchInfo]:
+        """Copy cached results so callers cannot change what later hits return."""
+        return [replace(info) for info in results]
     
     def _parse_book_info(self, element: BeautifulSoup) -> SearchInfo:
         """Parse book information from a search result element."""
@@ -0,0 +1,367 @@
+"""
+Local JSON HTTP service sharing one fetcher, cache and rate limit across clients.
+
+Run it with ``python -m db_knih_api.service --port 8080`` and point every
+application at it with ``connect("http://localhost:8080")``:
+
+    GET /search?q=harry+potter   -> list of SearchInfo objects
+    GET /book/{book_link}        -> BookInfo object, 404 if not found
+    GET /stats                   -> request and coalescing counters
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .book_service import BookService
+from .cache import TTLCache
+from .client import DBKnih
+from .exceptions import DeadlineExceededError, FetchError
+from .fetcher import Fetcher
+from .models import BookInfo, SearchInfo
+from .rate_limiter import RateLimiter
+from .refresh import book_info_from_dict
+from .search_service import SearchService, normalize_query
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error", 502: "Bad Gateway", 504: "Gateway Timeout"}
+
+
+@dataclass
+class ServiceStats:
+    """Counters of an HTTP service."""
+    requests: int = 0
+    coalesced: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    in_flight: int = 0
+
+
+class HTTPService:
+    """
+    Asyncio HTTP server answering searches and book lookups as JSON.
+
+    Lookups run on a thread pool through one DBKnih instance, so all clients
+    share its fetcher (connection pool and rate limiter) and caches. Concurrent
+    requests for the same query or book wait for a single lookup.
+    """
+
+    def __init__(self, db_knih: Optional[DBKnih] = None, host: str = "127.0.0.1", port: int = 0,
+                 max_workers: int = 8, book_cache: Optional[TTLCache] = None):
+        """
+        Initialize the service.
+
+        Args:
+            db_knih: Instance answering the requests; by default one built by
+                ``default_db_knih``
+            host: Interface to listen on
+            port: Port to listen on, 0 for any free port
+            max_workers: Number of lookups run at the same time
+            book_cache: Optional cache of found books keyed by book link
+        """
+        self.db_knih = db_knih or default_db_knih()
+        self.host = host
+        self.port = port
+        self.max_workers = max_workers
+        self.book_cache = book_cache
+        self.stats = ServiceStats()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-knih-service")
+        self._in_flight: Dict[Tuple[str, str], "asyncio.Future[Any]"] = {}
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running service."""
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self) -> "HTTPService":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    async def serve_forever(self) -> None:
+        """Serve in the running event loop until cancelled."""
+        await self._open()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self._close()
+
+    def start(self) -> None:
+        """Serve from a background thread with its own event loop."""
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run() -> None:
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self._open())
+            ready.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(self._close())
+                loop.close()
+
+        self._loop = loop
+        self._thread = threading.Thread(target=run, name="db-knih-service", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self) -> None:
+        """Stop a service started with ``start``."""
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    async def _open(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _close(self) -> None:
+        self._server.close()
+        # Idle keep-alive connections would otherwise keep the server open
+        for writer in list(self._connections):
+            writer.close()
+        await self._server.wait_closed()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of one connection until it is closed."""
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+
+                request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, keep_alive=False)
+                    return
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {"error": "Malformed Content-Length"}, keep_alive=False)
+                    return
+                if length:
+                    await reader.readexactly(length)
+
+                status, payload = await self._dispatch(method, target)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str) -> Tuple[int, Any]:
+        """Route a request and turn lookup errors into HTTP statuses."""
+        self.stats.requests += 1
+        parsed = urllib.parse.urlsplit(target)
+        parts = [urllib.parse.unquote(part) for part in parsed.path.split("/") if part]
+        if method != "GET":
+            return 405, {"error": f"Method {method} not allowed"}
+
+        try:
+            if parts == ["search"]:
+                query = urllib.parse.parse_qs(parsed.query).get("q", [""])[0]
+                if not query.strip():
+                    return 400, {"error": "Missing query parameter q"}
+                # Equivalent queries share one lookup, run with the first caller's spelling
+                results = await self._coalesced(("search", normalize_query(query)),
+                                                lambda: self.db_knih.search(query))
+                return 200, [asdict(info) for info in results]
+            if len(parts) == 2 and parts[0] == "book":
+                info = await self._book(parts[1])
+                if info is None:
+                    return 404, {"error": f"Book {parts[1]} not found"}
+                return 200, asdict(info)
+            if parts == ["stats"]:
+                return 200, asdict(self.stats)
+        except DeadlineExceededError as e:
+            self.stats.errors += 1
+            return 504, {"error": str(e)}
+        except FetchError as e:
+            self.stats.errors += 1
+            return 502, {"error": str(e), "status_code": e.status_code}
+        except Exception as e:
+            self.stats.errors += 1
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+        return 404, {"error": f"No route for {parsed.path}"}
+
+    async def _book(self, book_link: str) -> Optional[BookInfo]:
+        if self.book_cache is not None:
+            cached = self.book_cache.get(book_link)
+            if cached is not None:
+                self.stats.cache_hits += 1
+                return cached
+
+        info = await self._coalesced(("book", book_link), lambda: self.db_knih.get_book_info(book_link))
+        if self.book_cache is not None and info is not None:
+            self.book_cache.set(book_link, info)
+        return info
+
+    def _coalesced(self, key: Tuple[str, str], call: Callable[[], Any]) -> Awaitable[Any]:
+        """Run a blocking lookup on the pool, sharing it with identical concurrent requests."""
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+            return asyncio.shield(future)
+
+        future = asyncio.get_running_loop().run_in_executor(self._executor, call)
+        self._in_flight[key] = future
+        self.stats.in_flight += 1
+
+        def done(_: "asyncio.Future[Any]") -> None:
+            del self._in_flight[key]
+            self.stats.in_flight -= 1
+
+        future.add_done_callback(done)
+        return asyncio.shield(future)
+
+
+class ServiceClient:
+    """
+    Client of an ``HTTPService``, usable in place of the search and book services.
+
+    ``DBKnih(search_service=client, book_service=client)`` (or ``connect``)
+    sends every lookup to the shared service instead of the site.
+    """
+
+    def __init__(self, base_url: str, fetcher: Optional[Fetcher] = None):
+        """
+        Initialize the client.
+
+        Args:
+            base_url: URL of the service (e.g., "http://localhost:8080")
+            fetcher: Optional fetcher used for the requests to the service
+        """
+        self.base_url = base_url.rstrip("/")
+        self.fetcher = fetcher or Fetcher()
+
+    def search(self, text: str) -> List[SearchInfo]:
+        """
+        Search for books through the service.
+
+        Args:
+            text: The search query
+
+        Returns:
+            List of SearchInfo objects with basic book information
+
+        Raises:
+            FetchError: If the service fails
+        """
+        url = f"{self.base_url}/search?q={urllib.parse.quote(text)}"
+        return [SearchInfo(**item) for item in json.loads(self.fetcher.fetch(url))]
+
+    def get_book_info(self, book_link: str) -> Optional[BookInfo]:
+        """
+        Get detailed book information through the service.
+
+        Args:
+            book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+
+        Returns:
+            BookInfo object, or None if the book was not found
+
+        Raises:
+            FetchError: If the service fails
+        """
+        url = f"{self.base_url}/book/{urllib.parse.quote(book_link, safe='')}"
+        try:
+            content = self.fetcher.fetch(url)
+        except FetchError as e:
+            if e.status_code == 404:
+                return None
+            raise
+        return book_info_from_dict(json.loads(content))
+
+
+def connect(base_url: str, fetcher: Optional[Fetcher] = None) -> DBKnih:
+    """
+    Create a DBKnih instance whose lookups go through a shared service.
+
+    Args:
+        base_url: URL of the service (e.g., "http://localhost:8080")
+        fetcher: Optional fetcher used for the requests to the service
+
+    Returns:
+        DBKnih using a ServiceClient as its search and book service
+    """
+    client = ServiceClient(base_url, fetcher)
+    return DBKnih(book_service=client, search_service=client)
+
+
+def default_db_knih(rate: float = 2.0, burst: int = 4, cache_ttl: float = 300.0) -> DBKnih:
+    """Create the DBKnih instance of a service: one rate-limited fetcher and a search cache."""
+    fetcher = Fetcher(rate_limiter=RateLimiter(rate, burst=burst) if rate > 0 else None)
+    return DBKnih(book_service=BookService(fetcher),
+                  search_service=SearchService(fetcher, cache=TTLCache(ttl=cache_ttl)))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the service."""
+    parser = argparse.ArgumentParser(
+        prog="python -m db_knih_api.service",
+        description="Serve databazeknih.cz searches and book details as JSON to local clients.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on (default: 8080)")
+    parser.add_argument("-r", "--rate", type=float, default=2.0,
+                        help="maximum requests per second to the site, 0 for unlimited (default: 2)")
+    parser.add_argument("--burst", type=int, default=4,
+                        help="maximum requests sent back to back (default: 4)")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="number of lookups run at the same time (default: 8)")
+    parser.add_argument("--cache-ttl", type=float, default=300.0,
+                        help="seconds search results and books are cached (default: 300)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of ``python -m db_knih_api.service``."""
+    args = build_parser().parse_args(argv)
+    service = HTTPService(default_db_knih(args.rate, args.burst, args.cache_ttl), host=args.host,
+                          port=args.port, max_workers=args.workers, book_cache=TTLCache(ttl=args.cache_ttl))
+    print(f"db-knih service listening on http://{args.host}:{args.port}")
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(service.serve_forever())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
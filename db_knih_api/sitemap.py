@@ -0,0 +1,266 @@
+"""
+Book discovery from the sitemaps of databazeknih.cz.
+
+The sitemap index and its child sitemaps (plain or gzipped) are streamed
+through an incremental XML parser, so memory use does not grow with their size.
+"""
+import heapq
+import itertools
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from .exceptions import FetchError
+from .fetcher import Fetcher
+
+SITEMAP_URL = "https://www.databazeknih.cz/sitemap.xml"
+
+_GZIP_MAGIC = b"\x1f\x8b"
+# Old: /knihy/book-name-123, new: /prehled-knihy/book-name-123
+_BOOK_URL = re.compile(r"/(?:prehled-knihy|knihy)/([^/?#]+-(\d+))/?(?:[?#]|$)")
+
+
+@dataclass
+class SitemapEntry:
+    """A book listed in a sitemap."""
+    book_link: str
+    id: int
+    lastmod: Optional[datetime] = None
+    sitemap: Optional[str] = None
+
+
+def book_link_from_url(url: str) -> Optional[str]:
+    """
+    Extract the book link accepted by ``BookService.get_book_info`` from a book URL.
+
+    Args:
+        url: A book page URL (e.g., "https://www.databazeknih.cz/prehled-knihy/hobit-123")
+
+    Returns:
+        The "cleanName-id" book link, or None for other pages
+    """
+    match = _BOOK_URL.search(url.strip())
+    return match.group(1) if match else None
+
+
+def parse_lastmod(text: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a W3C datetime ("2024-05-01", "2024-05-01T10:00:00+02:00" or "...Z") as an aware datetime.
+
+    Returns:
+        The time (UTC if no offset is given), or None if missing or malformed
+    """
+    if not text:
+        return None
+    text = text.strip()
+    if text[-1:] in ("Z", "z"):
+        # fromisoformat only accepts the UTC designator from Python 3.11
+        text = text[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def decompress(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Gunzip a stream of chunks if it starts with the gzip magic, else pass it through."""
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len(_GZIP_MAGIC):
+            break
+    if not head.startswith(_GZIP_MAGIC):
+        if head:
+            yield head
+        yield from chunks
+        return
+
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in itertools.chain([head], chunks):
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def iter_sitemap(chunks: Iterable[bytes]) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    Incrementally parse a sitemap or sitemap index.
+
+    Args:
+        chunks: Raw (optionally gzipped) XML chunks
+
+    Returns:
+        Iterator of (kind, loc, lastmod) tuples, where kind is "sitemap" for
+        children of an index and "url" for pages
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    root = None
+    depth = 0
+    loc = lastmod = None
+    for chunk in decompress(chunks):
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                root = elem if root is None else root
+                depth += 1
+                continue
+            depth -= 1
+            tag = elem.tag.rsplit("}", 1)[-1]
+            # Only direct children of <url>, not e.g. <image:loc> of image sitemaps
+            if depth == 2 and tag == "loc":
+                loc = (elem.text or "").strip()
+            elif depth == 2 and tag == "lastmod":
+                lastmod = (elem.text or "").strip()
+            elif depth == 1 and tag in ("url", "sitemap"):
+                if loc:
+                    yield tag, loc, lastmod
+                loc = lastmod = None
+                # Drop the finished entries so the tree stays empty
+                root.clear()
+    parser.close()
+
+
+class CrawlQueue:
+    """
+    Thread-safe queue of book links to crawl, most recently modified first.
+
+    Every link is accepted once, so links found in several sitemaps (or in
+    later discovery runs) are not crawled twice. Links without a lastmod come last.
+    """
+
+    def __init__(self):
+        """Initialize an empty queue."""
+        self._heap: List[Tuple[float, int, SitemapEntry]] = []
+        self._seen: Set[int] = set()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    @property
+    def seen(self) -> int:
+        """Number of distinct books ever added."""
+        with self._lock:
+            return len(self._seen)
+
+    def add(self, entry: SitemapEntry) -> bool:
+        """
+        Queue a book unless it was queued before.
+
+        Args:
+            entry: The discovered book
+
+        Returns:
+            Whether the book was new
+        """
+        priority = -entry.lastmod.timestamp() if entry.lastmod else float("inf")
+        with self._lock:
+            if entry.id in self._seen:
+                return False
+            self._seen.add(entry.id)
+            heapq.heappush(self._heap, (priority, next(self._sequence), entry))
+            return True
+
+    def pop(self) -> Optional[SitemapEntry]:
+        """Take the most recently modified book, or None if the queue is empty."""
+        with self._lock:
+            if not self._heap:
+                return None
+            return heapq.heappop(self._heap)[2]
+
+    def drain(self) -> Iterator[str]:
+        """Yield and remove the queued book links in priority order, e.g. as BatchRunner inputs."""
+        while True:
+            entry = self.pop()
+            if entry is None:
+                return
+            yield entry.book_link
+
+
+class SitemapDiscovery:
+    """Finds every book listed in the site's sitemaps."""
+
+    def __init__(self, fetcher: Optional[Fetcher] = None, sitemap_url: str = SITEMAP_URL,
+                 max_depth: int = 3, chunk_size: int = 64 * 1024):
+        """
+        Initialize the discovery.
+
+        Args:
+            fetcher: Optional fetcher; its rate limiter applies to the sitemap downloads
+            sitemap_url: URL of the sitemap index (or of a single sitemap)
+            max_depth: Maximum nesting of sitemap indexes followed
+            chunk_size: Size in bytes of the downloaded chunks
+        """
+        self.fetcher = fetcher or Fetcher()
+        self.sitemap_url = sitemap_url
+        self.max_depth = max_depth
+        self.chunk_size = chunk_size
+        self.errors: List[FetchError] = []
+
+    def iter_entries(self, since: Optional[datetime] = None) -> Iterator[SitemapEntry]:
+        """
+        Stream the books of every sitemap reachable from the index.
+
+        Child sitemaps that cannot be fetched are skipped and recorded in
+        ``errors``; a failure of the index itself is raised.
+
+        Args:
+            since: Optional time (UTC if naive); sitemaps and books last modified
+                before it are skipped
+
+        Returns:
+            Iterator of SitemapEntry objects; a book listed twice is yielded twice
+        """
+        self.errors = []
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        yield from self._walk(self.sitemap_url, since, depth=0)
+
+    def discover(self, queue: CrawlQueue, since: Optional[datetime] = None) -> int:
+        """
+        Feed every discovered book into a crawl queue.
+
+        Args:
+            queue: Queue receiving the books; books it has seen before are ignored
+            since: Optional time; books last modified before it are skipped
+
+        Returns:
+            Number of new books queued
+        """
+        return sum(1 for entry in self.iter_entries(since) if queue.add(entry))
+
+    def _walk(self, url: str, since: Optional[datetime], depth: int) -> Iterator[SitemapEntry]:
+        children = []
+        try:
+            for kind, loc, lastmod in iter_sitemap(self.fetcher.stream(url, self.chunk_size)):
+                modified = parse_lastmod(lastmod)
+                if since is not None and modified is not None and modified < since:
+                    continue
+                if kind == "sitemap":
+                    # Followed after this document, so only one download is open at a time
+                    children.append(loc)
+                    continue
+                book_link = book_link_from_url(loc)
+                if book_link is not None:
+                    yield SitemapEntry(book_link, int(book_link.rsplit("-", 1)[1]), modified, url)
+        except (FetchError, ParseError) as e:
+            error = e if isinstance(e, FetchError) else FetchError(url, f"Malformed sitemap: {e}")
+            if depth == 0:
+                raise error from e
+            self.errors.append(error)
+            return
+
+        if depth < self.max_depth:
+            for child in children:
+                yield from self._walk(child, since, depth + 1)
@@ -0,0 +1,341 @@
+"""
+Read-only catalog snapshots shared between processes through ``mmap``.
+
+A snapshot file holds fixed-width numeric columns, a heap of UTF-8 strings
+and an index of book ids sorted for binary search, all little-endian and
+8-byte aligned. Every process mapping the same file shares its pages through
+the OS page cache, and opening it only reads the header.
+"""
+import array
+import bisect
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from dataclasses import asdict
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from .models import BookInfo, Review, SearchInfo
+
+MAGIC = b"DBKSNAP\x00"
+VERSION = 1
+
+# Numeric columns: name -> array typecode; missing values are -1 (NaN for rating)
+NUMERIC_COLUMNS = {
+    "id": "q",
+    "search_year": "i",
+    "year": "i",
+    "rating": "d",
+    "numberOfRatings": "q",
+    "pages": "i",
+    "flags": "B",
+}
+STRING_FIELDS = ("name", "cleanName", "search_author", "author", "publisher", "plot", "cover",
+                 "originalLanguage", "isbn", "genres", "reviews")
+
+_HAS_BOOK = 1
+_COMPLETE = 2
+_MISSING = 0xFFFFFFFF
+_GENRE_SEPARATOR = "\x1f"
+_SECTIONS = tuple(NUMERIC_COLUMNS) + ("string_offsets", "string_lengths", "index_ids", "index_rows", "heap")
+_HEADER = struct.Struct("<8sII")
+_SECTION = struct.Struct("<QQ")
+
+CatalogRecord = Union[SearchInfo, Tuple[SearchInfo, Optional[BookInfo]]]
+
+
+def write_snapshot(path: str, records: Iterable[CatalogRecord]) -> int:
+    """
+    Write a catalog snapshot.
+
+    The file is written next to ``path`` and renamed over it, so processes that
+    have the previous snapshot mapped keep a consistent view.
+
+    Args:
+        path: Destination file
+        records: SearchInfo objects, or (SearchInfo, BookInfo or None) pairs;
+            a later record with the same id replaces an earlier one
+
+    Returns:
+        Number of books written
+
+    Raises:
+        ValueError: If a record has no id
+    """
+    books: Dict[int, Tuple[SearchInfo, Optional[BookInfo]]] = {}
+    for record in records:
+        search_info, book_info = record if isinstance(record, tuple) else (record, None)
+        if search_info.id is None:
+            raise ValueError(f"Cannot snapshot a book without an id: {search_info}")
+        books[search_info.id] = (search_info, book_info)
+
+    columns = {name: array.array(typecode) for name, typecode in NUMERIC_COLUMNS.items()}
+    string_offsets = array.array("Q")
+    string_lengths = array.array("I")
+    heap = bytearray()
+
+    for book_id, (search_info, book_info) in books.items():
+        book = book_info or BookInfo(complete=False)
+        columns["id"].append(book_id)
+        columns["search_year"].append(_int_or_missing(search_info.year))
+        columns["year"].append(_int_or_missing(book.year))
+        columns["rating"].append(math.nan if book.rating is None else float(book.rating))
+        columns["numberOfRatings"].append(_int_or_missing(book.numberOfRatings))
+        columns["pages"].append(_int_or_missing(book.pages))
+        columns["flags"].append((_HAS_BOOK if book_info is not None else 0) | (_COMPLETE if book.complete else 0))
+
+        reviews = json.dumps([asdict(review) for review in book.reviews], ensure_ascii=False) \
+            if book.reviews is not None else None
+        genres = _GENRE_SEPARATOR.join(book.genres) if book.genres is not None else None
+        for value in (search_info.name, search_info.cleanName, search_info.author, book.author,
+                      book.publisher, book.plot, book.cover, book.originalLanguage, book.isbn,
+                      genres, reviews):
+            if value is None:
+                string_offsets.append(0)
+                string_lengths.append(_MISSING)
+            else:
+                encoded = value.encode("utf-8")
+                string_offsets.append(len(heap))
+                string_lengths.append(len(encoded))
+                heap += encoded
+
+    order = sorted(range(len(books)), key=columns["id"].__getitem__)
+    sections = [columns[name] for name in NUMERIC_COLUMNS] + [
+        string_offsets,
+        string_lengths,
+        array.array("q", (columns["id"][row] for row in order)),
+        array.array("I", order),
+    ]
+    if sys.byteorder != "little":
+        for section in sections:
+            section.byteswap()
+    payloads = [section.tobytes() for section in sections] + [bytes(heap)]
+
+    table_size = _HEADER.size + _SECTION.size * len(_SECTIONS)
+    offset = _align(table_size)
+    table = []
+    for payload in payloads:
+        table.append((offset, len(payload)))
+        offset = _align(offset + len(payload))
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, VERSION, len(books)))
+        for section_offset, length in table:
+            fh.write(_SECTION.pack(section_offset, length))
+        for (section_offset, _), payload in zip(table, payloads):
+            fh.write(b"\x00" * (section_offset - fh.tell()))
+            fh.write(payload)
+    os.replace(temp_path, path)
+    return len(books)
+
+
+def _int_or_missing(value: Optional[int]) -> int:
+    return -1 if value is None else int(value)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class BookView:
+    """
+    One book of a snapshot, decoding its fields only when they are read.
+
+    Numeric fields are None when missing. ``to_search_info`` and
+    ``to_book_info`` build the full models.
+    """
+
+    __slots__ = ("_snapshot", "row")
+
+    def __init__(self, snapshot: "CatalogSnapshot", row: int):
+        self._snapshot = snapshot
+        self.row = row
+
+    def __repr__(self) -> str:
+        return f"BookView(id={self.id}, name={self.name!r})"
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or name in self.__slots__:
+            # Unset slots (copy and pickle probe a bare instance) must not recurse
+            raise AttributeError(name)
+        snapshot = self._snapshot
+        if name in snapshot._numeric:
+            value = snapshot._numeric[name][self.row]
+            if name == "rating":
+                return None if math.isnan(value) else value
+            return None if value == -1 and name != "flags" else value
+        if name in _STRING_INDEX:
+            return snapshot._string(self.row, _STRING_INDEX[name])
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    @property
+    def has_book_info(self) -> bool:
+        """Whether book details were stored for this book."""
+        return bool(self._snapshot._numeric["flags"][self.row] & _HAS_BOOK)
+
+    def to_search_info(self) -> SearchInfo:
+        """Build the SearchInfo of the book."""
+        return SearchInfo(name=self.name, cleanName=self.cleanName, id=self.id,
+                          year=self.search_year, author=self.search_author)
+
+    def to_book_info(self) -> Optional[BookInfo]:
+        """Build the BookInfo of the book, or None if only search data was stored."""
+        if not self.has_book_info:
+            return None
+        genres = self.genres
+        reviews = self.reviews
+        return BookInfo(
+            plot=self.plot,
+            genres=(genres.split(_GENRE_SEPARATOR) if genres else []) if genres is not None else None,
+            year=self.year,
+            author=self.author,
+            publisher=self.publisher,
+            rating=self.rating,
+            numberOfRatings=self.numberOfRatings,
+            reviews=[Review(**review) for review in json.loads(reviews)] if reviews is not None else None,
+            cover=self.cover,
+            pages=self.pages,
+            originalLanguage=self.originalLanguage,
+            isbn=self.isbn,
+            complete=bool(self.flags & _COMPLETE),
+        )
+
+
+_STRING_INDEX = {name: index for index, name in enumerate(STRING_FIELDS)}
+
+
+class CatalogSnapshot:
+    """
+    Memory-mapped, read-only catalog written by ``write_snapshot``.
+
+    Lookups by id are a binary search over the mapped index; nothing is
+    decoded until a field is read. Numeric columns are available as zero-copy
+    memoryviews, e.g. for ``numpy.frombuffer``.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a snapshot file.
+
+        Args:
+            path: File written by ``write_snapshot``
+
+        Raises:
+            ValueError: If the file is not a snapshot of a supported version
+        """
+        if sys.byteorder != "little":
+            raise ValueError("Snapshots can only be read on little-endian hosts")
+
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, count = _HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} catalog snapshot")
+            self._count = count
+
+            view = memoryview(self._mmap)
+            self._views = [view]
+            sections = {}
+            for index, name in enumerate(_SECTIONS):
+                offset, length = _SECTION.unpack_from(self._mmap, _HEADER.size + index * _SECTION.size)
+                sections[name] = view[offset:offset + length]
+                self._views.append(sections[name])
+        except BaseException:
+            self._mmap.close()
+            raise
+
+        self._numeric = {name: sections[name].cast(typecode) for name, typecode in NUMERIC_COLUMNS.items()}
+        self._string_offsets = sections["string_offsets"].cast("Q")
+        self._string_lengths = sections["string_lengths"].cast("I")
+        self._index_ids = sections["index_ids"].cast("q")
+        self._index_rows = sections["index_rows"].cast("I")
+        self._heap = sections["heap"]
+        self._views.extend([*self._numeric.values(), self._string_offsets, self._string_lengths,
+                            self._index_ids, self._index_rows])
+
+    def __enter__(self) -> "CatalogSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the file; views and columns must not be used afterwards."""
+        # Casts before the slices they were made from, the whole-file view last
+        for view in reversed(self._views):
+            view.release()
+        self._numeric = {}
+        self._mmap.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, book_id: int) -> bool:
+        return self.row_of(book_id) is not None
+
+    def __getitem__(self, row: int) -> BookView:
+        """Get the book stored at a row position."""
+        if not -self._count <= row < self._count:
+            raise IndexError("snapshot row out of range")
+        return BookView(self, row % self._count)
+
+    def __iter__(self) -> Iterator[BookView]:
+        for row in range(self._count):
+            yield BookView(self, row)
+
+    def row_of(self, book_id: int) -> Optional[int]:
+        """Get the row of a book id, or None if it is not in the snapshot."""
+        position = bisect.bisect_left(self._index_ids, book_id)
+        if position < self._count and self._index_ids[position] == book_id:
+            return self._index_rows[position]
+        return None
+
+    def get(self, book_id: int) -> Optional[BookView]:
+        """
+        Look up a book by id.
+
+        Args:
+            book_id: The numeric book id (e.g., 12345 of "harry-potter-12345")
+
+        Returns:
+            BookView of the book, or None if it is not in the snapshot
+        """
+        row = self.row_of(book_id)
+        return BookView(self, row) if row is not None else None
+
+    def book_info(self, book_id: int) -> Optional[BookInfo]:
+        """Get the BookInfo of a book id, or None if it is missing or has no details."""
+        view = self.get(book_id)
+        return view.to_book_info() if view is not None else None
+
+    def search_info(self, book_id: int) -> Optional[SearchInfo]:
+        """Get the SearchInfo of a book id, or None if it is missing."""
+        view = self.get(book_id)
+        return view.to_search_info() if view is not None else None
+
+    def column(self, name: str) -> memoryview:
+        """
+        Get a numeric column without copying it.
+
+        Args:
+            name: One of NUMERIC_COLUMNS; missing values are -1, or NaN for "rating"
+
+        Returns:
+            memoryview over the mapped column, in row order
+        """
+        if name not in self._numeric:
+            raise KeyError(f"Unknown column {name!r}; available: {', '.join(NUMERIC_COLUMNS)}")
+        return self._numeric[name]
+
+    def _string(self, row: int, field_index: int) -> Optional[str]:
+        position = row * len(STRING_FIELDS) + field_index
+        length = self._string_lengths[position]
+        if length == _MISSING:
+            return None
+        offset = self._string_offsets[position]
+        return str(self._heap[offset:offset + length], "utf-8")
@@ -0,0 +1,494 @@
+"""
+SQLite-backed local store of scraped book information.
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .deadline import Deadline
+from .models import BookInfo, Review, SearchInfo
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    clean_name TEXT,
+    author TEXT,
+    year INTEGER,
+    publisher TEXT,
+    rating REAL,
+    number_of_ratings INTEGER,
+    plot TEXT,
+    cover TEXT,
+    pages INTEGER,
+    original_language TEXT,
+    isbn TEXT,
+    complete INTEGER,
+    has_details INTEGER NOT NULL DEFAULT 0,
+    fetched_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_books_author ON books (author);
+CREATE INDEX IF NOT EXISTS idx_books_year ON books (year);
+CREATE INDEX IF NOT EXISTS idx_books_rating ON books (rating);
+
+CREATE TABLE IF NOT EXISTS genres (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS book_genres (
+    book_id INTEGER NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+    genre_id INTEGER NOT NULL REFERENCES genres (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (book_id, genre_id)
+);
+CREATE INDEX IF NOT EXISTS idx_book_genres_genre ON book_genres (genre_id);
+
+CREATE TABLE IF NOT EXISTS reviews (
+    book_id INTEGER NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    text TEXT,
+    rating REAL,
+    username TEXT,
+    date TEXT,
+    PRIMARY KEY (book_id, position)
+);
+"""
+
+UPSERT_SEARCH_INFO = """
+INSERT INTO books (id, name, clean_name, author, year)
+VALUES (:id, :name, :clean_name, :author, :year)
+ON CONFLICT (id) DO UPDATE SET
+    name = COALESCE(excluded.name, books.name),
+    clean_name = COALESCE(excluded.clean_name, books.clean_name),
+    author = CASE WHEN books.has_details = 1 THEN books.author
+                  ELSE COALESCE(excluded.author, books.author) END,
+    year = CASE WHEN books.has_details = 1 THEN books.year
+                ELSE COALESCE(excluded.year, books.year) END
+"""
+
+UPSERT_BOOK_INFO = """
+INSERT INTO books (id, clean_name, author, year, publisher, rating, number_of_ratings, plot,
+                   cover, pages, original_language, isbn, complete, has_details, fetched_at)
+VALUES (:id, :clean_name, :author, :year, :publisher, :rating, :number_of_ratings, :plot,
+        :cover, :pages, :original_language, :isbn, :complete, 1, :fetched_at)
+ON CONFLICT (id) DO UPDATE SET
+    clean_name = COALESCE(excluded.clean_name, books.clean_name),
+    author = COALESCE(excluded.author, books.author),
+    year = COALESCE(excluded.year, books.year),
+    publisher = excluded.publisher,
+    rating = excluded.rating,
+    number_of_ratings = excluded.number_of_ratings,
+    plot = excluded.plot,
+    cover = excluded.cover,
+    pages = excluded.pages,
+    original_language = excluded.original_language,
+    isbn = excluded.isbn,
+    complete = excluded.complete,
+    has_details = 1,
+    fetched_at = excluded.fetched_at
+"""
+
+BOOK_COLUMNS = ("id, name, clean_name, author, year, publisher, rating, number_of_ratings, plot, "
+                "cover, pages, original_language, isbn, complete, has_details, fetched_at")
+
+ORDER_BY = {
+    "id": "books.id",
+    "year": "books.year",
+    "rating": "books.rating",
+    "numberOfRatings": "books.number_of_ratings",
+    "author": "books.author",
+}
+
+
+def parse_book_link(book_link: str) -> Tuple[Optional[str], int]:
+    """
+    Split a book link into its clean name and numeric id.
+
+    Args:
+        book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+
+    Returns:
+        Tuple of the clean name (or None) and the id
+
+    Raises:
+        ValueError: If the link does not end with a numeric id
+    """
+    clean_name, _, book_id = book_link.rpartition("-")
+    if not book_id.isdigit():
+        raise ValueError(f"Book link without numeric id: {book_link!r}")
+    return clean_name or None, int(book_id)
+
+
+class BookStore:
+    """
+    Persistent store of SearchInfo and BookInfo records in SQLite.
+
+    Books are keyed by their databazeknih.cz id. Genres and reviews live in
+    normalized tables. All writes of one call run in a single transaction.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Open (and if needed create) a store.
+
+        Args:
+            path: SQLite database file, or ":memory:" for a temporary store
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode = WAL")
+        self._lock = threading.RLock()
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "BookStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock, self._connection:
+            yield self._connection
+
+    def upsert_search_infos(self, infos: Iterable[SearchInfo]) -> int:
+        """
+        Insert or update search results in one transaction.
+
+        Existing detail fields are kept; name and clean name are refreshed.
+
+        Args:
+            infos: Search results; entries without an id are skipped
+
+        Returns:
+            Number of stored records
+        """
+        rows = [
+            {"id": info.id, "name": info.name, "clean_name": info.cleanName,
+             "author": info.author, "year": info.year}
+            for info in infos if info.id is not None
+        ]
+        with self._transaction() as connection:
+            connection.executemany(UPSERT_SEARCH_INFO, rows)
+        return len(rows)
+
+    def upsert_book_infos(self, items: Iterable[Tuple[str, BookInfo]]) -> int:
+        """
+        Insert or update detailed book information in one transaction.
+
+        Args:
+            items: Pairs of book link (e.g. "harry-potter-12345") and BookInfo
+
+        Returns:
+            Number of stored records
+        """
+        fetched_at = time.time()
+        count = 0
+        with self._transaction() as connection:
+            for book_link, info in items:
+                clean_name, book_id = parse_book_link(book_link)
+                connection.execute(UPSERT_BOOK_INFO, {
+                    "id": book_id,
+                    "clean_name": clean_name,
+                    "author": info.author,
+                    "year": info.year,
+                    "publisher": info.publisher,
+                    "rating": info.rating,
+                    "number_of_ratings": info.numberOfRatings,
+                    "plot": info.plot,
+                    "cover": info.cover,
+                    "pages": info.pages,
+                    "original_language": info.originalLanguage,
+                    "isbn": info.isbn,
+                    "complete": int(info.complete),
+                    "fetched_at": fetched_at,
+                })
+                self._replace_genres(connection, book_id, info.genres or [])
+                self._replace_reviews(connection, book_id, info.reviews or [])
+                count += 1
+        return count
+
+    def upsert_book_info(self, book_link: str, info: BookInfo) -> None:
+        """Insert or update the detailed information of a single book."""
+        self.upsert_book_infos([(book_link, info)])
+
+    def get_book_info(self, book_link: str, max_age: Optional[float] = None) -> Optional[BookInfo]:
+        """
+        Get stored detailed information of a book.
+
+        Args:
+            book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+            max_age: Optional maximum age in seconds of the stored information
+
+        Returns:
+            BookInfo, or None if the book has no (fresh enough) details stored
+        """
+        _, book_id = parse_book_link(book_link)
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {BOOK_COLUMNS} FROM books WHERE id = ? AND has_details = 1", (book_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if max_age is not None and time.time() - row["fetched_at"] > max_age:
+                return None
+            return self._load_book_infos([row])[book_id]
+
+    def get_search_info(self, book_id: int) -> Optional[SearchInfo]:
+        """Get the stored basic information of a book by id."""
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {BOOK_COLUMNS} FROM books WHERE id = ?", (book_id,)
+            ).fetchone()
+        return self._to_search_info(row) if row else None
+
+    def query(self, author: Optional[str] = None, genre: Optional[str] = None,
+              year_from: Optional[int] = None, year_to: Optional[int] = None,
+              min_rating: Optional[float] = None, max_rating: Optional[float] = None,
+              order_by: str = "id", descending: bool = False,
+              limit: Optional[int] = None) -> Dict[int, BookInfo]:
+        """
+        Query books with detailed information.
+
+        All filters are optional and combined with AND; ranges are inclusive.
+
+        Args:
+            author: Exact author name
+            genre: Exact genre name
+            year_from: Minimum publication year
+            year_to: Maximum publication year
+            min_rating: Minimum rating (percentage)
+            max_rating: Maximum rating (percentage)
+            order_by: One of "id", "year", "rating", "numberOfRatings", "author"
+            descending: Sort in descending order
+            limit: Maximum number of books returned
+
+        Returns:
+            Ordered mapping of book id to BookInfo
+        """
+        where, params = self._filters(author, genre, year_from, year_to, min_rating, max_rating)
+        where.append("books.has_details = 1")
+        sql = f"SELECT {BOOK_COLUMNS} FROM books WHERE {' AND '.join(where)}"
+        sql += f" ORDER BY {self._order_by(order_by)} {'DESC' if descending else 'ASC'}, books.id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+            return self._load_book_infos(rows)
+
+    def query_search_infos(self, author: Optional[str] = None, year_from: Optional[int] = None,
+                           year_to: Optional[int] = None, order_by: str = "id",
+                           descending: bool = False, limit: Optional[int] = None) -> List[SearchInfo]:
+        """
+        Query the basic information of all stored books, with or without details.
+
+        Args:
+            author: Exact author name
+            year_from: Minimum publication year
+            year_to: Maximum publication year
+            order_by: One of "id", "year", "rating", "numberOfRatings", "author"
+            descending: Sort in descending order
+            limit: Maximum number of books returned
+
+        Returns:
+            List of SearchInfo objects
+        """
+        where, params = self._filters(author, None, year_from, year_to, None, None)
+        sql = f"SELECT {BOOK_COLUMNS} FROM books WHERE {' AND '.join(where) or '1'}"
+        sql += f" ORDER BY {self._order_by(order_by)} {'DESC' if descending else 'ASC'}, books.id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+        return [self._to_search_info(row) for row in rows]
+
+    def genre_counts(self) -> Dict[str, int]:
+        """Get the number of stored books per genre, most common first."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT genres.name, COUNT(*) FROM book_genres "
+                "JOIN genres ON genres.id = book_genres.genre_id "
+                "GROUP BY genres.name ORDER BY COUNT(*) DESC, genres.name"
+            ).fetchall()
+        return {name: count for name, count in rows}
+
+    @staticmethod
+    def _filters(author, genre, year_from, year_to, min_rating, max_rating) -> Tuple[List[str], list]:
+        where, params = [], []
+        if author is not None:
+            where.append("books.author = ?")
+            params.append(author)
+        if genre is not None:
+            where.append("books.id IN (SELECT book_genres.book_id FROM book_genres "
+                         "JOIN genres ON genres.id = book_genres.genre_id WHERE genres.name = ?)")
+            params.append(genre)
+        if year_from is not None:
+            where.append("books.year >= ?")
+            params.append(year_from)
+        if year_to is not None:
+            where.append("books.year <= ?")
+            params.append(year_to)
+        if min_rating is not None:
+            where.append("books.rating >= ?")
+            params.append(min_rating)
+        if max_rating is not None:
+            where.append("books.rating <= ?")
+            params.append(max_rating)
+        return where, params
+
+    @staticmethod
+    def _order_by(order_by: str) -> str:
+        if order_by not in ORDER_BY:
+            raise ValueError(f"Cannot order by {order_by!r}, expected one of {sorted(ORDER_BY)}")
+        return ORDER_BY[order_by]
+
+    @staticmethod
+    def _replace_genres(connection: sqlite3.Connection, book_id: int, genres: List[str]) -> None:
+        connection.execute("DELETE FROM book_genres WHERE book_id = ?", (book_id,))
+        for position, genre in enumerate(dict.fromkeys(genres)):
+            connection.execute("INSERT OR IGNORE INTO genres (name) VALUES (?)", (genre,))
+            connection.execute(
+                "INSERT INTO book_genres (book_id, genre_id, position) "
+                "SELECT ?, id, ? FROM genres WHERE name = ?",
+                (book_id, position, genre),
+            )
+
+    @staticmethod
+    def _replace_reviews(connection: sqlite3.Connection, book_id: int, reviews: List[Review]) -> None:
+        connection.execute("DELETE FROM reviews WHERE book_id = ?", (book_id,))
+        connection.executemany(
+            "INSERT INTO reviews (book_id, position, text, rating, username, date) VALUES (?, ?, ?, ?, ?, ?)",
+            [(book_id, position, review.text, review.rating, review.username, review.date)
+             for position, review in enumerate(reviews)],
+        )
+
+    def _load_book_infos(self, rows: List[sqlite3.Row]) -> Dict[int, BookInfo]:
+        """Build BookInfo objects for rows, loading their genres and reviews in bulk."""
+        ids = [row["id"] for row in rows]
+        genres: Dict[int, List[str]] = {}
+        reviews: Dict[int, List[Review]] = {}
+
+        # Stay well below SQLite's limit on the number of bound parameters
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            for book_id, name in self._connection.execute(
+                f"SELECT book_genres.book_id, genres.name FROM book_genres "
+                f"JOIN genres ON genres.id = book_genres.genre_id "
+                f"WHERE book_genres.book_id IN ({placeholders}) "
+                f"ORDER BY book_genres.book_id, book_genres.position", chunk
+            ):
+                genres.setdefault(book_id, []).append(name)
+            for row in self._connection.execute(
+                f"SELECT book_id, text, rating, username, date FROM reviews "
+                f"WHERE book_id IN ({placeholders}) ORDER BY book_id, position", chunk
+            ):
+                reviews.setdefault(row["book_id"], []).append(
+                    Review(text=row["text"], rating=row["rating"], username=row["username"], date=row["date"])
+                )
+
+        # Same shape as a freshly scraped BookInfo: genres None when the page
+        # lists none, reviews always a list
+        return {
+            row["id"]: BookInfo(
+                plot=row["plot"],
+                genres=genres.get(row["id"]),
+                year=row["year"],
+                author=row["author"],
+                publisher=row["publisher"],
+                rating=row["rating"],
+                numberOfRatings=row["number_of_ratings"],
+                reviews=reviews.get(row["id"], []),
+                cover=row["cover"],
+                pages=row["pages"],
+                originalLanguage=row["original_language"],
+                isbn=row["isbn"],
+                complete=bool(row["complete"]),
+            )
+            for row in rows
+        }
+
+    @staticmethod
+    def _to_search_info(row: sqlite3.Row) -> SearchInfo:
+        return SearchInfo(
+            name=row["name"],
+            cleanName=row["clean_name"],
+            id=row["id"],
+            year=row["year"],
+            author=row["author"],
+        )
+
+
+class CachingBookService:
+    """
+    Read-through cache of a BookService backed by a BookStore.
+
+    ``get_book_info`` answers from the store when possible and otherwise asks
+    the wrapped service, storing what it returns. Other attributes are
+    forwarded to the wrapped service, so it can be passed to ``DBKnih``.
+    """
+
+    def __init__(self, book_service, store: BookStore, max_age: Optional[float] = None):
+        """
+        Initialize the caching service.
+
+        Args:
+            book_service: The BookService used on cache misses
+            store: The store used as cache
+            max_age: Optional maximum age in seconds of cached information
+        """
+        self.book_service = book_service
+        self.store = store
+        self.max_age = max_age
+
+    def __getattr__(self, name: str):
+        return getattr(self.book_service, name)
+
+    def get_book_info(self, book_link: str, deadline: Optional[Deadline] = None) -> Optional[BookInfo]:
+        """
+        Get detailed book information, from the store if available.
+
+        Args:
+            book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+            deadline: Optional seconds or CancellationToken bounding the wrapped
+                service's call on a cache miss
+
+        Returns:
+            BookInfo object with extracted data, or None if extraction fails
+
+        Raises:
+            DeadlineExceededError: If the deadline passes or the token is cancelled
+        """
+        try:
+            cached = self.store.get_book_info(book_link, max_age=self.max_age)
+        except ValueError:
+            # Links without a numeric id cannot be stored
+            return self.book_service.get_book_info(book_link, deadline=deadline)
+        if cached is not None:
+            return cached
+
+        info = self.book_service.get_book_info(book_link, deadline=deadline)
+        # Partial results are returned but not cached
+        if info is not None and info.complete:
+            self.store.upsert_book_info(book_link, info)
+        return info
@@ -0,0 +1,425 @@
+"""
+Local stub of databazeknih.cz for load tests, emulating latency and errors.
+
+The server answers the URLs built by ``Fetcher`` (search, overview, more-info
+and review pages) with synthetic pages of a generated catalog, or with recorded
+pages of the real site. Pages carry an ETag and conditional requests get a 304.
+A session from ``StubServer.session()`` sends the requests for databazeknih.cz
+to the stub, so the library runs unchanged:
+
+    with StubServer(StubConfig(latency=lognormal(0.05, 0.5), throttle_rate=0.02)) as server:
+        fetcher = Fetcher(session=server.session())
+        BookService(fetcher).get_book_info(server.book_link(1))
+"""
+import hashlib
+import html
+import math
+import os
+import random
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SITE_URL = "https://www.databazeknih.cz"
+
+SEARCH_PAGE = "search"
+BOOK_PAGE = "book"
+MORE_INFO_PAGE = "more_info"
+REVIEWS_PAGE = "reviews"
+
+LatencyDistribution = Callable[[random.Random], float]
+
+
+def constant(seconds: float) -> LatencyDistribution:
+    """Latency of always the same number of seconds."""
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> LatencyDistribution:
+    """Latency spread evenly between ``low`` and ``high`` seconds."""
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median: float, p99: float) -> LatencyDistribution:
+    """
+    Long-tailed latency, as observed on real sites.
+
+    Args:
+        median: Median latency in seconds
+        p99: 99th percentile latency in seconds (at least the median)
+    """
+    if median <= 0 or p99 < median:
+        raise ValueError("median must be positive and p99 at least the median")
+    # The 99th percentile of a lognormal distribution is 2.326 sigmas above the median
+    sigma = math.log(p99 / median) / 2.326
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+
+@dataclass(frozen=True)
+class StubConfig:
+    """
+    Behaviour of the stub server, for all pages or a single page kind.
+
+    Each request first waits for a latency drawn from ``latency``. It is then
+    answered with a 429 (with a Retry-After header) with probability
+    ``throttle_rate``, with a 503 with probability ``error_rate``, and
+    otherwise with the page. With probability ``slow_body_rate`` the page body
+    is sent in small chunks spread over ``slow_body_duration`` seconds.
+    """
+    latency: LatencyDistribution = constant(0.0)
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    slow_body_rate: float = 0.0
+    slow_body_duration: float = 0.5
+    slow_body_chunks: int = 10
+
+
+class StubServer:
+    """Threaded HTTP server serving databazeknih.cz pages on localhost."""
+
+    def __init__(self, config: Optional[StubConfig] = None,
+                 page_configs: Optional[Mapping[str, StubConfig]] = None,
+                 recorded: Optional[Mapping[str, str]] = None,
+                 books: int = 1000, results_per_search: int = 10, review_pages: int = 3,
+                 capacity: Optional[int] = None, seed: Optional[int] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the server; it starts serving on ``start`` or when entered.
+
+        Args:
+            config: Behaviour of all pages
+            page_configs: Optional behaviour per page kind (SEARCH_PAGE, BOOK_PAGE,
+                MORE_INFO_PAGE, REVIEWS_PAGE) replacing ``config`` for that kind
+            recorded: Optional pages served instead of synthetic ones, keyed by
+                path and query (e.g. "/search?q=harry%20potter"), see ``load_recorded``
+            books: Number of books in the synthetic catalog; ids above it are 404
+            results_per_search: Number of results of every synthetic search
+            review_pages: Number of synthetic review pages per book
+            capacity: Optional number of requests served at the same time; requests
+                beyond it are answered with 429 at once, like an overloaded site
+            seed: Optional seed making latencies and faults reproducible
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free port
+        """
+        self.config = config or StubConfig()
+        self.page_configs = dict(page_configs or {})
+        self.recorded = dict(recorded or {})
+        self.books = books
+        self.results_per_search = results_per_search
+        self.review_pages = review_pages
+        self.capacity = capacity
+        self._in_progress = 0
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._statuses: Counter = Counter()
+        self._httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self._httpd.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server, e.g. "http://127.0.0.1:54321"."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubServer":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Serve requests in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05},
+                                            name="db-knih-stub", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and close the listening socket."""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def session(self, pool_size: int = 64) -> requests.Session:
+        """
+        Create a session sending requests for databazeknih.cz to this server.
+
+        Args:
+            pool_size: Connections kept open to the server; at least the load concurrency
+
+        Returns:
+            requests.Session to pass to ``Fetcher(session=...)``
+        """
+        session = requests.Session()
+        session.mount(SITE_URL + "/", _RedirectAdapter(SITE_URL, self.url, pool_size))
+        return session
+
+    def book_link(self, book_id: int) -> str:
+        """Get the link of a synthetic book (e.g. "kniha-12-12")."""
+        return f"kniha-{book_id}-{book_id}"
+
+    def stats(self) -> Dict[int, int]:
+        """Number of responses sent per HTTP status."""
+        with self._rng_lock:
+            return dict(self._statuses)
+
+    def _config_for(self, kind: Optional[str]) -> StubConfig:
+        return self.page_configs.get(kind, self.config)
+
+    def _draw(self, config: StubConfig) -> Tuple[float, Optional[int], bool]:
+        """Draw the latency, the injected error status (if any) and whether the body is slow."""
+        with self._rng_lock:
+            latency = max(0.0, config.latency(self._rng))
+            fault = self._rng.random()
+            slow = self._rng.random() < config.slow_body_rate
+        if fault < config.throttle_rate:
+            return latency, 429, False
+        if fault < config.throttle_rate + config.error_rate:
+            return latency, 503, False
+        return latency, None, slow
+
+    def _record(self, status: int) -> None:
+        with self._rng_lock:
+            self._statuses[status] += 1
+
+    def _enter(self) -> bool:
+        """Start serving a request, unless the server is at capacity."""
+        with self._rng_lock:
+            if self.capacity is not None and self._in_progress >= self.capacity:
+                return False
+            self._in_progress += 1
+            return True
+
+    def _exit(self) -> None:
+        with self._rng_lock:
+            self._in_progress -= 1
+
+    def render(self, target: str) -> Tuple[Optional[str], int, Optional[str]]:
+        """
+        Render the page for a request target.
+
+        Args:
+            target: Path and query of the request
+
+        Returns:
+            Tuple of the page kind (None if unknown), the HTTP status and the
+            HTML body (None for errors)
+        """
+        parsed = urllib.parse.urlsplit(target)
+        parts = [urllib.parse.unquote(part) for part in parsed.path.split("/") if part]
+        query = urllib.parse.parse_qs(parsed.query)
+        kind = None
+        if parts == ["search"]:
+            kind = SEARCH_PAGE
+        elif len(parts) == 2:
+            kind = {"prehled-knihy": BOOK_PAGE, "book-detail-more-info": MORE_INFO_PAGE,
+                    "komentare-knihy": REVIEWS_PAGE}.get(parts[0])
+
+        if target in self.recorded:
+            return kind, 200, self.recorded[target]
+        if kind == SEARCH_PAGE:
+            return kind, 200, self._search_page(query.get("q", [""])[0])
+
+        book_id = _book_id(parts[-1]) if kind is not None else None
+        if book_id is None or not 1 <= book_id <= self.books:
+            return kind, 404, None
+        if kind == BOOK_PAGE:
+            return kind, 200, _book_page(book_id)
+        if kind == MORE_INFO_PAGE:
+            return kind, 200, _more_info_page(book_id)
+        page = _book_id(query.get("str", ["1"])[0]) or 1
+        return kind, 200, _reviews_page(book_id, page if page <= self.review_pages else None)
+
+    def _search_page(self, text: str) -> str:
+        rng = random.Random(text)
+        count = min(self.results_per_search, self.books)
+        results = "".join(
+            f'<p class="new"><a class="new" href="/prehled-knihy/{self.book_link(book_id)}">'
+            f'Kniha {book_id}</a> <span class="pozn">{_year(book_id)}, Autor {book_id % 97} (p)</span></p>'
+            for book_id in sorted(rng.sample(range(1, self.books + 1), count))
+        )
+        return f"<html><body><h1>Hledání: {html.escape(text)}</h1>{results}</body></html>"
+
+
+def _book_id(text: str) -> Optional[int]:
+    """Get the trailing number of a link or page number."""
+    try:
+        return int(text.rsplit("-", 1)[-1])
+    except ValueError:
+        return None
+
+
+def _year(book_id: int) -> int:
+    return 1950 + book_id % 75
+
+
+def _book_page(book_id: int) -> str:
+    reviews = "".join(_review(book_id, index) for index in range(3))
+    return (
+        '<html><body><div id="faux"><div id="content">'
+        f'<h1 itemprop="name">Kniha {book_id}</h1>'
+        f'<img class="kniha_img" src="{SITE_URL}/img/books/{book_id}.jpg">'
+        f'<span itemprop="author">Autor {book_id % 97}</span>'
+        f'<span itemprop="genre">Žánr {book_id % 7}</span><span itemprop="genre">Román</span>'
+        f'<span itemprop="datePublished">{_year(book_id)}</span>'
+        f'<span itemprop="publisher">Nakladatelství {book_id % 13}</span>'
+        f'<p class="justify new2 odtop">Syntetický děj knihy {book_id}. ' + "Lorem ipsum. " * 40 + '</p>'
+        f'<span class="bpoints">{50 + book_id % 50}%</span>'
+        f'<div id="voixis"><span class="ratingDetail">{book_id * 7} hodnocení</span></div>'
+        f'{reviews}</div></div></body></html>'
+    )
+
+
+def _more_info_page(book_id: int) -> str:
+    return (
+        '<html><body><div class="more-info">'
+        f'<span itemprop="numberOfPages">{100 + book_id % 400}</span>'
+        f'<span itemprop="language">český</span>'
+        f'<span itemprop="isbn">978-80-{book_id:07d}</span>'
+        '</div></body></html>'
+    )
+
+
+def _reviews_page(book_id: int, page: Optional[int]) -> str:
+    reviews = "".join(_review(book_id, page * 10 + index) for index in range(10)) if page else ""
+    return f"<html><body>{reviews}</body></html>"
+
+
+def _review(book_id: int, index: int) -> str:
+    return (
+        f'<div class="komentars_user"><img title="Čtenář {index}">'
+        f'<div class="komholdu"><p>Recenze {index} knihy {book_id}.</p></div>'
+        f'<div class="fright clear_comm"><img title="{1 + (book_id + index) % 5} hvězd">'
+        f'<div class="pozn_light odleft_pet">1.1.2024</div></div></div>'
+    )
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed ACKs add 40ms
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        stub: StubServer = self.server.stub
+        kind, status, body = stub.render(self.path)
+        config = stub._config_for(kind)
+        if not stub._enter():
+            self._respond(stub, config, 429, None, slow=False)
+            return
+        try:
+            latency, fault, slow = stub._draw(config)
+            if latency:
+                time.sleep(latency)
+            if fault is not None and kind is not None:
+                status, body, slow = fault, None, False
+            self._respond(stub, config, status, body, slow)
+        finally:
+            stub._exit()
+
+    def _respond(self, stub: StubServer, config: StubConfig, status: int, body: Optional[str], slow: bool) -> None:
+        payload = (body if body is not None else f"HTTP {status}").encode("utf-8")
+        etag = f'"{hashlib.sha1(payload).hexdigest()[:16]}"' if status == 200 else None
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            # Record before the headers are flushed so the client never sees an unrecorded response
+            stub._record(304)
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if status == 429:
+            self.send_header("Retry-After", str(config.retry_after))
+        stub._record(status)
+        self.end_headers()
+
+        if not slow:
+            self.wfile.write(payload)
+            return
+        chunks = max(1, config.slow_body_chunks)
+        size = math.ceil(len(payload) / chunks)
+        for start in range(0, len(payload), size):
+            self.wfile.write(payload[start:start + size])
+            self.wfile.flush()
+            time.sleep(config.slow_body_duration / chunks)
+
+    def log_message(self, format: str, *args) -> None:
+        # Load tests make thousands of requests; keep stderr quiet
+        pass
+
+
+class _RedirectAdapter(HTTPAdapter):
+    """Transport adapter rewriting the site URL of every request to the stub server."""
+
+    def __init__(self, site_url: str, target_url: str, pool_size: int):
+        super().__init__(pool_connections=1, pool_maxsize=pool_size)
+        self.site_url = site_url
+        self.target_url = target_url
+
+    def send(self, request, **kwargs):
+        request.url = self.target_url + request.url[len(self.site_url):]
+        return super().send(request, **kwargs)
+
+
+def record_pages(urls: Iterable[str], directory: str, fetcher=None) -> int:
+    """
+    Download pages of the real site for ``load_recorded``.
+
+    Args:
+        urls: Page URLs, e.g. from ``Fetcher.create_search_url``
+        directory: Directory the pages are written to
+        fetcher: Optional Fetcher to download with (e.g. with a rate limiter)
+
+    Returns:
+        Number of pages written
+    """
+    if fetcher is None:
+        from .fetcher import Fetcher
+        fetcher = Fetcher()
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for url in urls:
+        parsed = urllib.parse.urlsplit(url)
+        target = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        path = os.path.join(directory, urllib.parse.quote(target, safe="") + ".html")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(fetcher.fetch(url))
+        written += 1
+    return written
+
+
+def load_recorded(directory: str) -> Dict[str, str]:
+    """
+    Load pages written by ``record_pages`` for ``StubServer(recorded=...)``.
+
+    Args:
+        directory: Directory with one ``.html`` file per page, named after its
+            URL-quoted path and query
+
+    Returns:
+        Mapping of path and query to page content
+    """
+    pages = {}
+    for name in os.listdir(directory):
+        if name.endswith(".html"):
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as fh:
+                pages[urllib.parse.unquote(name[:-len(".html")])] = fh.read()
+    return pages
+
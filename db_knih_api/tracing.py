@@ -0,0 +1,267 @@
+"""
+Opt-in per-call tracing with a timing breakdown of fetch and parse phases.
+
+Tracing is off unless a call runs inside ``Tracer.trace``; ``span`` is then a
+cheap no-op. Span names used by the library:
+
+- ``fetch``: a whole ``Fetcher.fetch`` call, including queueing and hedges
+- ``fetch.queue``: waiting for the rate limiter, the request scheduler or the
+  concurrency limiter
+- ``fetch.ttfb``: sending the request until the response headers arrived. requests
+  does not expose DNS, connect and TLS timings, so they are included here
+- ``fetch.download``: reading the response body
+- ``parse.soup``: building the BeautifulSoup tree of a page
+- ``_get_*`` and ``_parse_*``: the individual extractors of the services
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """A timed phase of a traced call; ``start`` is relative to the start of the trace."""
+    name: str
+    start: float
+    duration: float
+    thread: str
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    """Timing record of one traced call."""
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        """
+        Initialize the trace.
+
+        Args:
+            name: Name of the traced call (e.g. "get_book_info")
+            attributes: Attributes of the call (e.g. the book link)
+            clock: Monotonic clock, replaceable for testing
+        """
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self.spans: List[Span] = []
+        self._clock = clock
+        self._origin = clock()
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, end: float, attributes: Dict[str, Any]) -> None:
+        """Record a finished span given its start and end on the trace clock."""
+        span = Span(name, start - self._origin, end - start, threading.current_thread().name, attributes)
+        with self._lock:
+            self.spans.append(span)
+
+    def totals(self) -> Dict[str, float]:
+        """Total duration per span name, slowest first."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the trace into JSON-compatible values."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        return {
+            "name": self.name,
+            "attributes": self.attributes,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "error": self.error,
+            "spans": [asdict(span) for span in spans],
+        }
+
+    def to_json(self) -> str:
+        """Serialize the trace as a single JSON line."""
+        return json.dumps(self.to_dict(), ensure_ascii=False, default=str)
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("db_knih_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """Get the trace of the enclosing ``Tracer.trace`` block, if any."""
+    return _current.get()
+
+
+class _SpanContext:
+    """Times a block and adds it to a trace."""
+    __slots__ = ("trace", "name", "attributes", "start")
+
+    def __init__(self, trace: Trace, name: str, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Dict[str, Any]:
+        self.start = self.trace._clock()
+        return self.attributes
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.trace.add_span(self.name, self.start, self.trace._clock(), self.attributes)
+
+
+class _NullSpan:
+    """Span used while tracing is off."""
+    __slots__ = ()
+
+    def __enter__(self) -> Dict[str, Any]:
+        return {}
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **attributes):
+    """
+    Time a block as a span of the current trace; a no-op outside of a trace.
+
+    The context manager yields the span's attribute dict, so the block can add
+    attributes discovered while it runs (e.g. the HTTP status).
+
+    Args:
+        name: Name of the phase
+        **attributes: Initial attributes of the span
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _SpanContext(trace, name, attributes)
+
+
+TraceSink = Callable[[Trace], None]
+
+
+class Tracer:
+    """Starts traces and hands every finished one to the configured sinks."""
+
+    def __init__(self, sinks: Iterable[TraceSink] = ()):
+        """
+        Initialize the tracer.
+
+        Args:
+            sinks: Callables receiving each finished Trace (e.g. JSONLogSink, SlowestTraces)
+        """
+        self.sinks = list(sinks)
+
+    @contextlib.contextmanager
+    def trace(self, name: str, **attributes) -> Iterator[Trace]:
+        """
+        Trace the calls made in a block.
+
+        Inside an already traced block, the block becomes a span of the outer
+        trace instead, so e.g. ``search_many`` yields one trace with the spans
+        of all its searches.
+
+        Args:
+            name: Name of the traced call
+            **attributes: Attributes of the call
+
+        Returns:
+            Context manager yielding the Trace
+        """
+        outer = _current.get()
+        if outer is not None:
+            with span(name, **attributes):
+                yield outer
+            return
+
+        trace = Trace(name, attributes)
+        token = _current.set(trace)
+        try:
+            yield trace
+        except BaseException as e:
+            trace.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            trace.duration = trace._clock() - trace._origin
+            for sink in self.sinks:
+                sink(trace)
+
+
+class JSONLogSink:
+    """Writes every trace as one JSON line to a stream or the ``db_knih_api.tracing`` logger."""
+
+    def __init__(self, stream: Optional[TextIO] = None, level: int = logging.INFO):
+        """
+        Initialize the sink.
+
+        Args:
+            stream: Optional stream to write to instead of the logger
+            level: Log level used with the logger
+        """
+        self.stream = stream
+        self.level = level
+        self._lock = threading.Lock()
+
+    def __call__(self, trace: Trace) -> None:
+        line = trace.to_json()
+        if self.stream is None:
+            logger.log(self.level, line)
+            return
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+class SlowestTraces:
+    """Keeps the slowest N traces in memory."""
+
+    def __init__(self, size: int = 20):
+        """
+        Initialize the buffer.
+
+        Args:
+            size: Number of traces kept
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+
+        self.size = size
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __call__(self, trace: Trace) -> None:
+        entry = (trace.duration or 0.0, next(self._sequence), trace)
+        with self._lock:
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, entry)
+            elif entry[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, entry)
+
+    def traces(self) -> List[Trace]:
+        """Get the kept traces, slowest first."""
+        with self._lock:
+            entries = sorted(self._heap, reverse=True)
+        return [trace for _, _, trace in entries]
+
+    def clear(self) -> None:
+        """Drop all kept traces."""
+        with self._lock:
+            self._heap.clear()
@@ -0,0 +1,360 @@
+"""
+Watchlist polling books at intervals adapted to how often each of them changes.
+"""
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .exceptions import FetchError, NotFoundError
+from .models import BookChange, BookInfo
+from .rate_limiter import RateLimiter
+from .refresh import book_info_from_dict, diff_book_info
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATCHED_FIELDS = ("rating", "numberOfRatings")
+
+ChangeListener = Callable[[BookChange], None]
+
+
+@dataclass
+class WatchEntry:
+    """Polling state of one watched book; times are Unix timestamps."""
+    book_link: str
+    interval: float
+    next_poll: float
+    last_polled: Optional[float] = None
+    last_changed: Optional[float] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fingerprint: Optional[str] = None
+    values: Optional[BookInfo] = None
+    polls: int = 0
+    changes: int = 0
+    errors: int = 0
+    deferred: bool = False
+
+
+@dataclass
+class WatchlistStats:
+    """Counters of a watchlist; ``deferred`` counts due polls postponed by the budget, once each."""
+    books: int
+    due: int
+    polls: int
+    unchanged: int
+    changes: int
+    errors: int
+    deferred: int
+
+
+class Watchlist:
+    """
+    Polls the overview pages of watched books within a requests-per-hour budget.
+
+    Each book has its own refresh interval. A poll that finds a change in the
+    watched fields multiplies it by ``speedup``, and a poll that finds none
+    multiplies it by ``slowdown``, so popular books are polled often and
+    dormant ones rarely. Polls are conditional requests, and unchanged pages
+    are not parsed again. The first poll of a book only records its values;
+    later changes are handed to the listeners as BookChange events.
+    """
+
+    def __init__(self, book_service, requests_per_hour: float = 3600.0,
+                 initial_interval: float = 86400.0, min_interval: float = 900.0,
+                 max_interval: float = 30 * 86400.0, speedup: float = 0.5, slowdown: float = 1.5,
+                 watched_fields: Iterable[str] = DEFAULT_WATCHED_FIELDS, jitter: float = 0.1,
+                 max_workers: int = 1, clock: Callable[[], float] = time.time,
+                 seed: Optional[int] = None):
+        """
+        Initialize the watchlist.
+
+        Args:
+            book_service: BookService used to poll the overview pages
+            requests_per_hour: Budget of poll requests per hour
+            initial_interval: Seconds between polls of a newly added book
+            min_interval: Shortest interval of a frequently changing book
+            max_interval: Longest interval of a dormant book
+            speedup: Factor (0-1) applied to the interval after a change
+            slowdown: Factor (> 1) applied to the interval after a poll without change
+            watched_fields: BookInfo fields compared between polls ("reviews" for new reviews)
+            jitter: Random spread of the intervals, so books added together drift apart
+            max_workers: Number of polls made at the same time
+            clock: Wall clock, replaceable for testing
+            seed: Optional seed of the jitter
+        """
+        known = {book_field.name for book_field in fields(BookInfo)}
+        watched_fields = tuple(watched_fields)
+        if not set(watched_fields) <= known:
+            raise ValueError(f"Unknown BookInfo fields: {sorted(set(watched_fields) - known)}")
+        if not 0 < min_interval <= initial_interval <= max_interval:
+            raise ValueError("intervals must satisfy 0 < min_interval <= initial_interval <= max_interval")
+        if not 0 < speedup < 1 < slowdown:
+            raise ValueError("speedup must be between 0 and 1 and slowdown greater than 1")
+
+        self.book_service = book_service
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.speedup = speedup
+        self.slowdown = slowdown
+        self.watched_fields = watched_fields
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self.budget = RateLimiter(requests_per_hour / 3600.0, burst=max(1, int(requests_per_hour / 60)),
+                                  clock=clock)
+        self._clock = clock
+        self._rng = random.Random(seed)
+        self._entries: Dict[str, WatchEntry] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._scheduled: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._listeners: List[ChangeListener] = []
+        self._counters = dict(polls=0, unchanged=0, changes=0, errors=0, deferred=0)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, book_link: str) -> bool:
+        return book_link in self._entries
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """
+        Register a callback for change events.
+
+        Args:
+            listener: Called with a BookChange listing the changed watched fields
+        """
+        self._listeners.append(listener)
+
+    def add(self, book_link: str, interval: Optional[float] = None) -> WatchEntry:
+        """
+        Watch a book; it is due for its first poll right away.
+
+        Args:
+            book_link: The book identifier (e.g., "harry-potter-a-kamen-mudrcu-12345")
+            interval: Optional starting interval instead of ``initial_interval``
+
+        Returns:
+            The book's entry (the existing one if it was already watched)
+        """
+        with self._lock:
+            entry = self._entries.get(book_link)
+            if entry is None:
+                entry = WatchEntry(book_link, interval or self.initial_interval, next_poll=self._clock())
+                self._entries[book_link] = entry
+                self._schedule(entry)
+            return entry
+
+    def remove(self, book_link: str) -> None:
+        """Stop watching a book."""
+        with self._lock:
+            self._entries.pop(book_link, None)
+            self._scheduled.pop(book_link, None)
+
+    def entry(self, book_link: str) -> Optional[WatchEntry]:
+        """Get the polling state of a watched book."""
+        with self._lock:
+            return self._entries.get(book_link)
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Seconds until the next book is due (0 if one is due), or None if nothing is watched."""
+        with self._lock:
+            self._drop_stale()
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - self._clock())
+
+    def poll_due(self) -> List[BookChange]:
+        """
+        Poll the books that are due, most overdue first, as far as the budget allows.
+
+        Returns:
+            The change events found, which were also handed to the listeners
+        """
+        batch = []
+        with self._lock:
+            now = self._clock()
+            while True:
+                self._drop_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                if not self.budget.try_acquire():
+                    for entry in self._entries.values():
+                        if entry.next_poll <= now and entry.book_link in self._scheduled and not entry.deferred:
+                            entry.deferred = True
+                            self._counters["deferred"] += 1
+                    break
+                _, _, book_link = heapq.heappop(self._heap)
+                del self._scheduled[book_link]
+                batch.append(self._entries[book_link])
+
+        if self.max_workers > 1 and len(batch) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                changes = list(executor.map(lambda entry: contextvars.copy_context().run(self._poll, entry), batch))
+        else:
+            changes = [self._poll(entry) for entry in batch]
+        return [change for change in changes if change is not None]
+
+    def poll(self, book_link: str) -> Optional[BookChange]:
+        """
+        Poll a watched book now, regardless of its schedule and the budget.
+
+        Args:
+            book_link: The book identifier
+
+        Returns:
+            The change event, or None if nothing watched changed
+
+        Raises:
+            KeyError: If the book is not watched
+        """
+        with self._lock:
+            entry = self._entries[book_link]
+            self._scheduled.pop(book_link, None)
+        return self._poll(entry)
+
+    def run(self, stop: threading.Event, max_idle: float = 60.0) -> None:
+        """
+        Poll due books until ``stop`` is set, sleeping while nothing is due.
+
+        Args:
+            stop: Event ending the loop
+            max_idle: Longest sleep between checks for due books (e.g. newly added ones)
+        """
+        while not stop.is_set():
+            self.poll_due()
+            wait = self.seconds_until_due()
+            if wait == 0:
+                # Books are due but the budget is spent
+                wait = self.budget.time_until_available()
+            stop.wait(min(max_idle, wait if wait is not None else max_idle))
+
+    def stats(self) -> WatchlistStats:
+        """Get a snapshot of the watchlist counters."""
+        with self._lock:
+            now = self._clock()
+            due = sum(1 for entry in self._entries.values() if entry.next_poll <= now)
+            return WatchlistStats(books=len(self._entries), due=due, **self._counters)
+
+    def save(self, path: str) -> None:
+        """Save the watched books and their polling state to a JSON file."""
+        with self._lock:
+            data = [dict(asdict(entry), values=asdict(entry.values) if entry.values else None)
+                    for entry in self._entries.values()]
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"entries": data}, fh, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, book_service, **kwargs) -> "Watchlist":
+        """
+        Load a watchlist previously written by ``save``.
+
+        Args:
+            path: JSON file written by ``save``
+            book_service: BookService used to poll the overview pages
+            **kwargs: Other arguments of ``Watchlist``
+
+        Returns:
+            Watchlist continuing the saved schedule
+        """
+        watchlist = cls(book_service, **kwargs)
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        for item in data.get("entries", []):
+            values = item.pop("values", None)
+            entry = WatchEntry(**item, values=book_info_from_dict(values) if values else None)
+            watchlist._entries[entry.book_link] = entry
+            watchlist._schedule(entry)
+        return watchlist
+
+    def _poll(self, entry: WatchEntry) -> Optional[BookChange]:
+        """Poll one book, adapt its interval and schedule its next poll."""
+        try:
+            overview = self.book_service.poll_book_overview(
+                entry.book_link, entry.etag, entry.last_modified, entry.fingerprint
+            )
+        except NotFoundError:
+            return self._finish(entry, error=True, interval=self.max_interval)
+        except FetchError:
+            return self._finish(entry, error=True, interval=entry.interval)
+        except Exception:
+            # E.g. a parser bug; the book must stay scheduled and the batch keep going
+            logger.exception("Unexpected error polling %s", entry.book_link)
+            return self._finish(entry, error=True, interval=entry.interval)
+
+        if overview.unchanged:
+            entry.etag, entry.last_modified = overview.etag, overview.last_modified
+            return self._finish(entry, unchanged=True)
+        if overview.info is None:
+            # Unparseable page; keep the old validators so the next poll parses it again
+            return self._finish(entry, error=True, interval=min(self.max_interval, entry.interval * self.slowdown))
+        entry.etag, entry.last_modified = overview.etag, overview.last_modified
+        entry.fingerprint = overview.fingerprint
+
+        values = self._watched_values(overview.info)
+        previous, entry.values = entry.values, values
+        if previous is None:
+            return self._finish(entry, unchanged=True)
+
+        diff = diff_book_info(entry.book_link, previous, values)
+        if diff is None:
+            return self._finish(entry, unchanged=True)
+        change = BookChange(book_link=entry.book_link, info=overview.info,
+                            changes=diff.changes, new_reviews=diff.new_reviews)
+        return self._finish(entry, change=change)
+
+    def _finish(self, entry: WatchEntry, change: Optional[BookChange] = None, unchanged: bool = False,
+                error: bool = False, interval: Optional[float] = None) -> Optional[BookChange]:
+        """Record a poll's outcome and schedule the next one."""
+        if interval is None:
+            factor = self.speedup if change is not None else self.slowdown
+            interval = min(self.max_interval, max(self.min_interval, entry.interval * factor))
+
+        with self._lock:
+            now = self._clock()
+            entry.polls += 1
+            entry.deferred = False
+            entry.last_polled = now
+            entry.interval = interval
+            entry.next_poll = now + interval * (1 + self._rng.uniform(-self.jitter, self.jitter))
+            self._counters["polls"] += 1
+            if error:
+                entry.errors += 1
+                self._counters["errors"] += 1
+            elif unchanged:
+                self._counters["unchanged"] += 1
+            else:
+                entry.changes += 1
+                entry.last_changed = now
+                self._counters["changes"] += 1
+            if entry.book_link in self._entries:
+                self._schedule(entry)
+
+        if change is not None:
+            for listener in self._listeners:
+                listener(change)
+        return change
+
+    def _watched_values(self, info: BookInfo) -> BookInfo:
+        """Keep only the watched fields of a BookInfo."""
+        return BookInfo(complete=False, **{name: getattr(info, name) for name in self.watched_fields
+                                           if name != "complete"})
+
+    def _schedule(self, entry: WatchEntry) -> None:
+        sequence = next(self._sequence)
+        self._scheduled[entry.book_link] = sequence
+        heapq.heappush(self._heap, (entry.next_poll, sequence, entry.book_link))
+
+    def _drop_stale(self) -> None:
+        """Pop heap items of removed or rescheduled books."""
+        while self._heap and self._scheduled.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
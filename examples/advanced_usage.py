@@ -5,7 +5,7 @@ Advanced usage example for py-db-knih package.
 This example demonstrates advanced features like custom services and error handling.
 """
 
-from db_knih_api import DBKnih, BookService, SearchService, Fetcher
+from db_knih_api import DBKnih, BookService, SearchService, Fetcher, RateLimiter, db_knih
 import time
 
 
@@ -37,15 +37,16 @@ def main():
     print("-" * 30)
     
     search_terms = ["sci-fi", "romance", "thriller"]
-    all_results = []
+    
+    # Searches run concurrently; the rate limiter keeps us respectful to the server
+    polite_fetcher = Fetcher(rate_limiter=RateLimiter(requests_per_second=2))
+    polite_api = DBKnih(search_service=SearchService(polite_fetcher))
+    batch = polite_api.search_many(search_terms)
     
     for term in search_terms:
-        print(f"Searching for '{term}'...")
-        results = db_knih.search(term)
-        all_results.extend(results[:2])  # Take first 2 results from each
-        time.sleep(0.5)  # Be respectful to the server
+        print(f"'{term}': {len(batch.results[term])} results")
     
-    print(f"Total books found across all searches: {len(all_results)}")
+    print(f"Unique books found across all searches: {len(batch.merged)}")
     
     # Example 3: Error handling
     print("\n3️⃣ Error Handling Example")
@@ -34,5 +34,13 @@ setuptools.setup(
         "beautifulsoup4>=4.14.0",
         "lxml>=6.0.0",
     ],
+    extras_require={
+        "numpy": ["numpy>=1.22"],
+    },
+    entry_points={
+        "console_scripts": [
+            "db-knih=db_knih_api.cli:main",
+        ],
+    },
     keywords="scraping, books, czech, databazeknih, web-scraping, library",
 )
\ No newline at end of file
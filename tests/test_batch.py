@@ -0,0 +1,139 @@
+"""
+Unit tests for the batch runner and its helpers.
+"""
+import json
+import threading
+
+import pytest
+
+from db_knih_api.batch import (BatchResult, BatchRunner, BatchStats, drop_incomplete_line, load_completed_inputs,
+                               read_inputs)
+from db_knih_api.models import SearchInfo
+
+
+class TestBatchResult:
+    """Test cases for the BatchResult class."""
+    
+    def test_to_json_serializes_dataclasses(self):
+        """Test that dataclass results are serialized as JSON objects."""
+        result = BatchResult(input="kniha", result=[SearchInfo(name="Kniha", id=1)], elapsed=0.5)
+        record = json.loads(result.to_json())
+        
+        assert record["ok"] is True
+        assert record["input"] == "kniha"
+        assert record["result"][0]["name"] == "Kniha"
+        assert record["result"][0]["id"] == 1
+    
+    def test_error_result(self):
+        """Test that a result with an error is not ok."""
+        assert not BatchResult(input="x", error="boom").ok
+
+
+class TestBatchStats:
+    """Test cases for the BatchStats class."""
+    
+    def test_counts_and_percentiles(self):
+        """Test counters, throughput and latency percentiles."""
+        now = [0.0]
+        stats = BatchStats(clock=lambda: now[0])
+        for elapsed in [0.1, 0.2, 0.3, 0.4]:
+            stats.record(BatchResult(input="x", elapsed=elapsed))
+        stats.record(BatchResult(input="y", error="fail", elapsed=1.0))
+        now[0] = 2.0
+        
+        assert stats.completed == 5
+        assert stats.errors == 1
+        assert stats.throughput() == 2.5
+        assert stats.percentile(50) == 0.3
+        assert stats.percentile(99) == 1.0
+        assert "5 done, 1 errors" in stats.summary()
+    
+    def test_empty_percentile(self):
+        """Test that an empty run has no percentiles."""
+        assert BatchStats().percentile(50) is None
+
+
+class TestBatchRunner:
+    """Test cases for the BatchRunner class."""
+    
+    def test_invalid_concurrency(self):
+        """Test that concurrency must be positive."""
+        with pytest.raises(ValueError):
+            BatchRunner(str, concurrency=0)
+    
+    def test_runs_all_inputs_concurrently(self):
+        """Test that inputs are processed with bounded concurrency."""
+        active = []
+        peak = []
+        lock = threading.Lock()
+        
+        def task(item):
+            with lock:
+                active.append(item)
+                peak.append(len(active))
+            with lock:
+                active.remove(item)
+            return item.upper()
+        
+        runner = BatchRunner(task, concurrency=3)
+        results = list(runner.run(["a", "b", "c", "d", "e"]))
+        
+        assert sorted(result.result for result in results) == ["A", "B", "C", "D", "E"]
+        assert max(peak) <= 3
+        assert runner.stats.completed == 5
+    
+    def test_exceptions_and_error_results(self):
+        """Test that exceptions and rejected results are reported as errors."""
+        def task(item):
+            if item == "boom":
+                raise RuntimeError("exploded")
+            return None if item == "missing" else item
+        
+        runner = BatchRunner(task, is_error=lambda value: "not found" if value is None else None)
+        results = {result.input: result for result in runner.run(["ok", "boom", "missing"])}
+        
+        assert results["ok"].ok
+        assert results["boom"].error == "RuntimeError: exploded"
+        assert results["missing"].error == "not found"
+        assert runner.stats.errors == 2
+
+
+class TestInputHelpers:
+    """Test cases for input reading and resuming."""
+    
+    def test_read_inputs(self):
+        """Test that blank lines, comments and skipped inputs are ignored."""
+        lines = ["a\n", "\n", "# comment\n", "  b  \n", "c\n"]
+        assert list(read_inputs(lines, skip={"c"})) == ["a", "b"]
+    
+    def test_load_completed_inputs(self, tmp_path):
+        """Test that only successful inputs are treated as completed."""
+        path = tmp_path / "out.jsonl"
+        path.write_text(
+            BatchResult(input="a").to_json() + "\n"
+            + BatchResult(input="b", error="fail").to_json() + "\n"
+            + '{"input": "c", "ok": tr',
+            encoding="utf-8",
+        )
+        
+        assert load_completed_inputs(str(path)) == {"a"}
+    
+    def test_load_completed_inputs_missing_file(self, tmp_path):
+        """Test that a missing output file means nothing is completed."""
+        assert load_completed_inputs(str(tmp_path / "missing.jsonl")) == set()
+    
+    def test_drop_incomplete_line(self, tmp_path):
+        """Test that a partial last record is cut off and complete files are left alone."""
+        path = tmp_path / "out.jsonl"
+        path.write_text('{"input": "a"}\n{"input": "b"}\n{"input": "c", "ok": tr', encoding="utf-8")
+        
+        drop_incomplete_line(str(path), chunk_size=4)
+        
+        assert path.read_text(encoding="utf-8") == '{"input": "a"}\n{"input": "b"}\n'
+        drop_incomplete_line(str(path))
+        assert path.read_text(encoding="utf-8") == '{"input": "a"}\n{"input": "b"}\n'
+        
+        path.write_text('{"input": "a", "ok"', encoding="utf-8")
+        drop_incomplete_line(str(path))
+        assert path.read_text(encoding="utf-8") == ""
+        drop_incomplete_line(str(tmp_path / "missing.jsonl"))
@@ -6,7 +6,27 @@ from unittest.mock import Mock, patch
 from bs4 import BeautifulSoup
 
 from db_knih_api.book_service import BookService
-from db_knih_api.models import BookInfo, Review
+from db_knih_api.deadline import cancellation, current_token
+from db_knih_api.exceptions import FetchError
+from db_knih_api.models import BookInfo, Review, ReviewCursor
+from db_knih_api.refresh import RefreshCache
+from db_knih_api.retry import RetryPolicy
+
+
+def make_review_page(*texts):
+    """Build a review listing page containing one review per text."""
+    return "".join(
+        f'<div class="komentars_user"><div class="komholdu"><p>{text}</p></div></div>'
+        for text in texts
+    )
+
+
+def make_review_fetcher(pages):
+    """Create a mock fetcher serving the given review pages by page number."""
+    mock_fetcher = Mock()
+    mock_fetcher.create_reviews_url.side_effect = lambda link, page: page
+    mock_fetcher.fetch.side_effect = lambda page: pages.get(page, "<html></html>")
+    return mock_fetcher
 
 
 class TestBookService:
@@ -299,3 +319,179 @@ class TestBookService:
         result = service.get_book_info("test-book-123")
         
         assert result is None
+    
+    def test_iter_reviews_walks_all_pages(self):
+        """Test that the review iterator yields reviews from every page in order."""
+        pages = {1: make_review_page("a", "b"), 2: make_review_page("c"), 3: make_review_page("d")}
+        service = BookService(make_review_fetcher(pages))
+        
+        reviews = list(service.iter_reviews("test-book-123", max_workers=2))
+        
+        assert [review.text for review in reviews] == ["a", "b", "c", "d"]
+    
+    def test_iter_reviews_stops_at_repeated_page(self):
+        """Test that a site serving the last page again for later pages ends the iteration."""
+        mock_fetcher = make_review_fetcher({})
+        mock_fetcher.fetch.side_effect = lambda page: make_review_page("a", "b") if page == 1 \
+            else make_review_page("c")
+        service = BookService(mock_fetcher)
+        
+        reviews = list(service.iter_reviews("test-book-123", max_workers=2))
+        
+        assert [review.text for review in reviews] == ["a", "b", "c"]
+        assert mock_fetcher.fetch.call_count <= 4
+    
+    def test_iter_reviews_stops_at_pager_count(self):
+        """Test that no page past the last one shown by the pager is fetched."""
+        pager = '<div class="pager"><a href="/komentare-knihy/test-book-123?str=2">2</a></div>'
+        pages = {1: make_review_page("a") + pager, 2: make_review_page("b") + pager,
+                 3: make_review_page("unexpected")}
+        mock_fetcher = make_review_fetcher(pages)
+        service = BookService(mock_fetcher)
+        
+        reviews = list(service.iter_reviews("test-book-123", max_workers=1))
+        
+        assert [review.text for review in reviews] == ["a", "b"]
+        assert mock_fetcher.fetch.call_count == 2
+    
+    def test_iter_reviews_limit_and_resume(self):
+        """Test stopping after N reviews and resuming from the cursor."""
+        pages = {1: make_review_page("a", "b"), 2: make_review_page("c", "d")}
+        service = BookService(make_review_fetcher(pages))
+        
+        iterator = service.iter_reviews("test-book-123", limit=3)
+        first = [review.text for review in iterator]
+        assert first == ["a", "b", "c"]
+        assert iterator.cursor == ReviewCursor(page=2, offset=1)
+        
+        rest = [review.text for review in service.iter_reviews("test-book-123", cursor=iterator.cursor)]
+        assert rest == ["d"]
+    
+    def test_iter_reviews_raises_on_error(self):
+        """Test that a failed page raises with the cursor at that page instead of ending the iteration."""
+        def fetch(page):
+            if page == 2:
+                raise FetchError(page, "Server error", 503)
+            return make_review_page("a") if page == 1 else "<html></html>"
+        
+        mock_fetcher = make_review_fetcher({})
+        mock_fetcher.fetch.side_effect = fetch
+        service = BookService(mock_fetcher)
+        
+        iterator = service.iter_reviews("test-book-123")
+        texts = []
+        with pytest.raises(FetchError):
+            for review in iterator:
+                texts.append(review.text)
+        assert texts == ["a"]
+        assert iterator.cursor == ReviewCursor(page=2, offset=0)
+    
+    def test_iter_reviews_keeps_caller_context(self):
+        """Test that prefetched pages run with the caller's deadline."""
+        tokens = []
+        mock_fetcher = make_review_fetcher({})
+        mock_fetcher.fetch.side_effect = lambda page: tokens.append(current_token()) or "<html></html>"
+        service = BookService(mock_fetcher)
+        
+        with cancellation(10) as token:
+            list(service.iter_reviews("test-book-123", max_workers=2))
+        
+        assert tokens and all(page_token is token for page_token in tokens)
+    
+    def test_refresh_book_info_skips_unchanged_pages(self):
+        """Test that unchanged pages reuse the cached info without parsing."""
+        book_html = '<div id="faux"><div id="content"><div class="bpoints">80%</div></div></div>'
+        mock_fetcher = Mock()
+        mock_fetcher.create_book_info_url.return_value = "book_url"
+        mock_fetcher.create_additional_book_info_url.return_value = "additional_url"
+        mock_fetcher.fetch_page.side_effect = lambda url: book_html if url == "book_url" else "<div></div>"
+        service = BookService(mock_fetcher)
+        cache = RefreshCache()
+        
+        info, change = service.refresh_book_info("test-book-123", cache)
+        assert info.rating == 80.0
+        assert change.changes["rating"] == (None, 80.0)
+        
+        with patch.object(service, '_parse_book_pages') as mock_parse:
+            again, change = service.refresh_book_info("test-book-123", cache)
+        
+        mock_parse.assert_not_called()
+        assert again is info
+        assert change is None
+    
+    def test_refresh_reports_only_changed_books(self):
+        """Test that the change feed contains only books whose fields changed."""
+        pages = {
+            "a": '<div id="faux"><div id="content"><div class="bpoints">80%</div></div></div>',
+            "b": '<div id="faux"><div id="content"><div class="bpoints">70%</div></div></div>',
+        }
+        mock_fetcher = Mock()
+        mock_fetcher.create_book_info_url.side_effect = lambda link: link.split("-")[0]
+        mock_fetcher.create_additional_book_info_url.side_effect = lambda book_id: "more-" + book_id
+        mock_fetcher.fetch_page.side_effect = lambda url: pages.get(url, "<div></div>")
+        service = BookService(mock_fetcher)
+        cache = RefreshCache()
+        
+        assert len(service.refresh(["a-1", "b-2"], cache)) == 2
+        
+        pages["a"] = pages["a"].replace("80%", "85%")
+        pages["b"] = pages["b"] + "<!-- cosmetic -->"
+        changes = service.refresh(["a-1", "b-2"], cache)
+        
+        assert [change.book_link for change in changes] == ["a-1"]
+        assert changes[0].changes == {"rating": (80.0, 85.0)}
+    
+    def test_get_book_info_retries_only_failed_page(self):
+        """Test that only the failing page is retried."""
+        book_html = '<div id="faux"><div id="content"><div class="bpoints">80%</div></div></div>'
+        additional_html = '<div itemprop="isbn">978-1234567890</div>'
+        mock_fetcher = Mock()
+        mock_fetcher.create_book_info_url.return_value = "book_url"
+        mock_fetcher.create_additional_book_info_url.return_value = "additional_url"
+        mock_fetcher.fetch.side_effect = [book_html, FetchError("additional_url", "down", 503), additional_html]
+        policy = RetryPolicy(max_attempts=3, sleep=Mock())
+        service = BookService(mock_fetcher, retry_policies={"default": policy})
+        
+        result = service.get_book_info("test-book-123")
+        
+        assert result.rating == 80.0
+        assert result.isbn == "978-1234567890"
+        assert result.complete is True
+        assert [call.args[0] for call in mock_fetcher.fetch.call_args_list] == [
+            "book_url", "additional_url", "additional_url"
+        ]
+    
+    def test_get_book_info_partial_result(self):
+        """Test that a failing more-info page yields a partial BookInfo."""
+        book_html = '<div id="faux"><div id="content"><div class="bpoints">80%</div></div></div>'
+        mock_fetcher = Mock()
+        mock_fetcher.create_book_info_url.return_value = "book_url"
+        mock_fetcher.create_additional_book_info_url.return_value = "additional_url"
+        
+        def fetch(url):
+            if url == "book_url":
+                return book_html
+            raise FetchError(url, "down", 500)
+        
+        mock_fetcher.fetch.side_effect = fetch
+        policies = {
+            BookService.BOOK_PAGE: RetryPolicy(max_attempts=1),
+            BookService.MORE_INFO_PAGE: RetryPolicy(max_attempts=2, sleep=Mock()),
+        }
+        service = BookService(mock_fetcher, retry_policies=policies, allow_partial=True)
+        
+        with patch('builtins.print'):
+            result = service.get_book_info("test-book-123")
+        
+        assert result.rating == 80.0
+        assert result.isbn is None
+        assert result.complete is False
+        assert mock_fetcher.fetch.call_count == 3
+    
+    def test_get_book_info_without_partial_mode(self):
+        """Test that a failing more-info page still returns None by default."""
+        mock_fetcher = Mock()
+        mock_fetcher.fetch_page.side_effect = ["<html></html>", 'Error']
+        service = BookService(mock_fetcher)
+        
+        assert service.get_book_info("test-book-123") is None
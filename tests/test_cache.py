@@ -0,0 +1,96 @@
+"""
+Unit tests for the TTLCache class.
+"""
+import pytest
+
+from db_knih_api.cache import CacheStats, TTLCache
+
+
+class FakeClock:
+    """Manually advanced clock."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Test cases for the TTLCache class."""
+    
+    def test_invalid_size(self):
+        """Test that the cache must hold at least one entry."""
+        with pytest.raises(ValueError):
+            TTLCache(max_size=0)
+    
+    def test_get_and_set(self):
+        """Test storing values and counting hits and misses."""
+        cache = TTLCache()
+        cache.set("a", 1)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b", "default") == "default"
+        assert "a" in cache
+        assert cache.stats() == CacheStats(hits=1, misses=1, size=1)
+        assert cache.stats().hit_rate == 0.5
+    
+    def test_entries_expire(self):
+        """Test that entries expire after their time-to-live."""
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=100)
+        
+        clock.now = 10
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.stats().expirations == 1
+    
+    def test_items(self):
+        """Test listing live entries with their expiry times."""
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=None)
+        cache.set("c", 3, ttl=5)
+        
+        clock.now = 5
+        assert cache.items() == [("a", 1, 10), ("b", 2, 10)]
+    
+    def test_no_ttl(self):
+        """Test that entries without a time-to-live never expire."""
+        clock = FakeClock()
+        cache = TTLCache(ttl=None, clock=clock)
+        cache.set("a", 1)
+        clock.now = 1e9
+        
+        assert cache.get("a") == 1
+    
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = TTLCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.stats().evictions == 1
+    
+    def test_delete_and_clear(self):
+        """Test removing entries."""
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        
+        cache.delete("a")
+        assert len(cache) == 1
+        cache.clear()
+        assert len(cache) == 0
+    
+    def test_empty_hit_rate(self):
+        """Test the hit rate without any lookups."""
+        assert CacheStats().hit_rate == 0.0
@@ -0,0 +1,123 @@
+"""
+Unit tests for the CircuitBreaker class.
+"""
+import pytest
+
+from db_knih_api.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class FakeClock:
+    """Manually advanced clock."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Test cases for the CircuitBreaker class."""
+    
+    def make_breaker(self, clock, **kwargs):
+        options = dict(failure_rate_threshold=0.5, window=4, min_calls=4, open_duration=10, clock=clock)
+        options.update(kwargs)
+        return CircuitBreaker(**options)
+    
+    def test_invalid_threshold(self):
+        """Test that an invalid failure rate threshold is rejected."""
+        with pytest.raises(ValueError):
+            CircuitBreaker(failure_rate_threshold=0)
+    
+    def test_stays_closed_below_min_calls(self):
+        """Test that the breaker needs enough calls before opening."""
+        breaker = self.make_breaker(FakeClock())
+        for _ in range(3):
+            breaker.record_failure()
+        
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.allow_request()
+    
+    def test_opens_on_error_rate(self):
+        """Test that the breaker opens once the error rate reaches the threshold."""
+        breaker = self.make_breaker(FakeClock())
+        breaker.record_success(0.1)
+        breaker.record_success(0.1)
+        breaker.record_failure()
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitState.OPEN
+        assert not breaker.allow_request()
+    
+    def test_slow_calls_count_as_bad(self):
+        """Test that calls above the latency threshold open the breaker."""
+        breaker = self.make_breaker(FakeClock(), slow_call_threshold=1.0)
+        for _ in range(4):
+            breaker.record_success(2.0)
+        
+        assert breaker.state == CircuitState.OPEN
+    
+    def test_half_open_probe_success_closes(self):
+        """Test that a successful probe closes the breaker."""
+        clock = FakeClock()
+        breaker = self.make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+        
+        clock.now = 10
+        assert breaker.allow_request()
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert not breaker.allow_request()
+        
+        breaker.record_success(0.1)
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.failure_rate == 0.0
+    
+    def test_half_open_probe_failure_reopens(self):
+        """Test that a failed probe opens the breaker again."""
+        clock = FakeClock()
+        breaker = self.make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+        
+        clock.now = 10
+        assert breaker.allow_request()
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitState.OPEN
+        clock.now = 15
+        assert not breaker.allow_request()
+    
+    def test_cancelled_probe_frees_slot(self):
+        """Test that a probe abandoned by its caller lets another probe through."""
+        clock = FakeClock()
+        breaker = self.make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+        
+        clock.now = 10
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_cancelled()
+        
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.allow_request()
+    
+    def test_listeners_receive_transitions(self):
+        """Test that state transitions are reported to listeners."""
+        clock = FakeClock()
+        breaker = self.make_breaker(clock)
+        transitions = []
+        breaker.add_listener(lambda b, old, new: transitions.append((old, new)))
+        
+        for _ in range(4):
+            breaker.record_failure()
+        clock.now = 10
+        breaker.allow_request()
+        breaker.record_success(0.1)
+        
+        assert transitions == [
+            (CircuitState.CLOSED, CircuitState.OPEN),
+            (CircuitState.OPEN, CircuitState.HALF_OPEN),
+            (CircuitState.HALF_OPEN, CircuitState.CLOSED),
+        ]
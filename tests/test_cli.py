@@ -0,0 +1,94 @@
+"""
+Unit tests for the db-knih command line interface.
+"""
+import io
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from db_knih_api import cli
+from db_knih_api.concurrency import AdaptiveConcurrencyLimiter
+from db_knih_api.models import BookInfo, SearchInfo
+
+
+class TestCli:
+    """Test cases for the command line interface."""
+    
+    def test_run_search_streams_jsonl(self):
+        """Test that search results are written as one JSON line per query."""
+        output = io.StringIO()
+        task = Mock(side_effect=lambda query: [SearchInfo(name=query.title(), id=1)])
+        
+        stats = cli.run("search", io.StringIO("harry potter\nhobit\n"), output, task)
+        
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert sorted(record["input"] for record in records) == ["harry potter", "hobit"]
+        assert all(record["ok"] for record in records)
+        assert stats.completed == 2
+    
+    def test_run_book_marks_missing_books_as_errors(self):
+        """Test that books without information count as errors."""
+        output = io.StringIO()
+        task = Mock(side_effect=lambda link: BookInfo(year=2000) if link == "good-1" else None)
+        progress = io.StringIO()
+        
+        stats = cli.run("book", io.StringIO("good-1\nbad-2\n"), output, task, progress=progress)
+        
+        records = {record["input"]: record for record in map(json.loads, output.getvalue().splitlines())}
+        assert records["good-1"]["result"]["year"] == 2000
+        assert records["bad-2"]["error"] == "not found"
+        assert stats.errors == 1
+        assert "2 done, 1 errors" in progress.getvalue()
+    
+    def test_run_reports_adaptive_limit(self):
+        """Test that progress lines include the current limit of an adaptive limiter."""
+        progress = io.StringIO()
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=3, max_limit=8)
+        
+        cli.run("search", io.StringIO("hobit\n"), io.StringIO(), Mock(return_value=[]),
+                concurrency=8, progress=progress, limiter=limiter)
+        
+        assert progress.getvalue().rstrip().endswith("limit 3")
+    
+    def test_main_resume_skips_completed_inputs(self, tmp_path):
+        """Test that --resume skips successful inputs and appends to the output."""
+        input_path = tmp_path / "links.txt"
+        input_path.write_text("a-1\nb-2\n", encoding="utf-8")
+        output_path = tmp_path / "books.jsonl"
+        output_path.write_text('{"input": "a-1", "ok": true}\n', encoding="utf-8")
+        
+        task = Mock(return_value=BookInfo(year=1999))
+        with patch.object(cli, 'make_task', return_value=task), patch('sys.stderr', io.StringIO()):
+            exit_code = cli.main(["book", str(input_path), "-o", str(output_path), "--resume"])
+        
+        assert exit_code == 0
+        task.assert_called_once_with("b-2")
+        lines = output_path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[1])["input"] == "b-2"
+    
+    def test_main_resume_drops_partial_last_line(self, tmp_path):
+        """Test that --resume does not append to a record cut off by an interrupted run."""
+        input_path = tmp_path / "links.txt"
+        input_path.write_text("a-1\nb-2\n", encoding="utf-8")
+        output_path = tmp_path / "books.jsonl"
+        output_path.write_text('{"input": "a-1", "ok": true}\n{"input": "b-2", "ok"', encoding="utf-8")
+        
+        task = Mock(return_value=BookInfo(year=1999))
+        with patch.object(cli, 'make_task', return_value=task), patch('sys.stderr', io.StringIO()):
+            cli.main(["book", str(input_path), "-o", str(output_path), "--resume"])
+        
+        records = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+        assert [record["input"] for record in records] == ["a-1", "b-2"]
+    
+    def test_main_rejects_invalid_concurrency(self):
+        """Test that a non-positive concurrency is rejected."""
+        with patch('sys.stderr', io.StringIO()):
+            assert cli.main(["search", "--concurrency", "0"]) == 2
+    
+    def test_make_task_uses_services(self):
+        """Test that commands are backed by the search and book services."""
+        fetcher = Mock()
+        assert cli.make_task("search", fetcher).__self__.fetcher is fetcher
+        assert cli.make_task("book", fetcher).__func__.__name__ == "get_book_info"
@@ -0,0 +1,104 @@
+"""
+Unit tests for the columnar BookCollection.
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from db_knih_api.collection import BookCollection
+from db_knih_api.models import BookInfo, SearchInfo
+
+
+def make_collection():
+    """Create a small collection of detailed books."""
+    infos = [
+        BookInfo(author="Rowling", publisher="Albatros", year=2000, rating=90.0, numberOfRatings=500,
+                 pages=300, genres=["Fantasy", "Pro děti"]),
+        BookInfo(author="Tolkien", publisher="Argo", year=1937, rating=95.0, numberOfRatings=800,
+                 pages=250, genres=["Fantasy"]),
+        BookInfo(author="Rowling", publisher="Albatros", year=2016, rating=70.0, numberOfRatings=100,
+                 genres=["Drama"]),
+        BookInfo(author=None, year=None, rating=None, genres=None),
+    ]
+    return infos, BookCollection.from_book_infos(infos, ids=[1, 2, 3, None])
+
+
+class TestBookCollection:
+    """Test cases for the BookCollection class."""
+    
+    def test_columns(self):
+        """Test that numeric columns are arrays with missing values encoded."""
+        _, books = make_collection()
+        
+        assert len(books) == 4
+        assert books.id.tolist() == [1, 2, 3, -1]
+        assert books.year[:3].tolist() == [2000.0, 1937.0, 2016.0]
+        assert np.isnan(books.year[3])
+        assert books.column("author").tolist() == ["Rowling", "Tolkien", "Rowling", None]
+    
+    def test_round_trip(self):
+        """Test that converting back returns the original models."""
+        infos, books = make_collection()
+        assert books.to_list() == infos
+        assert books[1] is infos[1]
+    
+    def test_ids_must_match(self):
+        """Test that ids must align with the infos."""
+        with pytest.raises(ValueError):
+            BookCollection.from_book_infos([BookInfo()], ids=[1, 2])
+    
+    def test_filter(self):
+        """Test vectorized filters on numbers, categories and genres."""
+        _, books = make_collection()
+        
+        assert books.filter(genre="Fantasy", min_rating=91).id.tolist() == [2]
+        assert books.filter(author="Rowling", year_from=2001).id.tolist() == [3]
+        assert books.filter(year_to=2000).id.tolist() == [1, 2]
+        assert len(books.filter(author="Unknown")) == 0
+        assert len(books.filter(genre="Unknown")) == 0
+    
+    def test_subsets_keep_genres(self):
+        """Test that genres stay aligned after selecting and sorting."""
+        _, books = make_collection()
+        subset = books[np.array([False, True, True, True])].sort_by("year", descending=True)
+        
+        assert subset.id.tolist() == [3, 2, -1]
+        assert subset.count_by("genre") == {"Drama": 1, "Fantasy": 1}
+        assert subset.genre_mask("Fantasy").tolist() == [False, True, False]
+    
+    def test_sort_missing_last(self):
+        """Test that missing values are sorted last in both directions."""
+        _, books = make_collection()
+        
+        assert books.sort_by("rating").id.tolist() == [3, 1, 2, -1]
+        assert books.sort_by("rating", descending=True).id.tolist() == [2, 1, 3, -1]
+        assert books.sort_by("id", descending=True).id.tolist() == [3, 2, 1, -1]
+    
+    def test_aggregations(self):
+        """Test group-by counts and numeric aggregations."""
+        _, books = make_collection()
+        
+        assert books.count_by("author") == {"Rowling": 2, "Tolkien": 1}
+        assert books.count_by("genre") == {"Fantasy": 2, "Pro děti": 1, "Drama": 1}
+        assert books.count_by("year") == {2000: 1, 1937: 1, 2016: 1}
+        assert books.unique("publisher") == ["Albatros", "Argo"]
+        assert books.min("year") == 1937.0
+        assert books.max("year") == 2016.0
+        assert books.mean("pages") == 275.0
+        assert books.filter(author="Unknown").mean("rating") is None
+        assert books.min("id") == 1.0
+        assert books.mean("id") == 2.0
+        assert books.count_by("id") == {1: 1, 2: 1, 3: 1}
+        assert books.filter(author="Unknown").max("id") is None
+    
+    def test_from_search_infos(self):
+        """Test building a collection from search results."""
+        books = BookCollection.from_search_infos([
+            SearchInfo(name="A", id=5, year=2001, author="X"),
+            SearchInfo(name="B", id=6, year=1999, author="Y"),
+        ])
+        
+        assert books.id.tolist() == [5, 6]
+        assert books.filter(year_from=2000).to_list()[0].name == "A"
+        assert np.isnan(books.rating).all()
+        assert books.count_by("genre") == {}
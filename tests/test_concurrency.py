@@ -0,0 +1,221 @@
+"""
+Unit tests for the AdaptiveConcurrencyLimiter class.
+"""
+import threading
+import time
+
+import pytest
+import requests
+from unittest.mock import Mock
+
+from db_knih_api.batch import BatchRunner
+from db_knih_api.concurrency import AdaptiveConcurrencyLimiter, is_overload
+from db_knih_api.exceptions import CircuitOpenError, DeadlineExceededError, FetchError, NotFoundError
+from db_knih_api.fetcher import Fetcher
+from db_knih_api.loadtest import run_load
+from db_knih_api.stub_server import StubConfig, StubServer, constant
+
+
+def saturate(limiter):
+    """Acquire every slot of the limiter."""
+    return [limiter.acquire() for _ in range(limiter.limit)]
+
+
+def saturate_free(limiter):
+    """Acquire the slots that are free."""
+    return [limiter.acquire() for _ in range(limiter.limit - limiter.in_flight)]
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Test cases for the AdaptiveConcurrencyLimiter class."""
+
+    def test_invalid_arguments(self):
+        """Test that the limits and factors are validated."""
+        with pytest.raises(ValueError):
+            AdaptiveConcurrencyLimiter(initial_limit=10, max_limit=5)
+        with pytest.raises(ValueError):
+            AdaptiveConcurrencyLimiter(backoff=1.0)
+        with pytest.raises(ValueError):
+            AdaptiveConcurrencyLimiter(latency_tolerance=1.0)
+
+    def test_acquire_blocks_at_limit(self):
+        """Test that no more than the limit are admitted."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+        saturate(limiter)
+
+        assert limiter.in_flight == 2
+        assert limiter.acquire(timeout=0.01) is None
+
+    def test_additive_increase(self):
+        """Test that a round of successes while saturated raises the limit by one."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+        permits = saturate(limiter)
+
+        # 4 + 5 + 6 successes take the limit from 4 to 7
+        for _ in range(15):
+            limiter.release(permits.pop(0), latency=0.1)
+            permits.extend(saturate_free(limiter))
+
+        assert limiter.limit == 7
+        assert limiter.stats().increases == 3
+
+    def test_no_increase_when_idle(self):
+        """Test that the limit only grows while it is actually used."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+        for _ in range(50):
+            limiter.release(limiter.acquire(), latency=0.1)
+
+        assert limiter.limit == 8
+
+    def test_multiplicative_decrease_once_per_event(self):
+        """Test that overloads of requests admitted before a cut do not cut again."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16)
+        permits = saturate(limiter)
+
+        for permit in permits:
+            limiter.release(permit, overloaded=True)
+
+        assert limiter.limit == 8
+        assert limiter.stats().decreases == 1
+
+        limiter.release(limiter.acquire(), overloaded=True)
+        assert limiter.limit == 4
+
+    def test_bounds(self):
+        """Test that the limit stays between min_limit and max_limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=2, max_limit=3)
+
+        for _ in range(20):
+            for permit in saturate(limiter):
+                limiter.release(permit, latency=0.1)
+        assert limiter.limit == 3
+
+        for _ in range(5):
+            limiter.release(limiter.acquire(), overloaded=True)
+        assert limiter.limit == 2
+
+    def test_latency_spike_cuts(self):
+        """Test that a latency far above the median counts as overload."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10, min_samples=5)
+        for _ in range(5):
+            limiter.release(limiter.acquire(), latency=0.1)
+
+        limiter.release(limiter.acquire(), latency=0.15)
+        assert limiter.limit == 10
+
+        limiter.release(limiter.acquire(), latency=0.5)
+        assert limiter.limit == 5
+
+    def test_neutral_release(self):
+        """Test that releasing without latency or overload leaves the limit alone."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+
+        limiter.release(limiter.acquire())
+
+        assert limiter.limit == 1
+        assert limiter.in_flight == 0
+
+    def test_release_wakes_waiter(self):
+        """Test that a blocked acquire proceeds once a slot is released."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        permit = limiter.acquire()
+        acquired = []
+
+        thread = threading.Thread(target=lambda: acquired.append(limiter.acquire(timeout=5)))
+        thread.start()
+        time.sleep(0.02)
+        limiter.release(permit)
+        thread.join(timeout=5)
+
+        assert acquired[0] is not None
+
+    def test_listener(self):
+        """Test that listeners see every change of the integer limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+        changes = []
+        limiter.add_listener(lambda _, old, new: changes.append((old, new)))
+
+        limiter.release(limiter.acquire(), overloaded=True)
+
+        assert changes == [(4, 2)]
+
+
+class TestIsOverload:
+    """Test cases for the overload classification."""
+
+    @pytest.mark.parametrize("error,expected", [
+        (FetchError("u", "throttled", 429), True),
+        (FetchError("u", "unavailable", 503), True),
+        (FetchError("u", "timed out"), True),
+        (DeadlineExceededError("u", "deadline"), True),
+        (FetchError("u", "server error", 500), False),
+        (NotFoundError("u", "missing", 404), False),
+        (CircuitOpenError("u", "open"), False),
+        (ValueError("bug"), False),
+    ])
+    def test_classification(self, error, expected):
+        """Test which errors cut the concurrency limit."""
+        assert is_overload(error) is expected
+
+
+class TestLimitedFetcher:
+    """Test cases for fetching within an adaptive limit."""
+
+    def test_feeds_back_outcomes(self):
+        """Test that successes and throttling reach the limiter."""
+        response_429 = Mock(status_code=429)
+        mock_session = Mock()
+        mock_session.get.return_value.text = "<html></html>"
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_samples=1000)
+        fetcher = Fetcher(mock_session, concurrency_limiter=limiter)
+
+        assert fetcher.fetch("https://example.com") == "<html></html>"
+        assert limiter.latency_tracker.percentile(50) is not None
+
+        mock_session.get.side_effect = requests.HTTPError("429", response=response_429)
+        with pytest.raises(FetchError):
+            fetcher.fetch("https://example.com")
+
+        assert limiter.limit == 2
+        assert limiter.in_flight == 0
+
+    def test_refused_permit_without_deadline(self):
+        """Test that a refused permit outside a deadline raises DeadlineExceededError."""
+        limiter = Mock()
+        limiter.acquire.return_value = None
+        mock_session = Mock()
+
+        with pytest.raises(DeadlineExceededError):
+            Fetcher(mock_session, concurrency_limiter=limiter).fetch("https://example.com")
+
+        mock_session.get.assert_not_called()
+
+    def test_batch_runner_follows_limit(self):
+        """Test that the batch runner starts no more items than the current limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=8)
+        running, peak = [0], [0]
+        lock = threading.Lock()
+
+        def task(item):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return item
+
+        runner = BatchRunner(task, concurrency=8, limiter=limiter)
+        results = list(runner.run(str(i) for i in range(20)))
+
+        assert len(results) == 20
+        assert peak[0] == 2
+
+    def test_converges_below_server_capacity(self):
+        """Test that the limit settles near the capacity of an overloaded stub."""
+        with StubServer(StubConfig(latency=constant(0.01)), capacity=6, books=50) as server:
+            report = run_load("fetch", server, calls=300, concurrency=32, adaptive=True, seed=0)
+
+        assert 2 <= report.limit <= 12
+        assert report.errors < 60
@@ -0,0 +1,137 @@
+"""
+Unit tests for the cover downloader and store.
+"""
+import os
+import threading
+
+from db_knih_api.covers import CoverDownloader, CoverStore
+from db_knih_api.fetcher import Fetcher
+from db_knih_api.models import BookInfo
+
+
+class FakeResponse:
+    """Streamed response of FakeSession."""
+
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        return (self.body[i:i + chunk_size] for i in range(0, len(self.body), chunk_size))
+
+
+class FakeSession:
+    """Session serving images by URL, answering 304 to a matching If-None-Match."""
+
+    def __init__(self, images):
+        self.images = images
+        self.headers = {}
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None, stream=False, headers=None):
+        with self._lock:
+            self.requests.append((url, headers))
+        body = self.images[url]
+        etag = f'"{len(body)}"'
+        if headers and headers.get("If-None-Match") == etag:
+            return FakeResponse(304, headers={"ETag": etag})
+        return FakeResponse(200, body, {"ETag": etag})
+
+
+IMAGES = {
+    "https://www.databazeknih.cz/img/books/1.jpg": b"\xff\xd8cover-one" * 100,
+    "https://www.databazeknih.cz/img/books/2.jpg": b"\xff\xd8cover-two" * 100,
+    "https://cdn.example.com/2-copy.jpg": b"\xff\xd8cover-two" * 100,
+}
+
+
+def make_downloader(tmp_path, refresh=False):
+    """Downloader over a fake session, storing into a temporary directory."""
+    session = FakeSession(IMAGES)
+    store = CoverStore(str(tmp_path / "covers"))
+    return CoverDownloader(store, Fetcher(session), concurrency=4, refresh=refresh, chunk_size=64), session
+
+
+class TestCoverDownloader:
+    """Test cases for the CoverDownloader class."""
+
+    def test_download_and_manifest(self, tmp_path):
+        """Test that book covers are stored by content and listed in the manifest."""
+        downloader, session = make_downloader(tmp_path)
+
+        stats = downloader.download([
+            (1, BookInfo(cover="/img/books/1.jpg")),
+            (2, "https://www.databazeknih.cz/img/books/2.jpg"),
+            (3, BookInfo(cover=None)),
+        ])
+
+        assert stats.downloaded == 2
+        store = downloader.store
+        path = store.path_for(1)
+        with open(path, "rb") as fh:
+            assert fh.read() == IMAGES["https://www.databazeknih.cz/img/books/1.jpg"]
+        assert path.endswith(".jpg")
+        assert store.path_for(3) is None
+        assert set(store.manifest()) == {"1", "2"}
+
+    def test_duplicate_urls_and_images_stored_once(self, tmp_path):
+        """Test that a repeated URL is fetched once and identical images share a file."""
+        downloader, session = make_downloader(tmp_path)
+
+        stats = downloader.download([
+            (1, "https://www.databazeknih.cz/img/books/2.jpg"),
+            (2, "https://www.databazeknih.cz/img/books/2.jpg"),
+            (3, "https://cdn.example.com/2-copy.jpg"),
+        ])
+
+        assert len(session.requests) == 2
+        assert stats.downloaded + stats.duplicates == 2 and stats.duplicates == 1
+        assert downloader.store.path_for(1) == downloader.store.path_for(3)
+        assert len(downloader.store) == 1
+
+    def test_stored_urls_are_skipped(self, tmp_path):
+        """Test that a second run over a reopened store sends no requests."""
+        downloader, _ = make_downloader(tmp_path)
+        downloader.download([(1, "https://www.databazeknih.cz/img/books/1.jpg")])
+
+        again, session = make_downloader(tmp_path)
+        stats = again.download([(1, "https://www.databazeknih.cz/img/books/1.jpg")])
+
+        assert stats.cached == 1
+        assert session.requests == []
+        assert again.store.path_for(1) == downloader.store.path_for(1)
+
+    def test_refresh_is_conditional(self, tmp_path):
+        """Test that refreshing sends the stored ETag and keeps unchanged images."""
+        downloader, _ = make_downloader(tmp_path)
+        downloader.download(["https://www.databazeknih.cz/img/books/1.jpg"])
+        etag = downloader.store.get("https://www.databazeknih.cz/img/books/1.jpg").etag
+
+        refresher, session = make_downloader(tmp_path, refresh=True)
+        stats = refresher.download(["https://www.databazeknih.cz/img/books/1.jpg"])
+
+        assert stats.not_modified == 1
+        assert session.requests == [("https://www.databazeknih.cz/img/books/1.jpg", {"If-None-Match": etag})]
+        assert refresher.store.get("https://www.databazeknih.cz/img/books/1.jpg").etag == etag
+
+    def test_errors_are_counted(self, tmp_path):
+        """Test that a failed download does not stop the others."""
+        downloader, _ = make_downloader(tmp_path)
+
+        stats = downloader.download(["https://www.databazeknih.cz/img/books/missing.jpg",
+                                     "https://www.databazeknih.cz/img/books/1.jpg"])
+
+        assert stats.errors == 1
+        assert stats.downloaded == 1
+        assert not [name for name in os.listdir(downloader.store.directory) if name.endswith(".part")]
@@ -0,0 +1,234 @@
+"""
+Unit tests for cancellation tokens and call deadlines.
+"""
+import threading
+import time
+
+import pytest
+import requests
+from unittest.mock import Mock
+
+from db_knih_api import DBKnih
+from db_knih_api.batch import BatchRunner
+from db_knih_api.book_service import BookService
+from db_knih_api.deadline import CancellationToken, cancellation, check_deadline, current_token
+from db_knih_api.exceptions import DeadlineExceededError, NotFoundError
+from db_knih_api.fetcher import Fetcher
+from db_knih_api.rate_limiter import RateLimiter
+from db_knih_api.retry import RetryPolicy
+from db_knih_api.scheduler import RequestScheduler
+
+
+class FakeClock:
+    """Manually advanced clock."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def make_slow_session(release):
+    """Create a session whose responses block until released or their timeout passes."""
+    def get(url, timeout):
+        if not release.wait(timeout):
+            raise requests.Timeout("Read timed out")
+        return Mock(text="late")
+    
+    mock_session = Mock()
+    mock_session.get.side_effect = get
+    return mock_session
+
+
+class TestCancellationToken:
+    """Test cases for the CancellationToken class."""
+    
+    def test_deadline(self):
+        """Test that a token expires at its deadline."""
+        clock = FakeClock()
+        token = CancellationToken(timeout=2, clock=clock)
+        
+        assert not token.expired
+        assert token.remaining() == 2
+        clock.now = 2
+        assert token.expired
+        assert token.remaining() == 0
+        with pytest.raises(DeadlineExceededError, match="deadline"):
+            token.check("url")
+    
+    def test_cancel(self):
+        """Test explicit cancellation without a deadline."""
+        token = CancellationToken()
+        
+        assert token.remaining() is None
+        token.cancel()
+        assert token.expired
+        assert token.remaining() == 0
+        with pytest.raises(DeadlineExceededError, match="cancelled"):
+            token.check()
+    
+    def test_parents(self):
+        """Test that linked tokens inherit the earliest deadline and cancellation."""
+        clock = FakeClock()
+        outer = CancellationToken(timeout=5, clock=clock)
+        inner = CancellationToken(timeout=2, clock=clock)
+        linked = CancellationToken(parents=(outer, inner), clock=clock)
+        
+        assert linked.expires_at == 2
+        outer.cancel()
+        assert linked.cancelled
+    
+    def test_cancellation_context(self):
+        """Test that nested blocks combine and restore the current token."""
+        assert current_token() is None
+        check_deadline()
+        with cancellation(10) as outer:
+            with cancellation(None) as same:
+                assert same is outer
+            with cancellation(0.5) as inner:
+                assert inner.expires_at == pytest.approx(time.monotonic() + 0.5, abs=0.1)
+                outer.cancel()
+                with pytest.raises(DeadlineExceededError):
+                    check_deadline()
+            assert current_token() is outer
+        assert current_token() is None
+
+
+class TestDeadlinePropagation:
+    """Test cases for deadlines passed through the API."""
+    
+    def test_fetch_fails_fast_after_deadline(self):
+        """Test that an expired token stops fetching before any request."""
+        mock_session = Mock()
+        fetcher = Fetcher(mock_session)
+        
+        with cancellation(CancellationToken(timeout=0)):
+            with pytest.raises(DeadlineExceededError):
+                fetcher.fetch_page("https://example.com")
+        
+        mock_session.get.assert_not_called()
+    
+    def test_deadline_caps_request_timeout(self):
+        """Test that the call deadline caps the timeout passed to requests."""
+        mock_session = Mock()
+        mock_session.get.return_value.text = "<html></html>"
+        fetcher = Fetcher(mock_session)
+        
+        with cancellation(2):
+            fetcher.fetch("https://example.com")
+        
+        assert mock_session.get.call_args[1]['timeout'] <= 2
+    
+    def test_cancel_stops_after_running_fetch(self):
+        """Test that cancelling a token during a fetch stops the call once that request returns."""
+        token = CancellationToken()
+        mock_session = Mock()
+        mock_session.get.side_effect = lambda url, timeout: token.cancel() or Mock(text="<html></html>")
+        
+        with pytest.raises(DeadlineExceededError, match="cancelled"):
+            BookService(Fetcher(mock_session)).get_book_info("kniha-1", deadline=token)
+        
+        assert mock_session.get.call_count == 1
+    
+    def test_book_info_deadline_skips_remaining_fetches(self):
+        """Test that the second page is not fetched once the deadline passed."""
+        release = threading.Event()
+        mock_session = make_slow_session(release)
+        fetcher = Fetcher(mock_session)
+        api = DBKnih(BookService(fetcher), Mock())
+        started_at = time.monotonic()
+        try:
+            with pytest.raises(DeadlineExceededError):
+                api.get_book_info("kniha-1", deadline=0.05)
+        finally:
+            release.set()
+        
+        assert time.monotonic() - started_at < 1
+        assert mock_session.get.call_count == 1
+    
+    def test_not_found_after_deadline_without_negative_cache(self):
+        """Test that a 404 arriving after the deadline reports the deadline."""
+        token = CancellationToken()
+        
+        def fetch(url):
+            token.cancel()
+            raise NotFoundError(url, "Not found", 404)
+        
+        fetcher = Mock()
+        fetcher.fetch.side_effect = fetch
+        service = BookService(fetcher, retry_policies={"default": RetryPolicy(sleep=lambda delay: None)})
+        
+        with pytest.raises(DeadlineExceededError):
+            service.get_book_info("kniha-1", deadline=token)
+    
+    def test_deadline_while_queued_in_scheduler(self):
+        """Test that a request waiting for the scheduler gives up at the deadline."""
+        scheduler = RequestScheduler(max_concurrent=1)
+        mock_session = Mock()
+        fetcher = Fetcher(mock_session, scheduler=scheduler)
+        scheduler.acquire()
+        
+        with pytest.raises(DeadlineExceededError):
+            with cancellation(0.05):
+                fetcher.fetch("https://example.com")
+        
+        scheduler.release()
+        assert scheduler.in_flight == 0
+        mock_session.get.assert_not_called()
+    
+    def test_deadline_while_rate_limited(self):
+        """Test that a slow rate limiter does not hold a call past its deadline."""
+        mock_session = Mock()
+        mock_session.get.return_value.text = "<html></html>"
+        fetcher = Fetcher(mock_session, rate_limiter=RateLimiter(0.2))
+        started_at = time.monotonic()
+        
+        with pytest.raises(DeadlineExceededError):
+            BookService(fetcher).get_book_info("kniha-1", deadline=0.2)
+        
+        assert time.monotonic() - started_at < 1
+        assert mock_session.get.call_count == 1
+    
+    def test_deadline_while_rate_limited_in_scheduler(self):
+        """Test that the limiter wait after dispatch is bounded by the deadline and frees the slot."""
+        scheduler = RequestScheduler(max_concurrent=1, rate_limiter=RateLimiter(0.2))
+        mock_session = Mock()
+        mock_session.get.return_value.text = "<html></html>"
+        fetcher = Fetcher(mock_session, scheduler=scheduler)
+        started_at = time.monotonic()
+        
+        with pytest.raises(DeadlineExceededError):
+            BookService(fetcher).get_book_info("kniha-1", deadline=0.2)
+        
+        assert time.monotonic() - started_at < 1
+        assert mock_session.get.call_count == 1
+        assert scheduler.in_flight == 0
+    
+    def test_search_many_deadline(self):
+        """Test that worker threads of search_many see the deadline."""
+        tokens = []
+        search_service = Mock()
+        search_service.search.side_effect = lambda text: tokens.append(current_token()) or []
+        api = DBKnih(Mock(), search_service)
+        
+        api.search_many(["a", "b"], deadline=10)
+        
+        assert len(tokens) == 2
+        assert all(token is not None and token.expires_at is not None for token in tokens)
+    
+    def test_batch_deadline(self):
+        """Test that inputs left after the batch deadline fail without running."""
+        started = []
+        
+        def task(item):
+            started.append(item)
+            time.sleep(0.1)
+            return item
+        
+        runner = BatchRunner(task, concurrency=1)
+        results = list(runner.run(["a", "b", "c"], deadline=0.05))
+        
+        assert started == ["a"]
+        assert [result.ok for result in results] == [True, False, False]
+        assert "DeadlineExceededError" in results[1].error
@@ -1,10 +1,30 @@
 """
 Unit tests for the Fetcher class.
 """
+import threading
+import time
+
 import pytest
+import requests
 from unittest.mock import Mock, patch
 
+from db_knih_api.circuit_breaker import CircuitBreaker, CircuitState
+from db_knih_api.deadline import CancellationToken, cancellation
+from db_knih_api.exceptions import CircuitOpenError, DeadlineExceededError, FetchError, NotFoundError
 from db_knih_api.fetcher import Fetcher
+from db_knih_api.hedging import HedgePolicy
+
+
+def make_timed_session(release):
+    """Create a session whose responses block until released or their timeout passes."""
+    def get(url, timeout):
+        if not release.wait(timeout):
+            raise requests.Timeout("Read timed out")
+        return Mock(text="late")
+    
+    mock_session = Mock()
+    mock_session.get.side_effect = get
+    return mock_session
 
 
 class TestFetcher:
@@ -61,6 +81,213 @@ class TestFetcher:
         
         assert result == 'Error'
     
+    def test_fetch_page_uses_rate_limiter(self):
+        """Test that the rate limiter is acquired before each request."""
+        mock_session = Mock()
+        mock_session.get.return_value.text = "<html></html>"
+        mock_limiter = Mock()
+        
+        fetcher = Fetcher(mock_session, rate_limiter=mock_limiter)
+        fetcher.fetch_page("https://example.com")
+        fetcher.fetch_page("https://example.com")
+        
+        assert mock_limiter.acquire.call_count == 2
+    
+    def test_fetch_raises_typed_error(self):
+        """Test that fetch raises FetchError with the HTTP status code."""
+        import requests
+        mock_session = Mock()
+        error_response = Mock(status_code=503)
+        mock_session.get.return_value.raise_for_status.side_effect = requests.HTTPError(
+            "503 Server Error", response=error_response
+        )
+        
+        fetcher = Fetcher(mock_session)
+        with pytest.raises(FetchError) as exc_info:
+            fetcher.fetch("https://example.com")
+        
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.url == "https://example.com"
+    
+    def test_fetch_raises_not_found_error(self):
+        """Test that a 404 response raises NotFoundError."""
+        import requests
+        mock_session = Mock()
+        mock_session.get.return_value.raise_for_status.side_effect = requests.HTTPError(
+            "404 Client Error", response=Mock(status_code=404)
+        )
+        
+        fetcher = Fetcher(mock_session)
+        with pytest.raises(NotFoundError) as exc_info:
+            fetcher.fetch("https://example.com")
+        
+        assert exc_info.value.status_code == 404
+    
+    def test_phase_timeouts(self):
+        """Test that connect and read timeouts are passed separately."""
+        mock_session = Mock()
+        mock_session.get.return_value.text = "<html></html>"
+        
+        fetcher = Fetcher(mock_session, connect_timeout=3, read_timeout=10)
+        fetcher.fetch_page("https://example.com")
+        
+        mock_session.get.assert_called_once_with("https://example.com", timeout=(3, 10))
+    
+    def test_deadline_caps_timeouts(self):
+        """Test that the per-call deadline caps the request timeouts."""
+        mock_session = Mock()
+        mock_session.get.return_value.text = "<html></html>"
+        
+        fetcher = Fetcher(mock_session, connect_timeout=3, read_timeout=10, deadline=2)
+        fetcher.fetch_page("https://example.com")
+        
+        connect_timeout, read_timeout = mock_session.get.call_args[1]['timeout']
+        assert connect_timeout <= 2
+        assert read_timeout <= 2
+    
+    def test_deadline_exceeded(self):
+        """Test that a slow response fails once the deadline passes."""
+        release = threading.Event()
+        fetcher = Fetcher(make_timed_session(release), deadline=0.05)
+        started_at = time.monotonic()
+        try:
+            with pytest.raises(DeadlineExceededError, match="Deadline of 0.05s exceeded"):
+                fetcher.fetch("https://example.com")
+        finally:
+            release.set()
+        
+        assert time.monotonic() - started_at < 0.5
+        # Without hedging the request runs in the calling thread
+        assert fetcher._executor is None
+    
+    def test_call_deadline_message(self):
+        """Test that a deadline set only by the call token is not reported as the fetcher's."""
+        release = threading.Event()
+        mock_session = make_timed_session(release)
+        # The token's own clock never advances, so only the request deadline derived from it passes
+        frozen = time.monotonic()
+        token = CancellationToken(timeout=0.05, clock=lambda: frozen)
+        
+        try:
+            with pytest.raises(DeadlineExceededError, match="Call deadline exceeded"):
+                with cancellation(token):
+                    Fetcher(mock_session).fetch("https://example.com")
+        finally:
+            release.set()
+        
+        assert mock_session.get.call_args[1]['timeout'] <= 0.05
+    
+    def test_hedged_request_returns_first_response(self):
+        """Test that a slow request is hedged and the faster response wins."""
+        release = threading.Event()
+        calls = []
+        
+        def get(url, timeout):
+            calls.append(url)
+            if len(calls) == 1:
+                release.wait(1)
+                return Mock(text="slow")
+            return Mock(text="fast")
+        
+        mock_session = Mock()
+        mock_session.get.side_effect = get
+        policy = HedgePolicy(percentile=50, budget_ratio=1.0, min_samples=1)
+        fetcher = Fetcher(mock_session, hedge_policy=policy)
+        fetcher.latency_tracker.record(0.01)
+        
+        try:
+            result = fetcher.fetch("https://example.com")
+        finally:
+            release.set()
+        
+        assert result == "fast"
+        assert len(calls) == 2
+        assert policy.hedges_sent == 1
+    
+    def test_hedged_call_deadline(self):
+        """Test that a hedged call fails at its deadline and drops attempts not yet started."""
+        release = threading.Event()
+        mock_session = Mock()
+        mock_session.get.side_effect = lambda url, timeout: release.wait(1) and Mock(text="late")
+        policy = HedgePolicy(percentile=50, budget_ratio=1.0, min_samples=1)
+        fetcher = Fetcher(mock_session, hedge_policy=policy, hedge_workers=1, deadline=0.1)
+        fetcher.latency_tracker.record(0.01)
+        
+        try:
+            with pytest.raises(DeadlineExceededError):
+                fetcher.fetch("https://example.com")
+        finally:
+            release.set()
+            fetcher.close()
+        
+        # The hedge queued behind the only worker was cancelled before it was sent
+        assert mock_session.get.call_count == 1
+        assert policy.hedges_sent == 1
+        assert fetcher._executor is None
+    
+    def test_invalid_hedge_workers(self):
+        """Test that the hedging pool needs at least one worker."""
+        with pytest.raises(ValueError):
+            Fetcher(Mock(), hedge_workers=0)
+    
+    def test_hedge_not_sent_without_budget(self):
+        """Test that no hedge is sent once the budget is exhausted."""
+        mock_session = Mock()
+        mock_session.get.side_effect = lambda url, timeout: time.sleep(0.05) or Mock(text="ok")
+        policy = HedgePolicy(percentile=50, budget_ratio=0.0, min_samples=1)
+        fetcher = Fetcher(mock_session, hedge_policy=policy)
+        fetcher.latency_tracker.record(0.001)
+        
+        assert fetcher.fetch("https://example.com") == "ok"
+        assert mock_session.get.call_count == 1
+    
+    def test_circuit_breaker_fails_fast(self):
+        """Test that an open breaker rejects calls without a request."""
+        import requests
+        mock_session = Mock()
+        mock_session.get.side_effect = requests.ConnectionError("down")
+        breaker = CircuitBreaker(window=2, min_calls=2)
+        fetcher = Fetcher(mock_session, circuit_breaker=breaker)
+        
+        with patch('builtins.print'):
+            assert fetcher.fetch_page("https://example.com/1") == 'Error'
+            assert fetcher.fetch_page("https://example.com/2") == 'Error'
+        
+        assert breaker.state == CircuitState.OPEN
+        with pytest.raises(CircuitOpenError):
+            fetcher.fetch_page("https://example.com/3")
+        assert mock_session.get.call_count == 2
+    
+    def test_circuit_breaker_serves_fallback_cache(self):
+        """Test that an open breaker serves cached pages when available."""
+        mock_session = Mock()
+        mock_session.get.return_value.text = "<html>cached</html>"
+        breaker = CircuitBreaker(window=1, min_calls=1)
+        fetcher = Fetcher(mock_session, circuit_breaker=breaker, fallback_cache={})
+        
+        fetcher.fetch("https://example.com")
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitState.OPEN
+        assert fetcher.fetch("https://example.com") == "<html>cached</html>"
+        assert mock_session.get.call_count == 1
+    
+    def test_circuit_breaker_ignores_not_found(self):
+        """Test that 404 responses do not count as site failures."""
+        import requests
+        mock_session = Mock()
+        mock_session.get.return_value.raise_for_status.side_effect = requests.HTTPError(
+            "404", response=Mock(status_code=404)
+        )
+        breaker = CircuitBreaker(window=2, min_calls=2)
+        fetcher = Fetcher(mock_session, circuit_breaker=breaker)
+        
+        for _ in range(3):
+            with pytest.raises(FetchError):
+                fetcher.fetch("https://example.com/missing")
+        
+        assert breaker.state == CircuitState.CLOSED
+    
     def test_create_search_url(self):
         """Test search URL creation."""
         result = Fetcher.create_search_url("harry potter")
@@ -84,3 +311,9 @@ class TestFetcher:
         result = Fetcher.create_additional_book_info_url("12345")
         expected = "https://www.databazeknih.cz/book-detail-more-info/12345"
         assert result == expected
+    
+    def test_create_reviews_url(self):
+        """Test reviews URL creation."""
+        result = Fetcher.create_reviews_url("harry-potter-123", 3)
+        expected = "https://www.databazeknih.cz/komentare-knihy/harry-potter-123?str=3"
+        assert result == expected
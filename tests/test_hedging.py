@@ -0,0 +1,70 @@
+"""
+Unit tests for the latency tracker and hedge policy.
+"""
+import pytest
+
+from db_knih_api.hedging import HedgePolicy, LatencyTracker
+
+
+class TestLatencyTracker:
+    """Test cases for the LatencyTracker class."""
+    
+    def test_percentile_empty(self):
+        """Test that an empty tracker has no percentile."""
+        assert LatencyTracker().percentile(95) is None
+    
+    def test_percentile(self):
+        """Test percentile calculation over the window."""
+        tracker = LatencyTracker()
+        for value in range(1, 101):
+            tracker.record(value / 100)
+        
+        assert tracker.percentile(50) == 0.51
+        assert tracker.percentile(95) == 0.95
+        assert tracker.percentile(0) == 0.01
+    
+    def test_window_drops_old_samples(self):
+        """Test that only the most recent samples are kept."""
+        tracker = LatencyTracker(window=2)
+        for value in [10.0, 1.0, 2.0]:
+            tracker.record(value)
+        
+        assert len(tracker) == 2
+        assert tracker.percentile(99) == 2.0
+
+
+class TestHedgePolicy:
+    """Test cases for the HedgePolicy class."""
+    
+    def test_invalid_arguments(self):
+        """Test that invalid configuration is rejected."""
+        with pytest.raises(ValueError):
+            HedgePolicy(percentile=100)
+        with pytest.raises(ValueError):
+            HedgePolicy(budget_ratio=-1)
+    
+    def test_no_delay_without_samples(self):
+        """Test that hedging waits for enough latency samples."""
+        tracker = LatencyTracker()
+        tracker.record(0.2)
+        assert HedgePolicy(min_samples=2).hedge_delay(tracker) is None
+    
+    def test_delay_uses_percentile_and_floor(self):
+        """Test that the hedge delay follows the tracked percentile."""
+        tracker = LatencyTracker()
+        tracker.record(0.2)
+        tracker.record(0.001)
+        
+        assert HedgePolicy(percentile=90, min_samples=1).hedge_delay(tracker) == 0.2
+        assert HedgePolicy(percentile=10, min_samples=1, min_delay=0.05).hedge_delay(tracker) == 0.05
+    
+    def test_budget_limits_hedges(self):
+        """Test that hedges are limited to the budget earned by requests."""
+        policy = HedgePolicy(budget_ratio=0.5)
+        
+        assert not policy.try_acquire()
+        policy.on_request()
+        policy.on_request()
+        assert policy.try_acquire()
+        assert not policy.try_acquire()
+        assert policy.hedges_sent == 1
@@ -0,0 +1,83 @@
+"""
+Import-time benchmark and budget for the db_knih_api package.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Cumulative microseconds allowed for "import db_knih_api" as reported by -X importtime
+IMPORT_TIME_BUDGET_US = 50_000
+
+HEAVY_MODULES = ('requests', 'bs4', 'lxml', 'soupsieve')
+
+# Public names that need an optional dependency
+OPTIONAL_DEPENDENCIES = {'BookCollection': 'numpy'}
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code, *options):
+    """Run code in a fresh interpreter from the project root."""
+    return subprocess.run(
+        [sys.executable, *options, '-c', code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure_import_time_us():
+    """Return the cumulative import time of db_knih_api in microseconds."""
+    result = run_python('import db_knih_api', '-X', 'importtime')
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == 'db_knih_api':
+            return int(parts[1])
+    raise AssertionError(f"db_knih_api not found in importtime output:\n{result.stderr}")
+
+
+class TestImportTime:
+    """Test cases for lazy package imports."""
+    
+    def test_import_does_not_load_heavy_dependencies(self):
+        """Test that importing the package does not import HTTP or HTML libraries."""
+        result = run_python(
+            'import sys, db_knih_api; '
+            f'print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+        )
+        assert result.stdout.strip() == ''
+    
+    def test_import_time_budget(self):
+        """Test that the package import stays within its time budget."""
+        # Best of three runs to reduce noise from a busy machine
+        best = min(measure_import_time_us() for _ in range(3))
+        assert best <= IMPORT_TIME_BUDGET_US, f"import db_knih_api took {best} us"
+    
+    def test_default_instance_is_created_on_first_use(self):
+        """Test that the default instance is created lazily and only once."""
+        result = run_python(
+            'import db_knih_api; '
+            'print("db_knih" in vars(db_knih_api)); '
+            'from db_knih_api import db_knih; '
+            'print(db_knih is db_knih_api.db_knih, type(db_knih).__name__)'
+        )
+        assert result.stdout.split() == ['False', 'True', 'DBKnih']
+    
+    def test_lazy_attributes_resolve(self):
+        """Test that every public name can be resolved."""
+        import importlib.util
+        import db_knih_api
+        for name in db_knih_api.__all__:
+            dependency = OPTIONAL_DEPENDENCIES.get(name)
+            if dependency and importlib.util.find_spec(dependency) is None:
+                continue
+            assert getattr(db_knih_api, name) is not None
+    
+    def test_unknown_attribute(self):
+        """Test that unknown attributes raise AttributeError."""
+        import db_knih_api
+        with pytest.raises(AttributeError):
+            db_knih_api.does_not_exist
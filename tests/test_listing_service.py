@@ -0,0 +1,165 @@
+"""
+Unit tests for the AuthorService and SeriesService classes.
+"""
+import pytest
+from unittest.mock import Mock
+
+from db_knih_api.cache import TTLCache
+from db_knih_api.exceptions import FetchError, NotFoundError
+from db_knih_api.fetcher import Fetcher
+from db_knih_api.listing_service import AuthorService, ListingService, SeriesService
+from db_knih_api.models import SearchInfo
+
+
+AUTHOR_PAGE = """
+<div id="faux"><div id="content">
+<h1>J. K. Rowling</h1>
+<div class="book">
+    <a href="/prehled-knihy/harry-potter-a-kamen-mudrcu-1"><img src="hp1.jpg" alt="Harry Potter a Kámen mudrců"></a>
+    <a href="/prehled-knihy/harry-potter-a-kamen-mudrcu-1">Harry Potter a Kámen mudrců</a>
+    <span>1997</span>
+</div>
+<div class="book">
+    <a href="/knihy/harry-potter-a-tajemna-komnata-2">Harry Potter a Tajemná komnata</a>
+    <span class="pozn">1998, J. K. Rowling (p)</span>
+</div>
+<a href="/autori/j-k-rowling-2156">J. K. Rowling</a>
+</div>
+<div id="right"><a href="/prehled-knihy/doporucena-kniha-99">Doporučená kniha</a></div></div>
+"""
+
+PAGE_TWO = """
+<div id="faux"><div id="content">
+<h1>J. K. Rowling</h1>
+<div><a href="/prehled-knihy/prazdne-misto-3">Prázdné místo</a> 2012</div>
+<div><a href="/prehled-knihy/harry-potter-a-tajemna-komnata-2">Harry Potter a Tajemná komnata</a></div>
+</div></div>
+"""
+
+
+def make_fetcher(pages):
+    """Mock fetcher serving the given pages in order, then empty pages."""
+    fetcher = Mock()
+    fetcher.create_author_books_url.side_effect = Fetcher.create_author_books_url
+    fetcher.create_series_url.side_effect = Fetcher.create_series_url
+    fetcher.fetch.side_effect = list(pages) + ["<html></html>"] * 5
+    return fetcher
+
+
+class TestListingServices:
+    """Test cases for the author and series listing services."""
+
+    def test_urls(self):
+        """Test the listing URLs of a page."""
+        assert Fetcher.create_author_books_url("j-k-rowling-2156", 2) == \
+            "https://www.databazeknih.cz/knihy-autora/j-k-rowling-2156?str=2"
+        assert Fetcher.create_series_url("harry-potter-18") == \
+            "https://www.databazeknih.cz/serie/harry-potter-18?str=1"
+
+    def test_author_page_parsed_in_one_pass(self):
+        """Test that every book of a page becomes one SearchInfo."""
+        service = AuthorService(make_fetcher([AUTHOR_PAGE]))
+
+        books = service.list_books("j-k-rowling-2156")
+
+        assert books == [
+            SearchInfo(name="Harry Potter a Kámen mudrců", cleanName="harry-potter-a-kamen-mudrcu",
+                       id=1, year=1997, author="J. K. Rowling"),
+            SearchInfo(name="Harry Potter a Tajemná komnata", cleanName="harry-potter-a-tajemna-komnata",
+                       id=2, year=1998, author="J. K. Rowling"),
+        ]
+
+    def test_pagination_stops_without_new_books(self):
+        """Test that pages are followed until one adds no new book."""
+        fetcher = make_fetcher([AUTHOR_PAGE, PAGE_TWO, PAGE_TWO])
+        service = AuthorService(fetcher)
+
+        books = service.list_books("j-k-rowling-2156")
+
+        assert [book.id for book in books] == [1, 2, 3]
+        assert books[2].year == 2012
+        assert fetcher.fetch.call_count == 3
+
+    def test_iter_books_is_lazy(self):
+        """Test that later pages are only fetched when iteration reaches them."""
+        fetcher = make_fetcher([AUTHOR_PAGE, PAGE_TWO])
+        books = AuthorService(fetcher).iter_books("j-k-rowling-2156")
+
+        assert next(books).id == 1
+        assert fetcher.fetch.call_count == 1
+
+    def test_max_pages(self):
+        """Test that max_pages bounds the number of requests."""
+        fetcher = make_fetcher([AUTHOR_PAGE, PAGE_TWO])
+
+        books = AuthorService(fetcher).list_books("j-k-rowling-2156", max_pages=1)
+
+        assert len(books) == 2
+        assert fetcher.fetch.call_count == 1
+
+    def test_rotating_pages_stop_at_page_cap(self):
+        """Test that a listing whose every page adds new books stops after MAX_PAGES pages."""
+        fetcher = make_fetcher([])
+        fetcher.fetch.side_effect = lambda url: (
+            '<div id="faux"><div id="content">'
+            f'<a href="/prehled-knihy/kniha-{url.rsplit("=", 1)[1]}">Kniha</a></div></div>'
+        )
+        service = AuthorService(fetcher)
+        service.MAX_PAGES = 5
+
+        assert len(service.list_books("j-k-rowling-2156")) == 5
+        assert fetcher.fetch.call_count == 5
+
+    def test_series_keeps_item_authors(self):
+        """Test that series items take the author from their note, not the heading."""
+        page = """
+        <div id="faux"><div id="content">
+        <h1>Zaklínač</h1>
+        <p class="new"><a class="new" href="/prehled-knihy/posledni-prani-10">Poslední přání</a>
+        <span class="pozn">1993, Andrzej Sapkowski (p)</span></p>
+        </div></div>
+        """
+        fetcher = make_fetcher([page])
+
+        books = SeriesService(fetcher).list_books("zaklinac-5")
+
+        assert books[0].author == "Andrzej Sapkowski"
+        fetcher.fetch.assert_any_call("https://www.databazeknih.cz/serie/zaklinac-5?str=1")
+
+    def test_fetch_error_is_raised(self):
+        """Test that a failed page raises instead of truncating the cached listing."""
+        fetcher = make_fetcher([AUTHOR_PAGE, FetchError("url", "Server error", 503), AUTHOR_PAGE, PAGE_TWO])
+        service = AuthorService(fetcher, cache=TTLCache(ttl=60))
+
+        with pytest.raises(FetchError):
+            service.list_books("j-k-rowling-2156")
+
+        books = service.list_books("j-k-rowling-2156")
+
+        assert [book.id for book in books] == [1, 2, 3]
+
+    def test_missing_page_ends_listing(self):
+        """Test that a missing later page ends the listing but a missing listing raises."""
+        fetcher = make_fetcher([AUTHOR_PAGE, NotFoundError("url", "Not found", 404)])
+
+        assert len(AuthorService(fetcher).list_books("j-k-rowling-2156")) == 2
+
+        fetcher = make_fetcher([NotFoundError("url", "Not found", 404)])
+        with pytest.raises(NotFoundError):
+            SeriesService(fetcher).list_books("zaklinac-5")
+
+    def test_base_class_is_abstract(self):
+        """Test that the listing base class cannot be instantiated."""
+        with pytest.raises(TypeError):
+            ListingService(Mock())
+
+    def test_cache(self):
+        """Test that complete listings are cached by their identifier."""
+        fetcher = make_fetcher([AUTHOR_PAGE])
+        service = AuthorService(fetcher, cache=TTLCache(ttl=60))
+
+        first = service.list_books("j-k-rowling-2156")
+        second = service.list_books("j-k-rowling-2156")
+
+        assert first == second
+        assert fetcher.fetch.call_count == 2
@@ -0,0 +1,155 @@
+"""
+Unit tests for the stub server and the load driver.
+"""
+import argparse
+import random
+import time
+
+import pytest
+
+from db_knih_api import BookService, Fetcher, NotFoundError, SearchService
+from db_knih_api.exceptions import FetchError
+from db_knih_api.loadtest import main, parse_latency, run_load
+from db_knih_api.stub_server import (BOOK_PAGE, StubConfig, StubServer, constant, load_recorded,
+                                     lognormal, record_pages)
+
+
+@pytest.fixture
+def server():
+    with StubServer(seed=1, books=50) as stub:
+        yield stub
+
+
+class TestStubServer:
+    """Test cases for the StubServer class."""
+
+    def test_serves_pages_the_services_parse(self, server):
+        """Test that synthetic search, overview and more-info pages are parsed completely."""
+        fetcher = Fetcher(session=server.session())
+
+        results = SearchService(fetcher).search("harry potter")
+        info = BookService(fetcher).get_book_info(server.book_link(12))
+
+        assert len(results) == 10
+        assert all(result.id and result.cleanName and result.year for result in results)
+        assert info.author == "Autor 12"
+        assert info.genres == ["Žánr 5", "Román"]
+        assert info.pages == 112
+        assert info.rating == 62
+        assert info.complete
+        assert len(info.reviews) == 3
+
+    def test_unknown_book_is_not_found(self, server):
+        """Test that ids outside the catalog answer 404."""
+        fetcher = Fetcher(session=server.session())
+
+        with pytest.raises(NotFoundError):
+            fetcher.fetch(fetcher.create_book_info_url(server.book_link(51)))
+        assert server.stats() == {404: 1}
+
+    def test_review_pages_end(self, server):
+        """Test that review pages past the last one are empty."""
+        service = BookService(Fetcher(session=server.session()))
+
+        reviews = list(service.iter_reviews(server.book_link(3)))
+
+        assert len(reviews) == 30
+
+    def test_injects_throttling_and_errors(self):
+        """Test that faults are injected at the configured rates, with Retry-After on 429s."""
+        config = StubConfig(throttle_rate=0.3, error_rate=0.3, retry_after=7)
+        with StubServer(config, seed=3) as server:
+            session = server.session()
+            responses = [session.get(Fetcher.create_book_info_url(server.book_link(1))) for _ in range(100)]
+
+        statuses = server.stats()
+        assert statuses[429] + statuses[503] + statuses[200] == 100
+        assert 15 < statuses[429] < 45 and 15 < statuses[503] < 45
+        assert all(r.headers["Retry-After"] == "7" for r in responses if r.status_code == 429)
+
+    def test_page_config_overrides_kind(self):
+        """Test that a per-kind config only applies to that page kind."""
+        with StubServer(page_configs={BOOK_PAGE: StubConfig(error_rate=1.0)}) as server:
+            fetcher = Fetcher(session=server.session())
+
+            assert SearchService(fetcher).search("test")
+            with pytest.raises(FetchError) as exc_info:
+                fetcher.fetch(fetcher.create_book_info_url(server.book_link(1)))
+
+        assert exc_info.value.status_code == 503
+
+    def test_latency_and_slow_body(self):
+        """Test that latency delays the headers and slow bodies trickle in."""
+        config = StubConfig(latency=constant(0.05), slow_body_rate=1.0, slow_body_duration=0.1)
+        with StubServer(config) as server:
+            started_at = time.monotonic()
+            html = server.session().get(Fetcher.create_book_info_url(server.book_link(1))).text
+            elapsed = time.monotonic() - started_at
+
+        assert 'id="content"' in html
+        assert elapsed >= 0.13
+
+    def test_recorded_pages(self, tmp_path):
+        """Test that recorded pages round-trip through disk and replace synthetic ones."""
+        url = Fetcher.create_search_url("harry potter")
+        with StubServer() as live:
+            record_pages([url], str(tmp_path), Fetcher(session=live.session()))
+        recorded = load_recorded(str(tmp_path))
+        recorded["/search?q=harry%20potter"] = '<p class="new"><a class="new" href="/prehled-knihy/x-1">X</a></p>'
+
+        with StubServer(recorded=recorded) as server:
+            results = SearchService(Fetcher(session=server.session())).search("harry potter")
+
+        assert list(recorded) == ["/search?q=harry%20potter"]
+        assert [result.name for result in results] == ["X"]
+
+    def test_lognormal_percentiles(self):
+        """Test that the lognormal distribution matches its median and p99."""
+        rng = random.Random(0)
+        samples = sorted(lognormal(0.1, 1.0)(rng) for _ in range(20000))
+
+        assert samples[10000] == pytest.approx(0.1, rel=0.05)
+        assert samples[19800] == pytest.approx(1.0, rel=0.15)
+        with pytest.raises(ValueError):
+            lognormal(0.5, 0.1)
+
+
+class TestLoadDriver:
+    """Test cases for the load driver."""
+
+    @pytest.mark.parametrize("workload", ["fetch", "search", "book", "search_many"])
+    def test_workloads(self, server, workload):
+        """Test that every workload completes and reports latency percentiles."""
+        report = run_load(workload, server, calls=20, concurrency=4, batch_size=3, seed=0)
+
+        assert report.calls == 20
+        assert report.errors == 0
+        assert report.throughput > 0
+        assert report.p50 <= report.p95 <= report.p99
+        assert report.server_statuses[200] >= 20
+        assert workload in report.summary()
+
+    def test_counts_failed_calls(self):
+        """Test that calls failing on injected errors count as errors."""
+        with StubServer(StubConfig(error_rate=1.0)) as server:
+            report = run_load("book", server, calls=10, concurrency=2)
+
+        assert report.errors == 10
+        assert report.server_statuses == {503: 10}
+
+    def test_parse_latency(self):
+        """Test the command line latency specifications."""
+        rng = random.Random(0)
+
+        assert parse_latency("0.2")(rng) == 0.2
+        assert 0.1 <= parse_latency("uniform:0.1,0.3")(rng) <= 0.3
+        assert parse_latency("lognormal:0.05,0.5")(rng) > 0
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_latency("gamma:1,2")
+
+    def test_main(self, capsys):
+        """Test the command line entry point."""
+        assert main(["search", "book", "-n", "5", "--books", "20", "--seed", "1"]) == 0
+
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split(":")[0] for line in lines] == ["search", "book"]
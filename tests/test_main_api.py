@@ -69,3 +69,48 @@ class TestDBKnih:
         result = api.get_book_info("invalid-book")
         
         assert result is None
+    
+    def test_iter_reviews(self):
+        """Test that review iteration is delegated to the book service."""
+        mock_book_service = Mock()
+        
+        api = DBKnih(book_service=mock_book_service)
+        result = api.iter_reviews("test-book-123", limit=10)
+        
+        assert result is mock_book_service.iter_reviews.return_value
+        mock_book_service.iter_reviews.assert_called_once_with(
+            "test-book-123", cursor=None, limit=10, max_workers=4
+        )
+    
+    def test_search_many_collapses_and_merges(self):
+        """Test that equivalent queries are fetched once, by their first spelling, and merged by id."""
+        mock_search_service = Mock()
+        results = {
+            "Harry  Potter": [SearchInfo(name="HP 1", id=1), SearchInfo(name="HP 2", id=2)],
+            "hobit": [SearchInfo(name="Hobit", id=3), SearchInfo(name="HP 1", id=1)],
+        }
+        mock_search_service.search.side_effect = lambda query: results[query]
+        
+        api = DBKnih(search_service=mock_search_service)
+        result = api.search_many(["Harry  Potter", "hobit", "harry potter "])
+        
+        assert sorted(call.args[0] for call in mock_search_service.search.call_args_list) == [
+            "Harry  Potter", "hobit"
+        ]
+        assert result.results["Harry  Potter"] == results["Harry  Potter"]
+        assert result.results["harry potter "] == results["Harry  Potter"]
+        assert result.results["hobit"] == results["hobit"]
+        assert [info.id for info in result.merged] == [1, 2, 3]
+        # Each query gets its own list
+        result.results["Harry  Potter"].clear()
+        assert len(result.results["harry potter "]) == 2
+    
+    def test_search_many_keeps_results_without_id(self):
+        """Test that results without an id are never merged away."""
+        mock_search_service = Mock()
+        mock_search_service.search.return_value = [SearchInfo(name="A"), SearchInfo(name="B")]
+        
+        api = DBKnih(search_service=mock_search_service)
+        result = api.search_many(["query"])
+        
+        assert len(result.merged) == 2
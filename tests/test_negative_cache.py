@@ -0,0 +1,122 @@
+"""
+Unit tests for the NegativeCache class and its use by BookService.
+"""
+from unittest.mock import Mock
+
+from db_knih_api.book_service import BookService
+from db_knih_api.exceptions import FetchError, NotFoundError
+from db_knih_api.negative_cache import NOT_FOUND, UNPARSEABLE, NegativeCache, NegativeCacheStats
+
+
+class FakeClock:
+    """Manually advanced clock."""
+    
+    def __init__(self):
+        self.now = 1_000_000.0
+    
+    def __call__(self):
+        return self.now
+
+
+def make_fetcher(fetch_side_effect):
+    """Create a mock fetcher whose fetch follows the given side effect."""
+    mock_fetcher = Mock()
+    mock_fetcher.create_book_info_url.side_effect = lambda link: f"book/{link}"
+    mock_fetcher.create_additional_book_info_url.side_effect = lambda book_id: f"more/{book_id}"
+    mock_fetcher.fetch.side_effect = fetch_side_effect
+    return mock_fetcher
+
+
+class TestNegativeCache:
+    """Test cases for the NegativeCache class."""
+    
+    def test_add_and_get(self):
+        """Test remembering links, keyed by book id."""
+        cache = NegativeCache()
+        cache.add("stara-kniha-42")
+        cache.add("no-id-link", UNPARSEABLE)
+        
+        assert cache.get("nove-jmeno-42") == NOT_FOUND
+        assert cache.get("no-id-link") == UNPARSEABLE
+        assert cache.get("jina-kniha-43") is None
+        assert "stara-kniha-42" in cache
+        assert cache.stats() == NegativeCacheStats(hits=2, misses=1, size=2, recorded=2)
+    
+    def test_entries_expire(self):
+        """Test that misses are only remembered for the TTL."""
+        clock = FakeClock()
+        cache = NegativeCache(ttl=60, clock=clock)
+        cache.add("kniha-1")
+        
+        clock.now += 60
+        
+        assert cache.get("kniha-1") is None
+        assert cache.stats().expirations == 1
+    
+    def test_discard(self):
+        """Test forgetting a link."""
+        cache = NegativeCache()
+        cache.add("kniha-1")
+        cache.discard("kniha-1")
+        
+        assert len(cache) == 0
+    
+    def test_save_and_load(self, tmp_path):
+        """Test persisting the cache, dropping entries that expired meanwhile."""
+        clock = FakeClock()
+        cache = NegativeCache(ttl=60, clock=clock)
+        cache.add("kniha-1")
+        cache.add("kniha-2", UNPARSEABLE, ttl=10)
+        path = tmp_path / "negative.json"
+        cache.save(str(path))
+        
+        clock.now += 30
+        loaded = NegativeCache.load(str(path), clock=clock)
+        
+        assert len(loaded) == 1
+        assert loaded.get("kniha-1") == NOT_FOUND
+        clock.now += 30
+        assert loaded.get("kniha-1") is None
+
+
+class TestBookServiceNegativeCache:
+    """Test cases for BookService with a negative cache."""
+    
+    def test_not_found_is_remembered(self):
+        """Test that a 404 overview page is fetched only once."""
+        mock_fetcher = make_fetcher(NotFoundError("book/kniha-1", "404 Not Found", 404))
+        cache = NegativeCache()
+        service = BookService(mock_fetcher, negative_cache=cache)
+        
+        assert service.get_book_info("kniha-1") is None
+        assert service.get_book_info("kniha-1") is None
+        
+        mock_fetcher.fetch.assert_called_once_with("book/kniha-1")
+        assert cache.get("kniha-1") == NOT_FOUND
+        assert cache.stats().recorded == 1
+    
+    def test_unparseable_page_is_remembered(self):
+        """Test that a page without book content is parsed only once."""
+        mock_fetcher = make_fetcher(["<html></html>"])
+        mock_fetcher.fetch_page.return_value = "<html></html>"
+        cache = NegativeCache()
+        service = BookService(mock_fetcher, negative_cache=cache)
+        
+        assert service.get_book_info("kniha-1") is None
+        assert service.get_book_info("kniha-1") is None
+        
+        mock_fetcher.fetch.assert_called_once_with("book/kniha-1")
+        mock_fetcher.fetch_page.assert_called_once_with("more/1")
+        assert cache.get("kniha-1") == UNPARSEABLE
+    
+    def test_other_errors_are_not_remembered(self):
+        """Test that server and network errors are retried on the next call."""
+        mock_fetcher = make_fetcher(FetchError("book/kniha-1", "503 Service Unavailable", 503))
+        cache = NegativeCache()
+        service = BookService(mock_fetcher, negative_cache=cache)
+        
+        assert service.get_book_info("kniha-1") is None
+        assert service.get_book_info("kniha-1") is None
+        
+        assert mock_fetcher.fetch.call_count == 2
+        assert len(cache) == 0
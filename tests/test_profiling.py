@@ -0,0 +1,137 @@
+"""
+Unit tests for the profiling mode.
+"""
+import pstats
+import threading
+import time
+
+import pytest
+from unittest.mock import Mock
+
+from db_knih_api import DBKnih
+from db_knih_api.profiling import PROFILE_ENV_VAR, Profiler
+
+
+def busy_parse(seconds):
+    """Burn CPU for the given time, standing in for HTML parsing."""
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+class TestProfiler:
+    """Test cases for the Profiler class."""
+    
+    def test_invalid_interval(self):
+        """Test that the sampling interval must be positive."""
+        with pytest.raises(ValueError):
+            Profiler(sample_interval=0)
+    
+    def test_aggregates_calls_across_threads(self):
+        """Test that stats and stacks of calls in several threads are merged."""
+        profiler = Profiler(sample_interval=0.001)
+        
+        def call():
+            with profiler.profile():
+                busy_parse(0.05)
+        
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        profiler.close()
+        
+        assert profiler.calls == 3
+        functions = {name for _, _, name in profiler.stats().stats}
+        assert "busy_parse" in functions
+        assert any("busy_parse (test_profiling.py" in stack for stack in profiler.collapsed_stacks())
+    
+    def test_nested_blocks_count_once(self):
+        """Test that a profiled call inside another one is not profiled twice."""
+        profiler = Profiler()
+        with profiler.profile():
+            with profiler.profile():
+                busy_parse(0.001)
+        profiler.close()
+        
+        assert profiler.calls == 1
+    
+    def test_sampler_runs_only_while_profiling(self):
+        """Test that the sampling thread exits after the last call and restarts with the next one."""
+        profiler = Profiler(sample_interval=0.001)
+        
+        def sampler_running():
+            return any(thread.name == "db-knih-profiler" for thread in threading.enumerate())
+        
+        for _ in range(2):
+            with profiler.profile():
+                busy_parse(0.02)
+                assert sampler_running()
+            deadline = time.monotonic() + 1
+            while sampler_running() and time.monotonic() < deadline:
+                time.sleep(0.001)
+            assert not sampler_running()
+        profiler.close()
+        
+        assert any("busy_parse (test_profiling.py" in stack for stack in profiler.collapsed_stacks())
+    
+    def test_dump(self, tmp_path):
+        """Test writing the pstats and collapsed stack files."""
+        profiler = Profiler(sample_interval=0.001)
+        with profiler.profile():
+            busy_parse(0.05)
+        profiler.close()
+        
+        stats_path, collapsed_path = profiler.dump(str(tmp_path))
+        
+        assert pstats.Stats(stats_path).total_calls > 0
+        line = open(collapsed_path, encoding="utf-8").readline()
+        stack, count = line.rsplit(" ", 1)
+        assert ";" in stack
+        assert int(count) > 0
+    
+    def test_from_setting(self, monkeypatch, tmp_path):
+        """Test the profile argument values and the environment variable."""
+        profiler = Profiler()
+        assert Profiler.from_setting(profiler) is profiler
+        assert Profiler.from_setting(False) is None
+        assert Profiler.from_setting(True).output_dir is None
+        
+        monkeypatch.delenv(PROFILE_ENV_VAR, raising=False)
+        assert Profiler.from_setting(None) is None
+        monkeypatch.setenv(PROFILE_ENV_VAR, "0")
+        assert Profiler.from_setting(None) is None
+        monkeypatch.setenv(PROFILE_ENV_VAR, "1")
+        assert Profiler.from_setting(None).output_dir is None
+        
+        monkeypatch.setenv(PROFILE_ENV_VAR, str(tmp_path))
+        shared = Profiler.from_setting(None)
+        assert shared.output_dir == str(tmp_path)
+        assert Profiler.from_setting(None) is shared
+        assert Profiler.from_setting(str(tmp_path)) is shared
+    
+    def test_dbknih_profiles_calls(self):
+        """Test that DBKnih profiles search and get_book_info calls."""
+        book_service = Mock()
+        book_service.get_book_info.side_effect = lambda link: busy_parse(0.001)
+        search_service = Mock()
+        search_service.search.return_value = []
+        profiler = Profiler()
+        api = DBKnih(book_service, search_service, profile=profiler)
+        
+        api.search("hobit")
+        api.get_book_info("hobit-1")
+        api.search_many(["a", "b"])
+        profiler.close()
+        
+        assert profiler.calls == 4
+        assert "busy_parse" in {name for _, _, name in profiler.stats().stats}
+    
+    def test_dbknih_profiling_off_by_default(self, monkeypatch):
+        """Test that no profiler is created without a setting."""
+        monkeypatch.delenv(PROFILE_ENV_VAR, raising=False)
+        
+        assert DBKnih(Mock(), Mock()).profiler is None
@@ -0,0 +1,88 @@
+"""
+Unit tests for the RateLimiter class.
+"""
+import pytest
+
+from db_knih_api.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """Manually advanced clock whose sleep moves time forward."""
+    
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiter:
+    """Test cases for the RateLimiter class."""
+    
+    def test_invalid_arguments(self):
+        """Test that invalid configuration is rejected."""
+        with pytest.raises(ValueError):
+            RateLimiter(0)
+        with pytest.raises(ValueError):
+            RateLimiter(1, burst=0)
+    
+    def test_burst_does_not_wait(self):
+        """Test that requests within the burst are not delayed."""
+        clock = FakeClock()
+        limiter = RateLimiter(2, burst=3, clock=clock, sleep=clock.sleep)
+        
+        for _ in range(3):
+            limiter.acquire()
+        
+        assert clock.sleeps == []
+    
+    def test_waits_when_exhausted(self):
+        """Test that requests beyond the burst wait for a token."""
+        clock = FakeClock()
+        limiter = RateLimiter(2, burst=1, clock=clock, sleep=clock.sleep)
+        
+        limiter.acquire()
+        limiter.acquire()
+        
+        assert clock.sleeps == [0.5]
+        assert clock.now == 0.5
+    
+    def test_tokens_refill_over_time(self):
+        """Test that idle time refills the bucket."""
+        clock = FakeClock()
+        limiter = RateLimiter(1, burst=1, clock=clock, sleep=clock.sleep)
+        
+        limiter.acquire()
+        clock.now += 1.0
+        limiter.acquire()
+        
+        assert clock.sleeps == []
+    
+    def test_try_acquire_does_not_wait(self):
+        """Test that try_acquire fails instead of sleeping once the burst is spent."""
+        clock = FakeClock()
+        limiter = RateLimiter(2, burst=1, clock=clock, sleep=clock.sleep)
+        
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        assert limiter.time_until_available() == pytest.approx(0.5)
+        
+        clock.now += 0.5
+        assert limiter.try_acquire()
+        assert clock.sleeps == []
+    
+    def test_acquire_gives_up_at_timeout(self):
+        """Test that acquire returns False without waiting past its timeout."""
+        clock = FakeClock()
+        limiter = RateLimiter(0.5, burst=1, clock=clock, sleep=clock.sleep)
+        
+        assert limiter.acquire(timeout=0)
+        assert not limiter.acquire(timeout=1)
+        assert clock.sleeps == [1]
+        assert limiter.acquire(timeout=1)
+        assert clock.now == 2
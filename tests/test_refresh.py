@@ -0,0 +1,61 @@
+"""
+Unit tests for the refresh fingerprint cache and change detection.
+"""
+import pytest
+
+from db_knih_api.models import BookInfo, Review
+from db_knih_api.refresh import (
+    RefreshCache,
+    RefreshEntry,
+    book_info_from_dict,
+    diff_book_info,
+    fingerprint,
+)
+
+
+class TestRefresh:
+    """Test cases for the refresh helpers."""
+    
+    def test_fingerprint_is_stable(self):
+        """Test that identical content has identical fingerprints."""
+        assert fingerprint("<html>ž</html>") == fingerprint("<html>ž</html>")
+        assert fingerprint("<html>a</html>") != fingerprint("<html>b</html>")
+    
+    def test_diff_no_changes(self):
+        """Test that identical book info produces no change."""
+        info = BookInfo(rating=80.0, reviews=[Review(text="a")])
+        assert diff_book_info("book-1", info, BookInfo(rating=80.0, reviews=[Review(text="a")])) is None
+    
+    def test_diff_changed_fields_and_new_reviews(self):
+        """Test that changed fields and new reviews are reported."""
+        old = BookInfo(rating=80.0, numberOfRatings=10, reviews=[Review(text="a")])
+        new = BookInfo(rating=81.0, numberOfRatings=10, reviews=[Review(text="b"), Review(text="a")])
+        
+        change = diff_book_info("book-1", old, new)
+        
+        assert change.book_link == "book-1"
+        assert change.info is new
+        assert change.changes == {"rating": (80.0, 81.0)}
+        assert change.new_reviews == [Review(text="b")]
+    
+    def test_diff_new_book(self):
+        """Test that a book without previous info reports its populated fields."""
+        change = diff_book_info("book-1", None, BookInfo(year=2020))
+        assert change.changes == {"year": (None, 2020)}
+    
+    def test_save_and_load(self, tmp_path):
+        """Test that the cache round-trips through a JSON file."""
+        cache = RefreshCache()
+        info = BookInfo(author="Autor", genres=["Fantasy"], reviews=[Review(text="Skvělé", rating=5.0)])
+        cache.put("book-1", RefreshEntry(fingerprints={"url": "abc"}, info=info))
+        
+        path = tmp_path / "refresh.json"
+        cache.save(str(path))
+        loaded = RefreshCache.load(str(path))
+        
+        assert len(loaded) == 1
+        assert loaded.get("book-1") == RefreshEntry(fingerprints={"url": "abc"}, info=info)
+    
+    def test_book_info_from_dict_ignores_unknown_keys(self):
+        """Test that unknown keys do not break deserialization."""
+        assert book_info_from_dict({"year": 2000, "unknown": 1}) == BookInfo(year=2000)
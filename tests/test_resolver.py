@@ -0,0 +1,159 @@
+"""
+Unit tests for the resolver index and the Resolver class.
+"""
+import pytest
+from unittest.mock import Mock
+
+from db_knih_api import DBKnih
+from db_knih_api.models import BookInfo, SearchInfo
+from db_knih_api.resolver import Resolver, ResolverIndex, normalize_isbn, split_isbns
+
+
+def make_book(isbn):
+    return BookInfo(year=2000, author="Autor", isbn=isbn)
+
+
+class TestIsbn:
+    """Test cases for ISBN normalization."""
+    
+    def test_normalize_isbn(self):
+        """Test that ISBN-10 and ISBN-13 normalize to the same key."""
+        assert normalize_isbn("80-7197-197-7") == "9788071971979"
+        assert normalize_isbn("978 80 7197 197 9") == "9788071971979"
+        assert normalize_isbn("harry potter") is None
+        assert normalize_isbn("12345") is None
+    
+    def test_split_isbns(self):
+        """Test extracting several ISBNs from one field."""
+        assert split_isbns("978-80-7197-197-9, 80-7197-197-7 (váz.)") == ["9788071971979"]
+        assert split_isbns("978-80-00-01234-5; 80-200-0960-X") == ["9788000012345", "9788020009609"]
+        assert split_isbns(None) == []
+
+
+class TestResolverIndex:
+    """Test cases for the ResolverIndex class."""
+    
+    def test_learn_and_lookup(self):
+        """Test learning titles and ISBNs and looking them up."""
+        index = ResolverIndex()
+        index.learn_search_infos([SearchInfo(name="Krakatit", id=42, cleanName="krakatit", year=1924, author="Karel Čapek")])
+        index.learn_book_info("krakatit-42", make_book("80-7197-197-7"))
+        
+        assert index.lookup_title("KRAKATIT") == 42
+        assert index.lookup_title(" krakatit ", "Karel Capek") == 42
+        assert index.lookup_title("Krakatit", "Someone Else") is None
+        assert index.lookup_isbn("978-80-7197-197-9") == 42
+        assert index.lookup_isbn("9780000000000") is None
+    
+    def test_ambiguous_title(self):
+        """Test that a title shared by several books needs the author."""
+        index = ResolverIndex()
+        index.learn_search_infos([
+            SearchInfo(name="Bouře", id=1, cleanName="boure", year=2000, author="Autor A"),
+            SearchInfo(name="Bouře", id=2, cleanName="boure", year=2010, author="Autor B"),
+        ])
+        
+        assert index.lookup_title("Bouře") is None
+        assert index.lookup_title("Bouře", "Autor B") == 2
+    
+    def test_ignores_results_without_id(self):
+        """Test that results without id or link without id are not learned."""
+        index = ResolverIndex()
+        index.learn_search_info(SearchInfo(name="Krakatit", id=None, cleanName=None, year=None, author=None))
+        index.learn_book_info("no-id-here", make_book("80-7197-197-7"))
+        
+        assert len(index) == 0
+    
+    def test_save_and_load(self, tmp_path):
+        """Test persisting the index to JSON."""
+        index = ResolverIndex()
+        index.learn_search_info(SearchInfo(name="Krakatit", id=42, cleanName="krakatit", year=1924, author="Karel Čapek"))
+        index.learn_book_info("krakatit-42", make_book("80-7197-197-7"))
+        path = tmp_path / "index.json"
+        index.save(str(path))
+        
+        loaded = ResolverIndex.load(str(path))
+        
+        assert len(loaded) == len(index)
+        assert loaded.lookup_title("krakatit", "karel capek") == 42
+        assert loaded.lookup_isbn("80-7197-197-7") == 42
+
+
+class TestResolver:
+    """Test cases for the Resolver class."""
+    
+    def test_hit_does_not_use_network(self):
+        """Test that known identifiers are resolved from the index."""
+        index = ResolverIndex()
+        index.learn_search_info(SearchInfo(name="Krakatit", id=42, cleanName="krakatit", year=1924, author="Karel Čapek"))
+        search_service = Mock()
+        
+        resolver = Resolver(index, search_service=search_service)
+        
+        assert resolver.resolve("Krakatit") == 42
+        search_service.search.assert_not_called()
+    
+    def test_title_miss_searches(self):
+        """Test that a title miss searches and learns the results."""
+        search_service = Mock()
+        search_service.search.return_value = [SearchInfo(name="Krakatit", id=42, cleanName="krakatit", year=1924, author="Karel Čapek")]
+        resolver = Resolver(search_service=search_service)
+        
+        assert resolver.resolve(("Krakatit", "Karel Čapek")) == 42
+        assert resolver.resolve("krakatit") == 42
+        search_service.search.assert_called_once_with("Krakatit")
+    
+    def test_isbn_miss_confirms_candidates(self):
+        """Test that an ISBN miss fetches candidate details to confirm the ISBN."""
+        search_service = Mock()
+        search_service.search.return_value = [
+            SearchInfo(name="Jiná kniha", id=7, cleanName="jina-kniha", year=2001, author="X"),
+            SearchInfo(name="Krakatit", id=42, cleanName="krakatit", year=1924, author="Karel Čapek"),
+        ]
+        book_service = Mock()
+        book_service.get_book_info.side_effect = [make_book("978-80-00-01234-5"), make_book("80-7197-197-7")]
+        resolver = Resolver(search_service=search_service, book_service=book_service)
+        
+        assert resolver.resolve("80-7197-197-7") == 42
+        search_service.search.assert_called_once_with("9788071971979")
+        assert resolver.index.lookup_isbn("9788000012345") == 7
+    
+    def test_isbn_miss_without_book_service(self):
+        """Test that ISBNs cannot be confirmed without a book service."""
+        search_service = Mock()
+        search_service.search.return_value = []
+        resolver = Resolver(search_service=search_service)
+        
+        assert resolver.resolve_isbn("80-7197-197-7") is None
+    
+    def test_resolve_many(self):
+        """Test bulk resolution with hits, misses and duplicates."""
+        index = ResolverIndex()
+        index.learn_book_info("krakatit-42", make_book("80-7197-197-7"))
+        search_service = Mock()
+        search_service.search.return_value = [SearchInfo(name="Bílá nemoc", id=43, cleanName="bila-nemoc", year=1937, author="Karel Čapek")]
+        resolver = Resolver(index, search_service=search_service)
+        
+        results = resolver.resolve_many(["80-7197-197-7", "Bílá nemoc", "Bílá nemoc", "Neznámá"])
+        
+        assert results == {"80-7197-197-7": 42, "Bílá nemoc": 43, "Neznámá": None}
+        assert search_service.search.call_count == 2
+    
+    def test_resolve_many_offline(self):
+        """Test that without a search service misses stay unresolved."""
+        assert Resolver().resolve_many(["Krakatit"]) == {"Krakatit": None}
+    
+    def test_dbknih_feeds_index(self):
+        """Test that DBKnih teaches its resolver from fetched data."""
+        book_service = Mock()
+        book_service.get_book_info.return_value = make_book("80-7197-197-7")
+        search_service = Mock()
+        search_service.search.return_value = [SearchInfo(name="Krakatit", id=42, cleanName="krakatit", year=1924, author="Karel Čapek")]
+        resolver = Resolver()
+        api = DBKnih(book_service, search_service, resolver=resolver)
+        
+        api.search("krakatit")
+        api.get_book_info("krakatit-42")
+        
+        assert resolver.resolve("Krakatit") == 42
+        assert resolver.resolve("9788071971979") == 42
@@ -0,0 +1,72 @@
+"""
+Unit tests for retry policies.
+"""
+import pytest
+from unittest.mock import Mock
+
+from db_knih_api.exceptions import CircuitOpenError, DeadlineExceededError, FetchError
+from db_knih_api.retry import RetryPolicy, is_retryable
+
+
+class TestIsRetryable:
+    """Test cases for retryable error classification."""
+    
+    def test_network_and_server_errors_are_retryable(self):
+        """Test that transient failures are retried."""
+        assert is_retryable(FetchError("url", "timeout"))
+        assert is_retryable(FetchError("url", "throttled", 429))
+        assert is_retryable(FetchError("url", "unavailable", 503))
+    
+    def test_permanent_errors_are_not_retryable(self):
+        """Test that permanent failures are not retried."""
+        assert not is_retryable(FetchError("url", "not found", 404))
+        assert not is_retryable(CircuitOpenError("url", "open"))
+        assert not is_retryable(DeadlineExceededError("url", "late"))
+        assert not is_retryable(ValueError("bug"))
+
+
+class TestRetryPolicy:
+    """Test cases for the RetryPolicy class."""
+    
+    def test_invalid_attempts(self):
+        """Test that at least one attempt is required."""
+        with pytest.raises(ValueError):
+            RetryPolicy(max_attempts=0)
+    
+    def test_exponential_delay_without_jitter(self):
+        """Test exponential backoff capped by the maximum delay."""
+        policy = RetryPolicy(base_delay=1, multiplier=2, max_delay=5, jitter=False)
+        assert [policy.delay(retry) for retry in range(1, 5)] == [1, 2, 4, 5]
+    
+    def test_jitter_scales_delay(self):
+        """Test that jitter picks a delay between zero and the backoff."""
+        policy = RetryPolicy(base_delay=2, rand=lambda: 0.25)
+        assert policy.delay(2) == 1.0
+    
+    def test_call_retries_until_success(self):
+        """Test that retryable errors are retried with backoff sleeps."""
+        sleep = Mock()
+        func = Mock(side_effect=[FetchError("url", "down"), FetchError("url", "down", 502), "ok"])
+        policy = RetryPolicy(max_attempts=3, base_delay=1, jitter=False, sleep=sleep)
+        
+        assert policy.call(func, "url") == "ok"
+        assert func.call_count == 3
+        assert [call.args[0] for call in sleep.call_args_list] == [1, 2]
+    
+    def test_call_gives_up_after_max_attempts(self):
+        """Test that the last error is raised when attempts run out."""
+        func = Mock(side_effect=FetchError("url", "down"))
+        policy = RetryPolicy(max_attempts=2, sleep=Mock())
+        
+        with pytest.raises(FetchError):
+            policy.call(func)
+        assert func.call_count == 2
+    
+    def test_call_does_not_retry_permanent_errors(self):
+        """Test that non-retryable errors are raised immediately."""
+        func = Mock(side_effect=FetchError("url", "not found", 404))
+        policy = RetryPolicy(max_attempts=3, sleep=Mock())
+        
+        with pytest.raises(FetchError):
+            policy.call(func)
+        assert func.call_count == 1
@@ -0,0 +1,205 @@
+"""
+Unit tests for the RequestScheduler class.
+"""
+import threading
+import time
+
+import pytest
+from unittest.mock import Mock
+
+from db_knih_api import DBKnih
+from db_knih_api.exceptions import DeadlineExceededError
+from db_knih_api.fetcher import Fetcher
+from db_knih_api.rate_limiter import RateLimiter
+from db_knih_api.scheduler import Priority, RequestScheduler, current_scheduling, scheduling
+
+
+class FakeClock:
+    """Manually advanced clock."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def queue_requests(scheduler, requests, order):
+    """Start one thread per (priority, tenant) and wait until each is queued."""
+    threads = []
+    for priority, tenant in requests:
+        waiting = sum(stats.waiting for stats in scheduler.stats().values())
+        
+        def worker(priority=priority, tenant=tenant):
+            with scheduler.slot(priority, tenant):
+                order.append((priority, tenant))
+        
+        thread = threading.Thread(target=worker)
+        thread.start()
+        threads.append(thread)
+        while sum(stats.waiting for stats in scheduler.stats().values()) == waiting:
+            time.sleep(0.001)
+    return threads
+
+
+def run_queued(scheduler, requests):
+    """Queue requests behind a held slot, release it and return the dispatch order."""
+    order = []
+    scheduler.acquire()
+    threads = queue_requests(scheduler, requests, order)
+    scheduler.release()
+    for thread in threads:
+        thread.join(timeout=5)
+    return order
+
+
+class TestRequestScheduler:
+    """Test cases for the RequestScheduler class."""
+    
+    def test_invalid_arguments(self):
+        """Test that at least one request must be allowed in flight."""
+        with pytest.raises(ValueError):
+            RequestScheduler(max_concurrent=0)
+    
+    def test_admits_up_to_max_concurrent(self):
+        """Test that requests are admitted immediately while slots are free."""
+        scheduler = RequestScheduler(max_concurrent=2)
+        scheduler.acquire()
+        scheduler.acquire()
+        
+        assert scheduler.in_flight == 2
+        scheduler.release()
+        scheduler.release()
+        assert scheduler.in_flight == 0
+    
+    def test_priority_order(self):
+        """Test that higher priority classes are served first."""
+        scheduler = RequestScheduler(max_concurrent=1)
+        
+        order = run_queued(scheduler, [
+            (Priority.BACKGROUND, "crawl"),
+            (Priority.NORMAL, "crawl"),
+            (Priority.INTERACTIVE, "user"),
+        ])
+        
+        assert [priority for priority, _ in order] == [Priority.INTERACTIVE, Priority.NORMAL, Priority.BACKGROUND]
+    
+    def test_weighted_fair_queuing(self):
+        """Test that tenants of one class share dispatches by weight."""
+        scheduler = RequestScheduler(max_concurrent=1, tenant_weights={"a": 2})
+        
+        order = run_queued(scheduler, [(Priority.BACKGROUND, "a")] * 6 + [(Priority.BACKGROUND, "b")] * 3)
+        
+        assert "".join(tenant for _, tenant in order) == "aabaabaab"
+    
+    def test_starvation_protection(self):
+        """Test that a request waiting longer than max_wait is served first."""
+        clock = FakeClock()
+        scheduler = RequestScheduler(max_concurrent=1, max_wait=10, clock=clock)
+        order = []
+        scheduler.acquire()
+        threads = queue_requests(scheduler, [(Priority.BACKGROUND, "crawl")], order)
+        clock.now = 11
+        threads += queue_requests(scheduler, [(Priority.INTERACTIVE, "user")], order)
+        scheduler.release()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        assert order == [(Priority.BACKGROUND, "crawl"), (Priority.INTERACTIVE, "user")]
+    
+    def test_queue_time_stats(self):
+        """Test per-class queue-time metrics."""
+        clock = FakeClock()
+        scheduler = RequestScheduler(max_concurrent=1, clock=clock)
+        scheduler.acquire(Priority.INTERACTIVE)
+        threads = queue_requests(scheduler, [(Priority.BACKGROUND, "crawl")], [])
+        clock.now = 2
+        scheduler.release()
+        threads[0].join(timeout=5)
+        
+        stats = scheduler.stats()
+        assert stats[Priority.INTERACTIVE].dispatched == 1
+        assert stats[Priority.INTERACTIVE].max == 0
+        assert stats[Priority.BACKGROUND].dispatched == 1
+        assert stats[Priority.BACKGROUND].mean == 2
+        assert stats[Priority.BACKGROUND].p95 == 2
+        assert stats[Priority.NORMAL].dispatched == 0
+        assert stats[Priority.NORMAL].mean is None
+    
+    def test_rate_limiter_applied_at_dispatch(self):
+        """Test that the scheduler acquires its rate limiter for every request."""
+        rate_limiter = Mock()
+        scheduler = RequestScheduler(rate_limiter=rate_limiter)
+        
+        with scheduler.slot():
+            pass
+        
+        rate_limiter.acquire.assert_called_once()
+    
+    def test_failed_rate_limit_does_not_leak_slot(self):
+        """Test that an error while waiting for the limiter frees the dispatcher."""
+        rate_limiter = Mock()
+        rate_limiter.acquire.side_effect = [RuntimeError("boom"), True]
+        scheduler = RequestScheduler(max_concurrent=1, rate_limiter=rate_limiter)
+        
+        with pytest.raises(RuntimeError):
+            scheduler.acquire()
+        scheduler.acquire()
+        
+        assert scheduler.in_flight == 1
+
+
+class TestScheduling:
+    """Test cases for the scheduling context."""
+    
+    def test_defaults_and_nesting(self):
+        """Test that nested blocks inherit values they do not set."""
+        assert current_scheduling() == (Priority.NORMAL, "default")
+        with scheduling(tenant="crawl"):
+            with scheduling(priority=Priority.BACKGROUND):
+                assert current_scheduling() == (Priority.BACKGROUND, "crawl")
+            assert current_scheduling() == (Priority.NORMAL, "crawl")
+        assert current_scheduling() == (Priority.NORMAL, "default")
+    
+    def test_fetcher_uses_scheduler(self):
+        """Test that the fetcher is admitted by the scheduler with the current priority."""
+        mock_session = Mock()
+        mock_session.get.return_value.text = "<html></html>"
+        scheduler = RequestScheduler()
+        fetcher = Fetcher(mock_session, scheduler=scheduler)
+        
+        with scheduling(priority=Priority.INTERACTIVE):
+            assert fetcher.fetch_page("https://example.com") == "<html></html>"
+        
+        assert scheduler.stats()[Priority.INTERACTIVE].dispatched == 1
+        assert scheduler.in_flight == 0
+    
+    def test_fetcher_refused_without_deadline(self):
+        """Test that a refused admission outside a deadline raises DeadlineExceededError."""
+        scheduler = Mock()
+        scheduler.acquire.return_value = False
+        mock_session = Mock()
+        
+        with pytest.raises(DeadlineExceededError):
+            Fetcher(mock_session, scheduler=scheduler).fetch("https://example.com")
+        with pytest.raises(DeadlineExceededError):
+            list(Fetcher(mock_session, scheduler=scheduler).stream("https://example.com"))
+        
+        mock_session.get.assert_not_called()
+    
+    def test_fetcher_rejects_two_rate_limits(self):
+        """Test that the rate limiter belongs to the scheduler when one is used."""
+        with pytest.raises(ValueError):
+            Fetcher(Mock(), rate_limiter=RateLimiter(1), scheduler=RequestScheduler())
+    
+    def test_dbknih_priority(self):
+        """Test that DBKnih calls run with the declared priority."""
+        book_service = Mock()
+        book_service.get_book_info.side_effect = lambda link: current_scheduling()
+        search_service = Mock()
+        search_service.search.side_effect = lambda text: [current_scheduling()]
+        api = DBKnih(book_service, search_service)
+        
+        assert api.search("hobit", priority=Priority.INTERACTIVE) == [(Priority.INTERACTIVE, "default")]
+        assert api.get_book_info("hobit-1", priority=Priority.BACKGROUND) == (Priority.BACKGROUND, "default")
+        assert api.search("hobit") == [(Priority.NORMAL, "default")]
@@ -5,7 +5,8 @@ import pytest
 from unittest.mock import Mock, patch
 from bs4 import BeautifulSoup
 
-from db_knih_api.search_service import SearchService
+from db_knih_api.cache import TTLCache
+from db_knih_api.search_service import SearchService, normalize_query
 from db_knih_api.models import SearchInfo
 
 
@@ -169,3 +170,67 @@ class TestSearchService:
         assert service._split_and_trim("a, b, c", ",", 2) == "c"
         assert service._split_and_trim("a, b, c", ",", 3) is None
         assert service._split_and_trim(None, ",", 0) is None
+    
+    def test_normalize_query(self):
+        """Test case folding and whitespace collapsing of queries."""
+        assert normalize_query("  Harry   Potter\t") == "harry potter"
+        assert normalize_query("ČESKÁ kniha") == "česká kniha"
+    
+    def test_normalize_query_fold_diacritics(self):
+        """Test optional diacritics folding of queries."""
+        assert normalize_query("Hárry  Potter", fold_diacritics=True) == "harry potter"
+        assert normalize_query("Žluťoučký kůň", fold_diacritics=True) == "zlutoucky kun"
+        assert normalize_query("hárry") == "hárry"
+    
+    def test_search_cache(self):
+        """Test that equivalent queries are served from the cache."""
+        html = '<p class="new"><a class="new" href="/prehled-knihy/harry-potter-12345">Harry Potter</a></p>'
+        mock_fetcher = Mock()
+        mock_fetcher.fetch_page.return_value = html
+        cache = TTLCache()
+        service = SearchService(mock_fetcher, cache=cache, fold_diacritics=True)
+        
+        first = service.search("Harry Potter")
+        second = service.search("harry  potter")
+        third = service.search("hárry potter")
+        
+        assert first == second == third
+        assert mock_fetcher.fetch_page.call_count == 1
+        assert cache.stats().hits == 2
+    
+    def test_search_cache_returns_copies(self):
+        """Test that mutating returned results does not change later cache hits."""
+        html = '<p class="new"><a class="new" href="/prehled-knihy/harry-potter-12345">Harry Potter</a></p>'
+        mock_fetcher = Mock()
+        mock_fetcher.fetch_page.return_value = html
+        service = SearchService(mock_fetcher, cache=TTLCache())
+        
+        service.search("Harry Potter")[0].name = "changed"
+        service.search("Harry Potter")[0].year = 1
+        
+        result = service.search("Harry Potter")[0]
+        assert result.name == "Harry Potter"
+        assert result.year is None
+    
+    def test_search_cache_keeps_diacritics_by_default(self):
+        """Test that queries differing in diacritics are distinct by default."""
+        mock_fetcher = Mock()
+        mock_fetcher.fetch_page.return_value = "<html></html>"
+        service = SearchService(mock_fetcher, cache=TTLCache())
+        
+        service.search("hárry potter")
+        service.search("harry potter")
+        
+        assert mock_fetcher.fetch_page.call_count == 2
+    
+    def test_search_cache_skips_errors(self):
+        """Test that failed searches are not cached."""
+        mock_fetcher = Mock()
+        mock_fetcher.fetch_page.side_effect = ['Error', "<html></html>"]
+        cache = TTLCache()
+        service = SearchService(mock_fetcher, cache=cache)
+        
+        assert service.search("kniha") == []
+        assert service.search("kniha") == []
+        assert mock_fetcher.fetch_page.call_count == 2
+        assert len(cache) == 1
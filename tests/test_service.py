@@ -0,0 +1,177 @@
+"""
+Unit tests for the JSON HTTP service and its client.
+"""
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from unittest.mock import Mock
+
+from db_knih_api.book_service import BookService
+from db_knih_api.cache import TTLCache
+from db_knih_api.client import DBKnih
+from db_knih_api.exceptions import FetchError
+from db_knih_api.fetcher import Fetcher
+from db_knih_api.models import BookInfo, SearchInfo
+from db_knih_api.search_service import SearchService
+from db_knih_api.service import HTTPService, ServiceClient, connect
+from db_knih_api.stub_server import StubConfig, StubServer, constant
+
+
+@pytest.fixture
+def stub():
+    """Stub site the service fetches from."""
+    with StubServer(StubConfig(latency=constant(0)), books=20) as server:
+        yield server
+
+
+@pytest.fixture
+def service(stub):
+    """Service backed by the stub site."""
+    fetcher = Fetcher(stub.session())
+    db_knih = DBKnih(book_service=BookService(fetcher), search_service=SearchService(fetcher))
+    with HTTPService(db_knih, book_cache=TTLCache(ttl=60)) as running:
+        yield running
+
+
+def get(service, path, headers=None):
+    """Send one GET request and decode the JSON answer."""
+    connection = http.client.HTTPConnection(service.host, service.port, timeout=5)
+    try:
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+class TestHTTPService:
+    """Test cases for the HTTPService class."""
+
+    def test_search(self, service):
+        """Test that search results are returned as JSON objects."""
+        status, results = get(service, "/search?q=harry%20potter")
+
+        assert status == 200
+        assert len(results) == 10
+        assert set(results[0]) == {"name", "cleanName", "id", "year", "author"}
+
+    def test_book(self, service, stub):
+        """Test that book details are returned and missing books are 404."""
+        status, book = get(service, f"/book/{stub.book_link(3)}")
+        assert status == 200
+        assert book["rating"] is not None
+
+        status, error = get(service, "/book/neexistuje-999")
+        assert status == 404
+        assert "error" in error
+
+    def test_book_cache(self, service, stub):
+        """Test that repeated lookups of a book are served from the cache."""
+        get(service, f"/book/{stub.book_link(3)}")
+        requests_before = sum(stub.stats().values())
+
+        get(service, f"/book/{stub.book_link(3)}")
+
+        assert sum(stub.stats().values()) == requests_before
+        assert service.stats.cache_hits == 1
+
+    def test_bad_requests(self, service):
+        """Test the statuses of unknown routes, methods and missing parameters."""
+        assert get(service, "/search")[0] == 400
+        assert get(service, "/unknown")[0] == 404
+
+        connection = http.client.HTTPConnection(service.host, service.port, timeout=5)
+        connection.request("POST", "/search?q=x", body=b"{}")
+        assert connection.getresponse().status == 405
+        connection.close()
+
+    def test_malformed_content_length(self, service):
+        """Test that a malformed Content-Length header is answered with 400."""
+        connection = http.client.HTTPConnection(service.host, service.port, timeout=5)
+        connection.putrequest("GET", "/stats")
+        connection.putheader("Content-Length", "abc")
+        connection.endheaders()
+        response = connection.getresponse()
+
+        assert response.status == 400
+        assert "Content-Length" in json.loads(response.read())["error"]
+        connection.close()
+
+    def test_keep_alive(self, service):
+        """Test that one connection serves several requests."""
+        connection = http.client.HTTPConnection(service.host, service.port, timeout=5)
+        for query in ("a", "b", "c"):
+            connection.request("GET", f"/search?q={query}")
+            response = connection.getresponse()
+            assert response.status == 200
+            response.read()
+        connection.close()
+
+    def test_coalesces_identical_requests(self):
+        """Test that concurrent equivalent searches run a single lookup with the first spelling."""
+        calls = []
+        release = threading.Event()
+
+        def slow_search(text):
+            calls.append(text)
+            release.wait(5)
+            return [SearchInfo(name="Hobit", id=1)]
+
+        db_knih = Mock()
+        db_knih.search.side_effect = slow_search
+        with HTTPService(db_knih) as running, ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(get, running, "/search?q=Hobit")]
+            deadline = time.monotonic() + 5
+            while not calls and time.monotonic() < deadline:
+                time.sleep(0.01)
+            futures += [executor.submit(get, running, f"/search?q={query}")
+                        for query in ("hobit", "HOBIT", "%20Hobit", "hobit%20")]
+            while running.stats.requests < 5 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            release.set()
+            results = [future.result() for future in futures]
+
+        assert calls == ["Hobit"]
+        assert all(result == (200, [{"name": "Hobit", "cleanName": None, "id": 1, "year": None,
+                                     "author": None}]) for result in results)
+        assert running.stats.coalesced == 4
+
+    def test_fetch_errors(self):
+        """Test that failures of the site are reported as 502."""
+        db_knih = Mock()
+        db_knih.get_book_info.side_effect = FetchError("u", "unavailable", 503)
+
+        with HTTPService(db_knih) as running:
+            status, error = get(running, "/book/hobit-1")
+
+        assert status == 502
+        assert error["status_code"] == 503
+
+
+class TestServiceClient:
+    """Test cases for the ServiceClient class."""
+
+    def test_db_knih_transport(self, service, stub):
+        """Test that DBKnih calls are answered by the service."""
+        db_knih = connect(service.url)
+
+        results = db_knih.search("hobit")
+        info = db_knih.get_book_info(results[0].cleanName + "-" + str(results[0].id))
+
+        assert isinstance(results[0], SearchInfo)
+        assert isinstance(info, BookInfo)
+        assert info.reviews
+        assert db_knih.get_book_info("neexistuje-999") is None
+
+    def test_errors_raise(self):
+        """Test that service failures other than 404 raise FetchError."""
+        db_knih = Mock()
+        db_knih.search.side_effect = RuntimeError("boom")
+
+        with HTTPService(db_knih) as running:
+            with pytest.raises(FetchError):
+                ServiceClient(running.url).search("hobit")
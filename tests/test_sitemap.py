@@ -0,0 +1,212 @@
+"""
+Unit tests for sitemap discovery.
+"""
+import gzip
+from datetime import datetime, timezone
+
+import pytest
+import requests
+from unittest.mock import MagicMock, Mock, patch
+
+from db_knih_api.exceptions import FetchError, NotFoundError
+from db_knih_api.fetcher import Fetcher
+from db_knih_api.sitemap import (CrawlQueue, SitemapDiscovery, SitemapEntry, book_link_from_url,
+                                 iter_sitemap, parse_lastmod)
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+INDEX = f"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex {NS}>
+  <sitemap><loc>https://www.databazeknih.cz/sitemap-books-1.xml.gz</loc><lastmod>2024-05-01</lastmod></sitemap>
+  <sitemap><loc>https://www.databazeknih.cz/sitemap-books-2.xml</loc><lastmod>2023-01-01</lastmod></sitemap>
+  <sitemap><loc>https://www.databazeknih.cz/sitemap-missing.xml</loc></sitemap>
+</sitemapindex>
+""".encode()
+
+BOOKS_1 = f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset {NS} xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+  <url><loc>https://www.databazeknih.cz/prehled-knihy/hobit-1</loc><lastmod>2024-04-01T10:00:00+02:00</lastmod>
+    <image:image><image:loc>https://www.databazeknih.cz/img/books/1.jpg</image:loc></image:image></url>
+  <url><loc>https://www.databazeknih.cz/prehled-knihy/dune-2</loc><lastmod>2024-05-01</lastmod></url>
+  <url><loc>https://www.databazeknih.cz/autori/j-r-r-tolkien-3</loc></url>
+</urlset>
+""".encode()
+
+BOOKS_2 = f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset {NS}>
+  <url><loc>https://www.databazeknih.cz/knihy/hobit-1</loc><lastmod>2022-01-01</lastmod></url>
+  <url><loc>https://www.databazeknih.cz/prehled-knihy/stary-titul-4</loc></url>
+</urlset>
+""".encode()
+
+
+def chunked(data, size=7):
+    """Split a document into small chunks to exercise the incremental parser."""
+    return iter([data[i:i + size] for i in range(0, len(data), size)])
+
+
+def make_fetcher(documents):
+    """Mock fetcher streaming the given documents by URL."""
+    def stream(url, chunk_size=None):
+        if url not in documents:
+            raise NotFoundError(url, "missing", 404)
+        return chunked(documents[url])
+
+    fetcher = Mock()
+    fetcher.stream.side_effect = stream
+    return fetcher
+
+
+DOCUMENTS = {
+    "https://www.databazeknih.cz/sitemap.xml": INDEX,
+    "https://www.databazeknih.cz/sitemap-books-1.xml.gz": gzip.compress(BOOKS_1),
+    "https://www.databazeknih.cz/sitemap-books-2.xml": BOOKS_2,
+}
+
+
+class TestSitemapParsing:
+    """Test cases for the sitemap parsing helpers."""
+
+    @pytest.mark.parametrize("url,expected", [
+        ("https://www.databazeknih.cz/prehled-knihy/hobit-1", "hobit-1"),
+        ("https://www.databazeknih.cz/knihy/harry-potter-a-kamen-mudrcu-12345/", "harry-potter-a-kamen-mudrcu-12345"),
+        ("https://www.databazeknih.cz/autori/j-r-r-tolkien-3", None),
+        ("https://www.databazeknih.cz/prehled-knihy/bez-id", None),
+    ])
+    def test_book_link_from_url(self, url, expected):
+        """Test that only book pages yield a book link."""
+        assert book_link_from_url(url) == expected
+
+    def test_parse_lastmod(self):
+        """Test that dates and datetimes become aware datetimes."""
+        assert parse_lastmod("2024-05-01") == datetime(2024, 5, 1, tzinfo=timezone.utc)
+        assert parse_lastmod("2024-05-01T10:00:00Z") == datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+        assert parse_lastmod("yesterday") is None
+        assert parse_lastmod(None) is None
+
+    def test_parse_lastmod_utc_designator(self):
+        """Test that a "Z" suffix is read as UTC even where fromisoformat rejects it (before 3.11)."""
+        class StrictDatetime(datetime):
+            @classmethod
+            def fromisoformat(cls, text):
+                if text.endswith("Z"):
+                    raise ValueError(f"Invalid isoformat string: {text!r}")
+                return datetime.fromisoformat(text)
+
+        with patch("db_knih_api.sitemap.datetime", StrictDatetime):
+            assert parse_lastmod("2024-05-01T10:00:00Z") == datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+            assert parse_lastmod(" 2024-05-01T10:00:00.500Z ") == \
+                datetime(2024, 5, 1, 10, 0, 0, 500000, tzinfo=timezone.utc)
+
+    def test_iter_sitemap_gzipped(self):
+        """Test that gzipped sitemaps are parsed and nested locs ignored."""
+        entries = list(iter_sitemap(chunked(gzip.compress(BOOKS_1))))
+
+        assert [loc for _, loc, _ in entries] == [
+            "https://www.databazeknih.cz/prehled-knihy/hobit-1",
+            "https://www.databazeknih.cz/prehled-knihy/dune-2",
+            "https://www.databazeknih.cz/autori/j-r-r-tolkien-3",
+        ]
+        assert entries[1] == ("url", "https://www.databazeknih.cz/prehled-knihy/dune-2", "2024-05-01")
+
+    def test_iter_sitemap_index(self):
+        """Test that index entries are reported as child sitemaps."""
+        kinds = {kind for kind, _, _ in iter_sitemap(chunked(INDEX))}
+
+        assert kinds == {"sitemap"}
+
+    def test_tree_stays_empty(self):
+        """Test that finished entries are dropped while parsing a large sitemap."""
+        urls = "".join(f"<url><loc>https://www.databazeknih.cz/prehled-knihy/b-{i}</loc></url>"
+                       for i in range(5000))
+        document = f"<urlset {NS}>{urls}</urlset>".encode()
+
+        count = sum(1 for _ in iter_sitemap(chunked(document, 4096)))
+
+        assert count == 5000
+
+
+class TestSitemapDiscovery:
+    """Test cases for the SitemapDiscovery class."""
+
+    def test_walks_index_and_children(self):
+        """Test that books of every child sitemap are found and failures recorded."""
+        discovery = SitemapDiscovery(make_fetcher(DOCUMENTS))
+
+        entries = list(discovery.iter_entries())
+
+        assert [entry.book_link for entry in entries] == ["hobit-1", "dune-2", "hobit-1", "stary-titul-4"]
+        assert entries[0].sitemap == "https://www.databazeknih.cz/sitemap-books-1.xml.gz"
+        assert len(discovery.errors) == 1
+        assert isinstance(discovery.errors[0], NotFoundError)
+
+    def test_since_skips_old_sitemaps(self):
+        """Test that sitemaps and books modified before ``since`` are not downloaded or yielded."""
+        fetcher = make_fetcher(DOCUMENTS)
+        discovery = SitemapDiscovery(fetcher)
+
+        entries = list(discovery.iter_entries(since=datetime(2024, 4, 15)))
+
+        assert [entry.book_link for entry in entries] == ["dune-2"]
+        streamed = [call.args[0] for call in fetcher.stream.call_args_list]
+        assert "https://www.databazeknih.cz/sitemap-books-2.xml" not in streamed
+
+    def test_index_failure_raises(self):
+        """Test that a missing or malformed index is an error."""
+        with pytest.raises(NotFoundError):
+            list(SitemapDiscovery(make_fetcher({})).iter_entries())
+
+        broken = make_fetcher({"https://www.databazeknih.cz/sitemap.xml": b"<urlset><url>"})
+        with pytest.raises(FetchError):
+            list(SitemapDiscovery(broken).iter_entries())
+
+    def test_discover_deduplicates_and_prioritizes(self):
+        """Test that the queue holds each book once, most recently modified first."""
+        queue = CrawlQueue()
+
+        added = SitemapDiscovery(make_fetcher(DOCUMENTS)).discover(queue)
+
+        assert added == 3
+        assert list(queue.drain()) == ["dune-2", "hobit-1", "stary-titul-4"]
+        assert SitemapDiscovery(make_fetcher(DOCUMENTS)).discover(queue) == 0
+
+
+class TestCrawlQueue:
+    """Test cases for the CrawlQueue class."""
+
+    def test_pop_order(self):
+        """Test that entries without lastmod come last in insertion order."""
+        queue = CrawlQueue()
+        queue.add(SitemapEntry("a-1", 1))
+        queue.add(SitemapEntry("b-2", 2, datetime(2020, 1, 1, tzinfo=timezone.utc)))
+        queue.add(SitemapEntry("c-3", 3))
+
+        assert [queue.pop().book_link for _ in range(3)] == ["b-2", "a-1", "c-3"]
+        assert queue.pop() is None
+        assert queue.seen == 3
+
+
+class TestFetcherStream:
+    """Test cases for Fetcher.stream."""
+
+    def test_streams_chunks(self):
+        """Test that the body is streamed through the rate limiter."""
+        session = MagicMock()
+        response = session.get.return_value.__enter__.return_value
+        response.iter_content.return_value = iter([b"ab", b"cd"])
+        rate_limiter = Mock()
+        fetcher = Fetcher(session, rate_limiter=rate_limiter)
+
+        assert list(fetcher.stream("https://example.com/sitemap.xml", chunk_size=2)) == [b"ab", b"cd"]
+        session.get.assert_called_once_with("https://example.com/sitemap.xml", timeout=30, stream=True)
+        rate_limiter.acquire.assert_called_once()
+
+    def test_not_found(self):
+        """Test that HTTP errors map to the fetcher's exception types."""
+        session = MagicMock()
+        response = session.get.return_value.__enter__.return_value
+        response.raise_for_status.side_effect = requests.HTTPError("404", response=Mock(status_code=404))
+        fetcher = Fetcher(session)
+
+        with pytest.raises(NotFoundError):
+            list(fetcher.stream("https://example.com/sitemap.xml"))
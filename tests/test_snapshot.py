@@ -0,0 +1,139 @@
+"""
+Unit tests for catalog snapshots.
+"""
+import copy
+import math
+import multiprocessing
+import pickle
+
+import pytest
+
+from db_knih_api.models import BookInfo, Review, SearchInfo
+from db_knih_api.snapshot import CatalogSnapshot, write_snapshot
+
+HOBIT_SEARCH = SearchInfo(name="Hobit", cleanName="hobit", id=1234, year=1937, author="J. R. R. Tolkien")
+HOBIT = BookInfo(
+    plot="Bilbo Pytlík se vydává na cestu…",
+    genres=["Fantasy", "Pro děti a mládež"],
+    year=2002,
+    author="J. R. R. Tolkien",
+    publisher="Argo",
+    rating=91.0,
+    numberOfRatings=15000,
+    reviews=[Review(text="Krásná kniha", rating=5, username="čtenář", date="1.1.2020")],
+    cover="https://www.databazeknih.cz/img/books/12_/1234/hobit.jpg",
+    pages=320,
+    originalLanguage="anglický",
+    isbn="978-80-257-0741-1",
+)
+DUNE_SEARCH = SearchInfo(name="Duna", cleanName="duna", id=55, year=1965, author="Frank Herbert")
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    """Snapshot of a small catalog."""
+    path = str(tmp_path / "catalog.snap")
+    write_snapshot(path, [(HOBIT_SEARCH, HOBIT), DUNE_SEARCH,
+                          (SearchInfo(name="Prázdná", id=7), BookInfo(genres=[], complete=False))])
+    return path
+
+
+def _read_rating(path, book_id):
+    """Read a rating in another process."""
+    with CatalogSnapshot(path) as snapshot:
+        return snapshot.get(book_id).rating
+
+
+class TestCatalogSnapshot:
+    """Test cases for writing and reading snapshots."""
+
+    def test_round_trip(self, snapshot_path):
+        """Test that models come back equal to the ones written."""
+        with CatalogSnapshot(snapshot_path) as snapshot:
+            assert len(snapshot) == 3
+            assert snapshot.book_info(1234) == HOBIT
+            assert snapshot.search_info(1234) == HOBIT_SEARCH
+            assert snapshot.search_info(55) == DUNE_SEARCH
+            assert snapshot.book_info(55) is None
+            assert snapshot.book_info(7) == BookInfo(genres=[], complete=False)
+
+    def test_views_decode_lazily(self, snapshot_path):
+        """Test that views expose single fields with None for missing values."""
+        with CatalogSnapshot(snapshot_path) as snapshot:
+            view = snapshot.get(55)
+
+            assert view.name == "Duna"
+            assert view.rating is None
+            assert view.pages is None
+            assert not view.has_book_info
+            assert snapshot.get(1234).genres == "Fantasy\x1fPro děti a mládež"
+            with pytest.raises(AttributeError):
+                view.popularity
+
+    def test_copy_and_pickle_views(self, snapshot_path):
+        """Test that copying a view works and pickling fails cleanly instead of recursing."""
+        with CatalogSnapshot(snapshot_path) as snapshot:
+            view = copy.copy(snapshot.get(55))
+
+            assert view.row == snapshot.get(55).row
+            assert view.name == "Duna"
+            with pytest.raises(TypeError):
+                pickle.dumps(view)
+
+    def test_lookup_and_iteration(self, snapshot_path):
+        """Test id lookups, membership and row order."""
+        with CatalogSnapshot(snapshot_path) as snapshot:
+            assert 1234 in snapshot
+            assert 999 not in snapshot
+            assert snapshot.get(999) is None
+            assert [view.id for view in snapshot] == [1234, 55, 7]
+            assert snapshot[-1].id == 7
+            with pytest.raises(IndexError):
+                snapshot[3]
+
+    def test_numeric_columns(self, snapshot_path):
+        """Test that numeric columns are zero-copy views in row order."""
+        with CatalogSnapshot(snapshot_path) as snapshot:
+            ratings = snapshot.column("rating")
+            assert ratings[0] == 91.0
+            assert math.isnan(ratings[1])
+            assert list(snapshot.column("pages")) == [320, -1, -1]
+            assert ratings.readonly
+            with pytest.raises(KeyError):
+                snapshot.column("plot")
+            ratings.release()
+
+    def test_later_records_replace_earlier(self, tmp_path):
+        """Test that a repeated id keeps the last record."""
+        path = str(tmp_path / "catalog.snap")
+        count = write_snapshot(path, [DUNE_SEARCH, (DUNE_SEARCH, BookInfo(rating=80.0))])
+
+        with CatalogSnapshot(path) as snapshot:
+            assert count == 1
+            assert snapshot.get(55).rating == 80.0
+
+    def test_invalid_input(self, tmp_path):
+        """Test that records without id and foreign files are rejected."""
+        with pytest.raises(ValueError):
+            write_snapshot(str(tmp_path / "a.snap"), [SearchInfo(name="Bez id")])
+
+        other = tmp_path / "other.bin"
+        other.write_bytes(b"not a snapshot at all, just some bytes" * 4)
+        with pytest.raises(ValueError):
+            CatalogSnapshot(str(other))
+
+    def test_large_catalog(self, tmp_path):
+        """Test lookups across many books."""
+        path = str(tmp_path / "catalog.snap")
+        write_snapshot(path, (SearchInfo(name=f"Kniha {i}", id=i * 7, year=1900 + i % 100)
+                              for i in range(10000, 0, -1)))
+
+        with CatalogSnapshot(path) as snapshot:
+            assert snapshot.search_info(7 * 4321) == SearchInfo(name="Kniha 4321", id=7 * 4321, year=1921)
+            assert snapshot.get(7 * 4321 + 1) is None
+
+    def test_shared_between_processes(self, snapshot_path):
+        """Test that another process reads the same file."""
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(1) as pool:
+            assert pool.apply(_read_rating, (snapshot_path, 1234)) == 91.0
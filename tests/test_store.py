@@ -0,0 +1,173 @@
+"""
+Unit tests for the SQLite book store.
+"""
+import pytest
+from unittest.mock import Mock
+
+from db_knih_api.book_service import BookService
+from db_knih_api.deadline import CancellationToken
+from db_knih_api.exceptions import DeadlineExceededError
+from db_knih_api.models import BookInfo, Review, SearchInfo
+from db_knih_api.store import BookStore, CachingBookService, parse_book_link
+
+
+def make_book(**kwargs):
+    """Create a BookInfo with sensible defaults."""
+    values = dict(author="Autor", year=2018, rating=80.0, numberOfRatings=10, genres=["Fantasy"], reviews=[])
+    values.update(kwargs)
+    return BookInfo(**values)
+
+
+class TestBookStore:
+    """Test cases for the BookStore class."""
+    
+    def test_parse_book_link(self):
+        """Test splitting links into clean name and id."""
+        assert parse_book_link("harry-potter-12345") == ("harry-potter", 12345)
+        assert parse_book_link("12345") == (None, 12345)
+        with pytest.raises(ValueError):
+            parse_book_link("harry-potter")
+    
+    def test_round_trip_book_info(self, tmp_path):
+        """Test that detailed information survives reopening the store."""
+        path = str(tmp_path / "books.db")
+        info = make_book(
+            plot="Děj", genres=["Fantasy", "Pro děti"], isbn="978-80", pages=300,
+            reviews=[Review(text="Skvělé", rating=5.0, username="čtenář", date="1.1.2020")],
+        )
+        with BookStore(path) as store:
+            store.upsert_book_info("harry-potter-1", info)
+        
+        with BookStore(path) as store:
+            assert store.get_book_info("harry-potter-1") == info
+            assert store.get_book_info("unknown-2") is None
+    
+    def test_search_info_merges_with_details(self):
+        """Test that search results and details are stored in the same record."""
+        store = BookStore()
+        store.upsert_search_infos([SearchInfo(name="Hobit", cleanName="hobit", id=7, year=1937, author="Tolkien")])
+        assert store.get_book_info("hobit-7") is None
+        
+        store.upsert_book_info("hobit-7", make_book(author="J. R. R. Tolkien", year=2012))
+        store.upsert_search_infos([SearchInfo(name="Hobit", cleanName="hobit", id=7, year=1937, author="Tolkien")])
+        
+        assert store.get_search_info(7) == SearchInfo(
+            name="Hobit", cleanName="hobit", id=7, year=2012, author="J. R. R. Tolkien"
+        )
+        assert len(store) == 1
+    
+    def test_upsert_replaces_genres_and_reviews(self):
+        """Test that updating a book replaces its genres and reviews."""
+        store = BookStore()
+        store.upsert_book_info("kniha-1", make_book(genres=["A", "B"], reviews=[Review(text="x")]))
+        store.upsert_book_info("kniha-1", make_book(genres=["C"], reviews=[]))
+        
+        info = store.get_book_info("kniha-1")
+        assert info.genres == ["C"]
+        assert info.reviews == []
+        assert store.genre_counts() == {"C": 1}
+    
+    def test_missing_genres_and_reviews_match_book_service(self):
+        """Test that a book without genres or reviews loads as BookService scraped it."""
+        fetcher = Mock()
+        fetcher.fetch_page.return_value = '<div id="faux"><div id="content"><div class="bpoints">80%</div></div></div>'
+        scraped = BookService(fetcher).get_book_info("kniha-1")
+        store = BookStore()
+        store.upsert_book_info("kniha-1", scraped)
+        
+        loaded = store.get_book_info("kniha-1")
+        
+        assert (scraped.genres, scraped.reviews) == (None, [])
+        assert loaded == scraped
+    
+    def test_query_filters(self):
+        """Test combining genre, year and rating filters."""
+        store = BookStore()
+        store.upsert_book_infos([
+            ("a-1", make_book(genres=["Fantasy"], year=2016, rating=85.0)),
+            ("b-2", make_book(genres=["Fantasy"], year=2014, rating=90.0)),
+            ("c-3", make_book(genres=["Sci-fi"], year=2020, rating=95.0)),
+            ("d-4", make_book(genres=["Fantasy", "Sci-fi"], year=2019, rating=70.0)),
+            ("e-5", make_book(genres=["Fantasy"], year=2021, rating=81.0, author="Jiný")),
+        ])
+        
+        result = store.query(genre="Fantasy", year_from=2016, min_rating=80, order_by="rating", descending=True)
+        
+        assert list(result) == [1, 5]
+        assert result[1].rating == 85.0
+        assert list(store.query(author="Jiný")) == [5]
+        assert list(store.query(limit=2)) == [1, 2]
+    
+    def test_query_rejects_unknown_order(self):
+        """Test that only known columns can be used for ordering."""
+        with pytest.raises(ValueError):
+            BookStore().query(order_by="plot; DROP TABLE books")
+    
+    def test_query_search_infos(self):
+        """Test querying basic information of stored books."""
+        store = BookStore()
+        store.upsert_search_infos([
+            SearchInfo(name="A", id=1, year=2000, author="X"),
+            SearchInfo(name="B", id=2, year=2010, author="Y"),
+            SearchInfo(name="No id"),
+        ])
+        
+        assert [info.name for info in store.query_search_infos(year_from=2005)] == ["B"]
+        assert len(store) == 2
+    
+    def test_get_book_info_max_age(self):
+        """Test that stale information is treated as missing."""
+        store = BookStore()
+        store.upsert_book_info("a-1", make_book())
+        
+        assert store.get_book_info("a-1", max_age=60) is not None
+        assert store.get_book_info("a-1", max_age=-1) is None
+
+
+class TestCachingBookService:
+    """Test cases for the CachingBookService class."""
+    
+    def test_read_through(self):
+        """Test that misses are fetched and stored, and hits are served from the store."""
+        book_service = Mock()
+        book_service.get_book_info.return_value = make_book()
+        service = CachingBookService(book_service, BookStore())
+        
+        first = service.get_book_info("kniha-1")
+        second = service.get_book_info("kniha-1")
+        
+        assert first == second
+        book_service.get_book_info.assert_called_once_with("kniha-1", deadline=None)
+    
+    def test_does_not_cache_missing_or_partial(self):
+        """Test that failures and partial results are not cached."""
+        book_service = Mock()
+        book_service.get_book_info.side_effect = [None, make_book(complete=False), make_book()]
+        service = CachingBookService(book_service, BookStore())
+        
+        assert service.get_book_info("kniha-1") is None
+        assert service.get_book_info("kniha-1").complete is False
+        assert service.get_book_info("kniha-1").complete is True
+        assert book_service.get_book_info.call_count == 3
+    
+    def test_deadline_applies_on_miss(self):
+        """Test that a deadline is passed to the wrapped BookService on a cache miss."""
+        fetcher = Mock()
+        service = CachingBookService(BookService(fetcher), BookStore())
+        
+        with pytest.raises(DeadlineExceededError):
+            service.get_book_info("kniha-1", deadline=CancellationToken(timeout=0))
+    
+    def test_links_without_id_bypass_store(self):
+        """Test that links without a numeric id go straight to the service."""
+        book_service = Mock()
+        service = CachingBookService(book_service, BookStore())
+        
+        assert service.get_book_info("no-id") is book_service.get_book_info.return_value
+    
+    def test_forwards_other_attributes(self):
+        """Test that other BookService methods remain available."""
+        book_service = Mock()
+        service = CachingBookService(book_service, BookStore())
+        
+        assert service.iter_reviews is book_service.iter_reviews
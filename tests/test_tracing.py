@@ -0,0 +1,178 @@
+"""
+Unit tests for per-call tracing.
+"""
+import io
+import json
+
+import pytest
+import requests
+from unittest.mock import Mock
+
+from db_knih_api import DBKnih
+from db_knih_api.book_service import BookService
+from db_knih_api.exceptions import FetchError
+from db_knih_api.fetcher import Fetcher
+from db_knih_api.search_service import SearchService
+from db_knih_api.tracing import JSONLogSink, SlowestTraces, Trace, Tracer, current_trace, span
+
+BOOK_HTML = """
+<div id="faux"><div id="content">
+    <div class="justify new2 odtop">Plot text</div>
+    <h2 class="jmenaautoru"><a>Author</a></h2>
+</div></div>
+"""
+
+
+def make_session(*texts):
+    """Create a session answering the given pages in order."""
+    mock_session = Mock()
+    mock_session.get.side_effect = [Mock(text=text, status_code=200) for text in texts]
+    return mock_session
+
+
+class TestSpans:
+    """Test cases for traces and spans."""
+    
+    def test_span_is_noop_without_trace(self):
+        """Test that spans outside of a trace record nothing."""
+        assert current_trace() is None
+        with span("phase") as attributes:
+            attributes["ignored"] = True
+    
+    def test_trace_records_spans(self):
+        """Test that spans of a traced block are recorded with attributes."""
+        traces = []
+        tracer = Tracer(sinks=[traces.append])
+        
+        with tracer.trace("call", link="kniha-1") as trace:
+            with span("phase", kind="a") as attributes:
+                attributes["status"] = 200
+            with span("phase"):
+                pass
+        
+        assert traces == [trace]
+        assert trace.duration is not None
+        assert [(s.name, s.attributes) for s in trace.spans] == [("phase", {"kind": "a", "status": 200}), ("phase", {})]
+        assert list(trace.totals()) == ["phase"]
+        assert trace.to_dict()["attributes"] == {"link": "kniha-1"}
+    
+    def test_trace_records_error(self):
+        """Test that errors are recorded on the trace and its spans."""
+        traces = []
+        tracer = Tracer(sinks=[traces.append])
+        
+        with pytest.raises(ValueError):
+            with tracer.trace("call"):
+                with span("phase"):
+                    raise ValueError("boom")
+        
+        assert traces[0].error == "ValueError: boom"
+        assert traces[0].spans[0].attributes == {"error": "ValueError"}
+    
+    def test_nested_trace_becomes_span(self):
+        """Test that a trace started inside another one joins it."""
+        traces = []
+        tracer = Tracer(sinks=[traces.append])
+        
+        with tracer.trace("outer") as outer:
+            with tracer.trace("inner") as inner:
+                assert inner is outer
+        
+        assert len(traces) == 1
+        assert [s.name for s in outer.spans] == ["inner"]
+
+
+class TestSinks:
+    """Test cases for the trace sinks."""
+    
+    def make_trace(self, duration):
+        trace = Trace("call")
+        trace.duration = duration
+        return trace
+    
+    def test_json_log_sink(self):
+        """Test that traces are written as JSON lines."""
+        stream = io.StringIO()
+        tracer = Tracer(sinks=[JSONLogSink(stream)])
+        
+        with tracer.trace("call", link="kniha-1"):
+            with span("phase"):
+                pass
+        
+        record = json.loads(stream.getvalue())
+        assert record["name"] == "call"
+        assert record["spans"][0]["name"] == "phase"
+    
+    def test_slowest_traces(self):
+        """Test that only the slowest traces are kept, slowest first."""
+        slowest = SlowestTraces(size=2)
+        for duration in (0.3, 0.1, 0.5, 0.2):
+            slowest(self.make_trace(duration))
+        
+        assert [trace.duration for trace in slowest.traces()] == [0.5, 0.3]
+        slowest.clear()
+        assert len(slowest) == 0
+    
+    def test_slowest_traces_invalid_size(self):
+        """Test that the buffer must keep at least one trace."""
+        with pytest.raises(ValueError):
+            SlowestTraces(size=0)
+
+
+class TestTracedCalls:
+    """Test cases for tracing the library calls."""
+    
+    def test_get_book_info_breakdown(self):
+        """Test that fetch phases, soup construction and extractors are traced."""
+        slowest = SlowestTraces()
+        fetcher = Fetcher(make_session(BOOK_HTML, "<html></html>"))
+        api = DBKnih(BookService(fetcher), Mock(), tracer=Tracer(sinks=[slowest]))
+        
+        info = api.get_book_info("kniha-1")
+        
+        trace = slowest.traces()[0]
+        names = [s.name for s in trace.spans]
+        assert info.plot == "Plot text"
+        assert trace.attributes == {"book_link": "kniha-1"}
+        assert names.count("fetch") == 2
+        assert names.count("fetch.ttfb") == 2
+        assert names.count("fetch.download") == 2
+        assert names.count("parse.soup") == 2
+        assert "_get_book_plot" in names
+        assert "_get_isbn" in names
+        fetcher.session.get.assert_called_with("https://www.databazeknih.cz/book-detail-more-info/1",
+                                               timeout=30, stream=True)
+    
+    def test_search_is_traced(self):
+        """Test that searches record their parse phases."""
+        traces = []
+        fetcher = Fetcher(make_session('<p class="new"><a class="new" href="/prehled-knihy/hobit-1">Hobit</a></p>'))
+        api = DBKnih(Mock(), SearchService(fetcher), tracer=Tracer(sinks=[traces.append]))
+        
+        api.search("hobit")
+        
+        spans = {s.name: s for s in traces[0].spans}
+        assert spans["_parse_book_info"].attributes == {"results": 1}
+        assert "fetch.ttfb" in spans
+    
+    def test_traced_error_response_is_closed(self):
+        """Test that a streamed response is closed when its status is an error."""
+        response = Mock(status_code=503)
+        response.raise_for_status.side_effect = requests.HTTPError("503", response=response)
+        mock_session = Mock()
+        mock_session.get.return_value = response
+        fetcher = Fetcher(mock_session)
+        
+        with Tracer().trace("fetch"):
+            with pytest.raises(FetchError):
+                fetcher.fetch("https://example.com")
+        
+        response.close.assert_called_once()
+    
+    def test_untraced_fetch_does_not_stream(self):
+        """Test that the request is unchanged while tracing is off."""
+        mock_session = make_session("<html></html>")
+        
+        Fetcher(mock_session).fetch("https://example.com")
+        
+        mock_session.get.assert_called_once_with("https://example.com", timeout=30)
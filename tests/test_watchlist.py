@@ -0,0 +1,285 @@
+"""
+Unit tests for the Watchlist class.
+"""
+import logging
+import threading
+
+import pytest
+from unittest.mock import Mock
+
+from db_knih_api.book_service import BookService
+from db_knih_api.exceptions import FetchError, NotFoundError
+from db_knih_api.fetcher import Fetcher
+from db_knih_api.models import BookInfo, BookOverview
+from db_knih_api.stub_server import StubConfig, StubServer, constant
+from db_knih_api.watchlist import Watchlist
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def overview(rating=None, ratings=None, unchanged=False, etag='"v1"'):
+    """Build a poll result with the given watched values."""
+    if unchanged:
+        return BookOverview(unchanged=True, etag=etag)
+    return BookOverview(info=BookInfo(rating=rating, numberOfRatings=ratings, complete=False),
+                        etag=etag, fingerprint=f"{rating}-{ratings}")
+
+
+def make_watchlist(results, clock=None, **kwargs):
+    """Create a watchlist whose book service returns the given poll results in order."""
+    service = Mock()
+    service.poll_book_overview.side_effect = list(results)
+    kwargs.setdefault("jitter", 0.0)
+    kwargs.setdefault("requests_per_hour", 3600)
+    return Watchlist(service, clock=clock or FakeClock(), **kwargs), service
+
+
+class TestWatchlist:
+    """Test cases for the Watchlist class."""
+
+    def test_invalid_arguments(self):
+        """Test that unknown fields and inconsistent intervals are rejected."""
+        with pytest.raises(ValueError):
+            Watchlist(Mock(), watched_fields=["popularity"])
+        with pytest.raises(ValueError):
+            Watchlist(Mock(), min_interval=100, initial_interval=10)
+        with pytest.raises(ValueError):
+            Watchlist(Mock(), speedup=1.5)
+
+    def test_first_poll_records_baseline(self):
+        """Test that the first poll stores the values without an event."""
+        clock = FakeClock()
+        watchlist, service = make_watchlist([overview("85%", 100)], clock=clock)
+        events = []
+        watchlist.add_listener(events.append)
+        watchlist.add("book-1")
+
+        assert watchlist.poll_due() == []
+
+        entry = watchlist.entry("book-1")
+        assert entry.values.rating == "85%"
+        assert entry.etag == '"v1"'
+        assert entry.polls == 1
+        assert events == []
+        service.poll_book_overview.assert_called_once_with("book-1", None, None, None)
+
+    def test_change_emits_event_and_speeds_up(self):
+        """Test that a changed rating is reported and the book is polled sooner."""
+        clock = FakeClock()
+        watchlist, service = make_watchlist([overview("85%", 100), overview("86%", 101, etag='"v2"')],
+                                            clock=clock, initial_interval=3600, min_interval=60)
+        events = []
+        watchlist.add_listener(events.append)
+        watchlist.add("book-1")
+        watchlist.poll_due()
+        interval = watchlist.entry("book-1").interval
+
+        clock.now += interval
+        changes = watchlist.poll_due()
+
+        assert len(changes) == 1
+        assert changes[0].changes == {"rating": ("85%", "86%"), "numberOfRatings": (100, 101)}
+        assert events == changes
+        assert watchlist.entry("book-1").interval == interval * 0.5
+        service.poll_book_overview.assert_called_with("book-1", '"v1"', None, "85%-100")
+
+    def test_unchanged_slows_down(self):
+        """Test that unchanged polls lengthen the interval up to the maximum."""
+        clock = FakeClock()
+        results = [overview("85%", 100)] + [overview(unchanged=True)] * 5
+        watchlist, _ = make_watchlist(results, clock=clock, initial_interval=100,
+                                      min_interval=10, max_interval=300)
+        watchlist.add("book-1")
+
+        intervals = []
+        for _ in range(6):
+            clock.now += watchlist.seconds_until_due()
+            watchlist.poll_due()
+            intervals.append(watchlist.entry("book-1").interval)
+
+        assert intervals == [150, 225, 300, 300, 300, 300]
+        assert watchlist.stats().unchanged == 6
+
+    def test_unwatched_field_changes_are_ignored(self):
+        """Test that changes outside the watched fields are not reported."""
+        first = overview("85%", 100)
+        second = overview("85%", 100)
+        second.info.description = "New blurb"
+        second.fingerprint = "other"
+        watchlist, _ = make_watchlist([first, second])
+        watchlist.add("book-1")
+        watchlist.poll("book-1")
+
+        assert watchlist.poll("book-1") is None
+        assert watchlist.stats().changes == 0
+
+    def test_budget_defers_polls(self):
+        """Test that polls beyond the hourly budget wait for it to refill."""
+        clock = FakeClock()
+        watchlist, service = make_watchlist([overview("85%", 100)] * 3, clock=clock, requests_per_hour=60)
+        for link in ("book-1", "book-2", "book-3"):
+            watchlist.add(link)
+
+        watchlist.poll_due()
+        watchlist.poll_due()
+        assert service.poll_book_overview.call_count == 1
+        assert watchlist.stats().deferred == 2
+        assert watchlist.budget.time_until_available() == pytest.approx(60)
+
+        clock.now += 60
+        watchlist.poll_due()
+        assert service.poll_book_overview.call_count == 2
+        assert watchlist.stats().deferred == 2
+
+    def test_errors(self):
+        """Test that missing books back off to the maximum and fetch errors keep the interval."""
+        watchlist, _ = make_watchlist([NotFoundError("u", "missing", 404), FetchError("u", "down", 503)],
+                                      initial_interval=3600, max_interval=86400)
+        watchlist.add("gone")
+        watchlist.add("flaky")
+
+        assert watchlist.poll_due() == []
+        assert watchlist.entry("gone").interval == 86400
+        assert watchlist.entry("flaky").interval == 3600
+        assert watchlist.stats().errors == 2
+
+    def test_unparseable_page_keeps_validators(self):
+        """Test that an unparseable page is not remembered, so it is parsed (and fails) again."""
+        clock = FakeClock()
+        broken = BookOverview(etag='"v2"', fingerprint="broken")
+        watchlist, service = make_watchlist([overview("85%", 100), broken, broken], clock=clock,
+                                            min_interval=60, initial_interval=60, max_interval=60)
+        watchlist.add("book-1")
+
+        for _ in range(3):
+            watchlist.poll_due()
+            clock.now += 60
+
+        entry = watchlist.entry("book-1")
+        assert entry.etag == '"v1"'
+        assert entry.fingerprint == "85%-100"
+        assert service.poll_book_overview.call_args[0] == ("book-1", '"v1"', None, "85%-100")
+        assert watchlist.stats().errors == 2
+        assert watchlist.stats().unchanged == 1
+
+    def test_unexpected_error_keeps_book_scheduled(self, caplog):
+        """Test that an exception outside FetchError counts as an error without losing the book."""
+        clock = FakeClock()
+        watchlist, service = make_watchlist([], clock=clock, initial_interval=3600, max_workers=2)
+
+        def poll_book_overview(book_link, *validators):
+            if book_link == "broken":
+                raise ValueError("bad page")
+            return overview("1%", 1)
+
+        service.poll_book_overview.side_effect = poll_book_overview
+        watchlist.add("broken")
+        watchlist.add("fine")
+
+        with caplog.at_level(logging.ERROR, logger="db_knih_api.watchlist"):
+            watchlist.poll_due()
+
+        assert service.poll_book_overview.call_count == 2
+        assert watchlist.stats().errors == 1
+        assert watchlist.entry("fine").values is not None
+        assert "Unexpected error polling broken" in caplog.text
+        assert "ValueError: bad page" in caplog.text
+        clock.now += 3600
+        assert watchlist.seconds_until_due() == 0
+
+    def test_most_overdue_first(self):
+        """Test that due books are polled in the order they became due."""
+        clock = FakeClock()
+        watchlist, service = make_watchlist([overview("1%", 1)] * 2, clock=clock)
+        watchlist.add("older")
+        clock.now += 10
+        watchlist.add("newer")
+
+        watchlist.poll_due()
+
+        polled = [call.args[0] for call in service.poll_book_overview.call_args_list]
+        assert polled == ["older", "newer"]
+
+    def test_parallel_polls(self):
+        """Test that due books can be polled by several workers."""
+        watchlist, service = make_watchlist([overview("1%", 1)] * 4, max_workers=4)
+        for i in range(4):
+            watchlist.add(f"book-{i}")
+
+        watchlist.poll_due()
+
+        assert service.poll_book_overview.call_count == 4
+        assert watchlist.stats().due == 0
+
+    def test_save_and_load(self, tmp_path):
+        """Test that the schedule and the last values survive a restart."""
+        clock = FakeClock()
+        watchlist, _ = make_watchlist([overview("85%", 100)], clock=clock)
+        watchlist.add("book-1")
+        watchlist.poll_due()
+        path = str(tmp_path / "watchlist.json")
+        watchlist.save(path)
+
+        loaded = Watchlist.load(path, Mock(), clock=clock)
+
+        entry = loaded.entry("book-1")
+        assert entry == watchlist.entry("book-1")
+        assert entry.values.rating == "85%"
+        assert loaded.seconds_until_due() == pytest.approx(entry.next_poll - clock.now)
+
+    def test_run_stops(self):
+        """Test that the polling loop ends when the stop event is set."""
+        watchlist, service = make_watchlist([overview("1%", 1)])
+        watchlist.add("book-1")
+        stop = threading.Event()
+
+        thread = threading.Thread(target=watchlist.run, args=(stop,), kwargs={"max_idle": 0.01})
+        thread.start()
+        stop.set()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+
+
+class TestConditionalPolling:
+    """Test cases for conditional polls against the stub server."""
+
+    def test_not_modified_is_not_parsed(self):
+        """Test that the second poll is answered 304 and reported unchanged."""
+        with StubServer(StubConfig(latency=constant(0)), books=10) as server:
+            service = BookService(Fetcher(server.session()))
+            link = server.book_link(1)
+
+            first = service.poll_book_overview(link)
+            second = service.poll_book_overview(link, first.etag, first.last_modified, first.fingerprint)
+            statuses = server.stats()
+
+        assert first.info.rating is not None
+        assert first.etag
+        assert second.unchanged and second.info is None
+        assert second.etag == first.etag
+        assert statuses == {200: 1, 304: 1}
+
+    def test_fetch_conditional_sends_validators(self):
+        """Test that the validators are sent as headers and updated from the response."""
+        mock_session = Mock()
+        mock_session.get.return_value.status_code = 304
+        mock_session.get.return_value.headers = {"ETag": '"v2"'}
+        fetcher = Fetcher(mock_session)
+
+        response = fetcher.fetch_conditional("https://example.com", etag='"v1"',
+                                             last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+
+        assert response.not_modified
+        assert response.etag == '"v2"'
+        mock_session.get.assert_called_once_with("https://example.com", timeout=30, headers={
+            "If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+        })